@@ -0,0 +1,35 @@
+from django.contrib import admin
+
+from apps.administracion.models import DiaPendiente, MarcaAgregado, ResumenDiario
+from apps.common.admin import BaseAdmin
+
+
+class SoloLecturaAdmin(BaseAdmin):
+    """
+    Tablas mantenidas por procesos (apps.administracion.agregados).
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumenDiario)
+class ResumenDiarioAdmin(SoloLecturaAdmin):
+    list_display = ('fecha', 'fuente', 'dimension', 'etiqueta', 'operaciones', 'importe', 'calculado')
+    list_filter = ('fuente', 'dimension')
+    search_fields = ('etiqueta',)
+    date_hierarchy = 'fecha'
+
+
+@admin.register(MarcaAgregado)
+class MarcaAgregadoAdmin(SoloLecturaAdmin):
+    list_display = ('nombre', 'marca', 'actualizado')
+
+
+@admin.register(DiaPendiente)
+class DiaPendienteAdmin(SoloLecturaAdmin):
+    list_display = ('fecha', 'fuente', 'creado')
+    list_filter = ('fuente',)
@@ -0,0 +1,398 @@
+"""
+Resúmenes diarios de ingresos (ResumenDiario).
+
+Los informes y el cierre mensual leen los resúmenes en lugar de agregar las
+tablas de movimientos, de modo que su coste depende del periodo consultado y
+no del tamaño del histórico.
+
+`actualizar_resumenes()` incorpora los cambios desde la última marca de agua:
+recalcula completos los días anotados en DiaPendiente por las señales de
+guardado y borrado de las tablas de origen (el día anterior y el nuevo de un
+movimiento, y también los borrados físicos y en cascada) y los de filas con
+`updated_at` posterior a la marca, que cubren las escrituras masivas sin
+señales. Repetirlo es inocuo. `reconstruir()` recalcula todo el histórico
+mes a mes, opcionalmente en varios procesos.
+"""
+import multiprocessing
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, DateTimeField, DecimalField, ExpressionWrapper, F, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from apps.administracion.models import DiaPendiente, MarcaAgregado, ResumenDiario
+from apps.alquiler.models import Alquiler, DetalleAlquiler, EstadoAlquiler, Penalizacion
+from apps.clases.models import InscripcionClase
+from apps.common.utils import campo_por_ruta, filtro_periodo, sumar_meses
+from apps.socios.models import PagoSuscripcion
+from apps.ventas.models import DetalleVenta, EstadoVenta, Venta
+
+MARCA = 'resumen_diario'
+CENTIMOS = Decimal('0.01')
+
+# Estados de venta que cuentan como ingreso
+ESTADOS_VENTA_INGRESO = ('Pagada', 'Completada')
+
+
+def _dia(modelo, ruta):
+    if isinstance(campo_por_ruta(modelo, ruta), DateTimeField):
+        return TruncDate(ruta)
+    return F(ruta)
+
+
+def _importe(expresion):
+    return ExpressionWrapper(expresion, output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _ventas():
+    estados = [estado.pk for nombre in ESTADOS_VENTA_INGRESO
+               if (estado := EstadoVenta.objects.por_nombre(nombre)) is not None]
+    return Venta.objects.filter(estado_id__in=estados)
+
+
+def _detalles_venta():
+    return DetalleVenta.objects.filter(venta__in=_ventas())
+
+
+def _alquileres():
+    cancelado = EstadoAlquiler.objects.por_nombre("Cancelado")
+    queryset = Alquiler.objects.all()
+    return queryset.exclude(estado_id=cancelado.pk) if cancelado else queryset
+
+
+def _detalles_alquiler():
+    return DetalleAlquiler.objects.filter(alquiler__in=_alquileres())
+
+
+@dataclass
+class Medida:
+    """
+    Agregado de una fuente en una dimensión: qué filas se suman (`queryset`),
+    su fecha, el importe, qué se cuenta como operación y, salvo en el total,
+    la clave y etiqueta de la dimensión.
+    """
+    fuente: str
+    dimension: str
+    queryset: object
+    fecha: str
+    importe: object
+    operaciones: str = 'pk'
+    clave: str = None
+    etiqueta: str = None
+
+    def calcular(self, desde, hasta):
+        queryset = self.queryset()
+        modelo = queryset.model
+        dia = _dia(modelo, self.fecha)
+        campos = ['dia'] + [campo for campo in (self.clave, self.etiqueta) if campo]
+        filas = (queryset
+                 .filter(filtro_periodo(modelo, self.fecha, desde, hasta))
+                 .annotate(dia=dia)
+                 .values(*campos)
+                 .annotate(total_operaciones=Count(self.operaciones, distinct=True),
+                           total_importe=Sum(self.importe))
+                 .order_by())
+        return [
+            ResumenDiario(
+                fecha=fila['dia'], fuente=self.fuente, dimension=self.dimension,
+                clave=str(fila[self.clave]) if self.clave and fila[self.clave] is not None else '',
+                etiqueta=(fila[self.etiqueta] or '') if self.etiqueta else '',
+                operaciones=fila['total_operaciones'],
+                importe=Decimal(fila['total_importe'] or 0).quantize(CENTIMOS),
+            )
+            for fila in filas
+        ]
+
+
+# Los importes de una dimensión no tienen por qué sumar el total de la
+# fuente: p. ej. las categorías de venta suman líneas sin impuestos.
+MEDIDAS = [
+    Medida('venta', 'total', _ventas, 'fecha_venta', 'total'),
+    Medida('venta', 'metodo_pago', _ventas, 'fecha_venta', 'total',
+           clave='metodo_pago', etiqueta='metodo_pago__nombre'),
+    Medida('venta', 'categoria', _detalles_venta, 'venta__fecha_venta',
+           _importe(DetalleVenta.expresion_subtotal()), operaciones='venta',
+           clave='producto__categoria', etiqueta='producto__categoria__nombre'),
+    Medida('alquiler', 'total', _alquileres, 'fecha_inicio', 'costo_total'),
+    Medida('alquiler', 'categoria', _detalles_alquiler, 'alquiler__fecha_inicio',
+           _importe(DetalleAlquiler.expresion_subtotal()), operaciones='alquiler',
+           clave='recurso__categoria', etiqueta='recurso__categoria__nombre'),
+    Medida('penalizacion', 'total', Penalizacion.objects.all, 'fecha', 'monto'),
+    Medida('suscripcion', 'total', lambda: PagoSuscripcion.objects.filter(confirmado=True), 'fecha', 'monto'),
+    Medida('suscripcion', 'forma_pago', lambda: PagoSuscripcion.objects.filter(confirmado=True), 'fecha', 'monto',
+           clave='suscripcion__forma_pago', etiqueta='suscripcion__forma_pago__nombre'),
+    Medida('suscripcion', 'tipo_suscripcion', lambda: PagoSuscripcion.objects.filter(confirmado=True),
+           'fecha', 'monto', clave='suscripcion__tipo', etiqueta='suscripcion__tipo__nombre'),
+    Medida('clase', 'total', lambda: InscripcionClase.objects.filter(reembolsado=False),
+           'fecha_inscripcion', 'precio_pagado'),
+    Medida('clase', 'categoria', lambda: InscripcionClase.objects.filter(reembolsado=False),
+           'fecha_inscripcion', 'precio_pagado',
+           clave='sesion__clase__categoria', etiqueta='sesion__clase__categoria__nombre'),
+]
+
+# Tablas cuyos cambios afectan a cada fuente, con la ruta a la fecha del movimiento
+ORIGENES = {
+    'venta': [(Venta, 'fecha_venta'), (DetalleVenta, 'venta__fecha_venta')],
+    'alquiler': [(Alquiler, 'fecha_inicio'), (DetalleAlquiler, 'alquiler__fecha_inicio')],
+    'penalizacion': [(Penalizacion, 'fecha')],
+    'suscripcion': [(PagoSuscripcion, 'fecha')],
+    'clase': [(InscripcionClase, 'fecha_inscripcion')],
+}
+
+
+
+
+def _dias_guardados(sender, pk, using):
+    """
+    (fuente, día) del movimiento `pk` de `sender` según la base de datos.
+    """
+    dias = set()
+    for fuente, fecha in _ORIGENES_POR_MODELO[sender]:
+        dia = (sender._base_manager.using(using)
+               .filter(pk=pk)
+               .annotate(dia=_dia(sender, fecha))
+               .values_list('dia', flat=True)
+               .first())
+        if dia is not None:
+            dias.add((fuente, dia))
+    return dias
+
+
+def _anotar(dias, using):
+    if dias:
+        DiaPendiente.objects.using(using).bulk_create(
+            [DiaPendiente(fuente=fuente, fecha=dia) for fuente, dia in dias]
+        )
+
+
+def _antes_de_guardar(sender, instance, raw=False, using=None, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._dias_resumen = _dias_guardados(sender, instance.pk, using)
+
+
+def _despues_de_guardar(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        dias = instance.__dict__.pop('_dias_resumen', set())
+        _anotar(dias | _dias_guardados(sender, instance.pk, using), using)
+
+
+def _antes_de_borrar(sender, instance, using=None, **kwargs):
+    # En un borrado en cascada la fila padre aún existe aquí pero no en post_delete
+    instance._dias_resumen = _dias_guardados(sender, instance.pk, using)
+
+
+def _despues_de_borrar(sender, instance, using=None, **kwargs):
+    _anotar(instance.__dict__.pop('_dias_resumen', set()), using)
+
+
+_ORIGENES_POR_MODELO = {}
+for _fuente, _origenes in ORIGENES.items():
+    for _modelo, _fecha in _origenes:
+        _ORIGENES_POR_MODELO.setdefault(_modelo, []).append((_fuente, _fecha))
+
+for _modelo in _ORIGENES_POR_MODELO:
+    _uid = f"resumen_diario:{_modelo._meta.label_lower}"
+    pre_save.connect(_antes_de_guardar, sender=_modelo, dispatch_uid=_uid)
+    post_save.connect(_despues_de_guardar, sender=_modelo, dispatch_uid=_uid)
+    pre_delete.connect(_antes_de_borrar, sender=_modelo, dispatch_uid=_uid)
+    post_delete.connect(_despues_de_borrar, sender=_modelo, dispatch_uid=_uid)
+
+
+def recalcular(desde, hasta, fuentes=None):
+    """
+    Recalcula los resúmenes de los días [desde, hasta] de las fuentes
+    indicadas (todas por defecto). Devuelve el número de filas escritas.
+    """
+    fuentes = fuentes or list(ORIGENES)
+    filas = []
+    for medida in MEDIDAS:
+        if medida.fuente in fuentes:
+            filas.extend(medida.calcular(desde, hasta))
+    with transaction.atomic():
+        ResumenDiario.objects.filter(fuente__in=fuentes, fecha__gte=desde, fecha__lte=hasta).delete()
+        ResumenDiario.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def _rangos(dias):
+    """
+    Agrupa un conjunto de días en rangos consecutivos [inicio, fin].
+    """
+    rangos = []
+    for dia in sorted(dias):
+        if rangos and dia == rangos[-1][1] + timedelta(days=1):
+            rangos[-1][1] = dia
+        else:
+            rangos.append([dia, dia])
+    return rangos
+
+
+def _dias_modificados(desde, dias=None):
+    """
+    Añade a `dias` los días afectados en cada fuente por filas modificadas a
+    partir de `desde`, incluidas las eliminadas lógicamente.
+    """
+    dias = {} if dias is None else dias
+    for fuente, origenes in ORIGENES.items():
+        for modelo, fecha in origenes:
+            dia = _dia(modelo, fecha)
+            valores = (modelo._base_manager
+                       .filter(updated_at__gte=desde)
+                       .annotate(dia=dia)
+                       .values_list('dia', flat=True)
+                       .distinct()
+                       .order_by())
+            dias.setdefault(fuente, set()).update(dia for dia in valores if dia is not None)
+    return dias
+
+
+def actualizar_resumenes():
+    """
+    Incorpora los cambios posteriores a la marca de agua. Si no hay marca
+    (primera ejecución) reconstruye todo el histórico.
+
+    La marca se adelanta al instante de inicio y los cambios se buscan desde
+    la marca anterior menos AGREGADOS_MARGEN_MINUTOS, para no perder filas
+    de transacciones que confirmaron después de empezar la ejecución previa.
+    Los días pendientes leídos se borran en la misma transacción.
+    """
+    with transaction.atomic():
+        marca, _creada = MarcaAgregado.objects.select_for_update().get_or_create(nombre=MARCA)
+        pendientes = list(DiaPendiente.objects.values_list('pk', 'fuente', 'fecha').order_by('pk'))
+        ids = [pk for pk, _fuente, _fecha in pendientes]
+        for posicion in range(0, len(ids), 1000):
+            DiaPendiente.objects.filter(pk__in=ids[posicion:posicion + 1000]).delete()
+        if marca.marca is None:
+            resultado = reconstruir(procesos=1)
+            return {'dias': None, 'filas': resultado['filas'], 'completa': True}
+
+        inicio = timezone.now()
+        margen = timedelta(minutes=getattr(settings, 'AGREGADOS_MARGEN_MINUTOS', 10))
+        dias_pendientes = {}
+        for _pk, fuente, fecha in pendientes:
+            dias_pendientes.setdefault(fuente, set()).add(fecha)
+        total_dias = total_filas = 0
+        for fuente, dias in _dias_modificados(marca.marca - margen, dias_pendientes).items():
+            for desde, hasta in _rangos(dias):
+                total_filas += recalcular(desde, hasta, [fuente])
+                total_dias += (hasta - desde).days + 1
+        marca.marca = inicio
+        marca.save(update_fields=['marca', 'actualizado'])
+    return {'dias': total_dias, 'filas': total_filas, 'completa': False}
+
+
+def periodo_historico():
+    """
+    Primer y último día con movimientos en cualquiera de las fuentes.
+    """
+    extremos = []
+    for origenes in ORIGENES.values():
+        modelo, fecha = origenes[0]
+        valores = modelo._base_manager.aggregate(primero=Min(fecha), ultimo=Max(fecha))
+        for valor in valores.values():
+            if valor is not None:
+                extremos.append(timezone.localtime(valor).date() if hasattr(valor, 'hour') else valor)
+    return (min(extremos), max(extremos)) if extremos else (None, None)
+
+
+def _meses(desde, hasta):
+    inicio = desde.replace(day=1)
+    while inicio <= hasta:
+        siguiente = sumar_meses(inicio, 1)
+        yield inicio, min(siguiente - timedelta(days=1), hasta)
+        inicio = siguiente
+
+
+def _recalcular_mes(desde, hasta):
+    return recalcular(desde, hasta)
+
+
+def reconstruir(desde=None, hasta=None, procesos=1, progreso=None):
+    """
+    Recalcula los resúmenes del periodo (todo el histórico por defecto) mes a
+    mes, con `procesos` procesos en paralelo. Una reconstrucción completa
+    deja la marca de agua en su instante de inicio.
+    """
+    inicio = timezone.now()
+    completa = desde is None and hasta is None
+    primero, ultimo = periodo_historico()
+    desde, hasta = desde or primero, hasta or ultimo
+    if desde is None:
+        return {'meses': 0, 'filas': 0}
+
+    meses = list(_meses(desde, hasta))
+    if procesos > 1 and not connection.in_atomic_block:
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(min(procesos, len(meses))) as pool:
+            filas = 0
+            for escritas in pool.starmap(_recalcular_mes, meses):
+                filas += escritas
+    else:
+        filas = 0
+        for indice, (primero_mes, ultimo_mes) in enumerate(meses, 1):
+            filas += _recalcular_mes(primero_mes, ultimo_mes)
+            if progreso:
+                progreso(indice, len(meses), primero_mes)
+
+    if completa:
+        MarcaAgregado.objects.update_or_create(nombre=MARCA, defaults={'marca': inicio})
+    return {'meses': len(meses), 'filas': filas}
+
+
+# Lectura
+
+def ingresos(desde, hasta, dimension='total', fuente=None, agrupar='dia'):
+    """
+    Ingresos del periodo desde los resúmenes: por día ('dia'), por mes
+    ('mes') o acumulados (None), por fuente y, si `dimension` no es 'total',
+    por valor de la dimensión.
+    """
+    queryset = ResumenDiario.objects.filter(dimension=dimension, fecha__gte=desde, fecha__lte=hasta)
+    if fuente:
+        queryset = queryset.filter(fuente=fuente)
+    campos = ['fuente']
+    if dimension != 'total':
+        campos += ['clave', 'etiqueta']
+    if agrupar == 'dia':
+        queryset = queryset.annotate(periodo=F('fecha'))
+        campos.insert(0, 'periodo')
+    elif agrupar == 'mes':
+        queryset = queryset.annotate(periodo=TruncMonth('fecha'))
+        campos.insert(0, 'periodo')
+    filas = list(queryset
+                 .values(*campos)
+                 .annotate(operaciones=Sum('operaciones'), importe=Sum('importe'))
+                 .order_by(*campos))
+    for fila in filas:
+        fila['importe'] = fila['importe'].quantize(CENTIMOS)
+    return filas
+
+
+def cierre_mensual(anio, mes):
+    """
+    Resumen de ingresos de un mes para el cierre contable: total, total por
+    fuente y desglose por cada dimensión, en una consulta.
+    """
+    desde = date(anio, mes, 1)
+    hasta = sumar_meses(desde, 1) - timedelta(days=1)
+    filas = (ResumenDiario.objects
+             .filter(fecha__gte=desde, fecha__lte=hasta)
+             .values('fuente', 'dimension', 'clave', 'etiqueta')
+             .annotate(operaciones=Sum('operaciones'), importe=Sum('importe'))
+             .order_by('fuente', 'dimension', '-importe'))
+    cierre = {'desde': desde, 'hasta': hasta, 'total': Decimal(0), 'fuentes': {}, 'desglose': {}}
+    for fila in filas:
+        fila['importe'] = fila['importe'].quantize(CENTIMOS)
+        if fila['dimension'] == 'total':
+            cierre['fuentes'][fila['fuente']] = {'operaciones': fila['operaciones'], 'importe': fila['importe']}
+            cierre['total'] += fila['importe']
+        else:
+            cierre['desglose'].setdefault(fila['fuente'], {}).setdefault(fila['dimension'], []).append(
+                {'clave': fila['clave'], 'etiqueta': fila['etiqueta'],
+                 'operaciones': fila['operaciones'], 'importe': fila['importe']})
+    return cierre
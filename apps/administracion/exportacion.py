@@ -0,0 +1,268 @@
+"""
+Exportación en streaming de las tablas de movimientos para contabilidad.
+
+Cada exportación es una proyección con values_list() recorrida por lotes con
+iterator(chunk_size=...), que en PostgreSQL usa un cursor de servidor: la
+memoria no crece con el número de filas y los primeros bytes se envían en
+cuanto llega el primer lote.
+
+    for bloque in generar_csv('ventas', desde=date(2024, 1, 1)):
+        fichero.write(bloque)
+"""
+import csv
+import io
+from decimal import Decimal
+from dataclasses import dataclass, field
+
+from django.db import connections, router
+from django.db.models import DateTimeField, DecimalField, ExpressionWrapper
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.common.utils import campo_por_ruta, filtro_periodo
+from club_core.routers import en_replica
+
+LOTE = 2000
+
+
+@dataclass
+class Exportacion:
+    """
+    Definición de una exportación: modelo, columnas (cabecera, campo) y el
+    campo de fecha por el que se filtra el periodo.
+    """
+    nombre: str
+    modelo: object
+    columnas: list
+    campo_fecha: str
+    anotaciones: dict = field(default_factory=dict)
+    descripcion: str = ''
+
+    @property
+    def cabecera(self):
+        return [cabecera for cabecera, _campo in self.columnas]
+
+    @property
+    def permiso(self):
+        """
+        Permiso necesario para descargarla: ver las filas del modelo exportado.
+        """
+        return f'{self.modelo._meta.app_label}.view_{self.modelo._meta.model_name}'
+
+    def queryset(self, desde=None, hasta=None, filtro=None, using=None):
+        """
+        Proyección de la exportación en el periodo [desde, hasta] (fechas
+        incluidas), ordenada por clave primaria.
+        """
+        queryset = (self.modelo.objects.using(using)
+                    .annotate(**self.anotaciones)
+                    .filter(filtro_periodo(self.modelo, self.campo_fecha, desde, hasta)))
+        if filtro is not None:
+            queryset = queryset.filter(filtro)
+        return queryset.order_by('pk').values_list('pk', *[campo for _cabecera, campo in self.columnas])
+
+    def _campo(self, ruta):
+        if ruta in self.anotaciones:
+            return self.anotaciones[ruta].output_field
+        return campo_por_ruta(self.modelo, ruta)
+
+    def columnas_fecha_hora(self):
+        return [indice for indice, (_cabecera, campo) in enumerate(self.columnas)
+                if isinstance(self._campo(campo), DateTimeField)]
+
+    def columnas_importe(self):
+        """
+        Columnas decimales calculadas, que algunos motores (SQLite) devuelven
+        sin redondear a su número de decimales.
+        """
+        return [(indice, Decimal(1).scaleb(-self.anotaciones[campo].output_field.decimal_places))
+                for indice, (_cabecera, campo) in enumerate(self.columnas)
+                if campo in self.anotaciones and isinstance(self._campo(campo), DecimalField)]
+
+
+def exportaciones():
+    """
+    Exportaciones disponibles por nombre. Los modelos se importan aquí para
+    que las URLs no dependan de la carga de las aplicaciones.
+    """
+    from apps.alquiler.models import DetalleAlquiler, Penalizacion
+    from apps.socios.models import PagoSuscripcion
+    from apps.ventas.models import DetalleVenta
+
+    importe = DecimalField(max_digits=12, decimal_places=2)
+    return {exportacion.nombre: exportacion for exportacion in [
+        Exportacion(
+            'ventas', DetalleVenta, [
+                ('venta', 'venta__codigo'),
+                ('fecha', 'venta__fecha_venta'),
+                ('fecha_pago', 'venta__fecha_pago'),
+                ('estado', 'venta__estado__nombre'),
+                ('numero_socio', 'venta__cliente__numero_socio'),
+                ('cliente', 'venta__cliente__username'),
+                ('metodo_pago', 'venta__metodo_pago__nombre'),
+                ('referencia_pago', 'venta__referencia_pago'),
+                ('producto', 'producto__codigo'),
+                ('descripcion', 'producto__nombre'),
+                ('cantidad', 'cantidad'),
+                ('precio_unitario', 'precio_unitario'),
+                ('descuento_unitario', 'descuento_unitario'),
+                ('importe_linea', 'importe_linea'),
+                ('subtotal_venta', 'venta__subtotal'),
+                ('impuestos_venta', 'venta__impuestos'),
+                ('descuento_venta', 'venta__descuento'),
+                ('total_venta', 'venta__total'),
+            ],
+            campo_fecha='venta__fecha_venta',
+            anotaciones={'importe_linea': ExpressionWrapper(DetalleVenta.expresion_subtotal(),
+                                                            output_field=importe)},
+            descripcion='Líneas de venta con los totales de su venta',
+        ),
+        Exportacion(
+            'alquileres', DetalleAlquiler, [
+                ('alquiler', 'alquiler__codigo'),
+                ('fecha_solicitud', 'alquiler__fecha_solicitud'),
+                ('fecha_inicio', 'alquiler__fecha_inicio'),
+                ('fecha_fin_prevista', 'alquiler__fecha_fin_prevista'),
+                ('fecha_devolucion', 'alquiler__fecha_devolucion'),
+                ('estado', 'alquiler__estado__nombre'),
+                ('numero_socio', 'alquiler__socio__numero_socio'),
+                ('socio', 'alquiler__socio__username'),
+                ('recurso', 'recurso__codigo'),
+                ('descripcion', 'recurso__nombre'),
+                ('cantidad', 'cantidad'),
+                ('precio_unitario', 'precio_unitario'),
+                ('deposito_unitario', 'deposito_unitario'),
+                ('importe_linea', 'importe_linea'),
+                ('devuelto', 'devuelto'),
+                ('costo_total_alquiler', 'alquiler__costo_total'),
+                ('deposito_alquiler', 'alquiler__deposito'),
+            ],
+            campo_fecha='alquiler__fecha_inicio',
+            anotaciones={'importe_linea': ExpressionWrapper(DetalleAlquiler.expresion_subtotal(),
+                                                            output_field=importe)},
+            descripcion='Líneas de alquiler con los importes de su alquiler',
+        ),
+        Exportacion(
+            'penalizaciones', Penalizacion, [
+                ('alquiler', 'alquiler__codigo'),
+                ('fecha', 'fecha'),
+                ('numero_socio', 'alquiler__socio__numero_socio'),
+                ('socio', 'alquiler__socio__username'),
+                ('recurso', 'detalle__recurso__codigo'),
+                ('motivo', 'motivo'),
+                ('monto', 'monto'),
+                ('automatica', 'automatica'),
+                ('pagada', 'pagada'),
+                ('fecha_pago', 'fecha_pago'),
+            ],
+            campo_fecha='fecha',
+            descripcion='Penalizaciones de alquileres',
+        ),
+        Exportacion(
+            'pagos', PagoSuscripcion, [
+                ('fecha', 'fecha'),
+                ('numero_socio', 'suscripcion__socio__numero_socio'),
+                ('socio', 'suscripcion__socio__username'),
+                ('tipo_suscripcion', 'suscripcion__tipo__nombre'),
+                ('periodicidad', 'suscripcion__periodicidad'),
+                ('forma_pago', 'suscripcion__forma_pago__nombre'),
+                ('monto', 'monto'),
+                ('referencia', 'referencia'),
+                ('confirmado', 'confirmado'),
+                ('fecha_confirmacion', 'fecha_confirmacion'),
+            ],
+            campo_fecha='fecha',
+            descripcion='Pagos de suscripciones',
+        ),
+    ]}
+
+
+def obtener_exportacion(nombre):
+    try:
+        return exportaciones()[nombre]
+    except KeyError:
+        raise LookupError(f"Exportación desconocida: {nombre}") from None
+
+
+def _filas(queryset, lote):
+    """
+    Recorre la proyección por lotes. Con cursores de servidor desactivados
+    (PgBouncer en modo transacción) iterator() cargaría todo el resultado en
+    el cliente, así que se pagina por clave primaria.
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor == 'postgresql' and conexion.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        ultimo = None
+        while True:
+            pagina = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+            filas = list(pagina[:lote])
+            if not filas:
+                return
+            yield from filas
+            ultimo = filas[-1][0]
+    else:
+        yield from queryset.iterator(chunk_size=lote)
+
+
+def generar_csv(nombre, desde=None, hasta=None, filtro=None, lote=LOTE, delimitador=',', replica=True,
+                progreso=None):
+    """
+    Genera el CSV de la exportación en bloques de bytes (UTF-8 con BOM para
+    que las hojas de cálculo detecten la codificación), uno por lote de filas.
+    Con `replica` las lecturas van a una réplica si hay alguna configurada.
+    `progreso(filas)` se llama tras cada bloque con el total de filas escritas.
+    """
+    exportacion = obtener_exportacion(nombre) if isinstance(nombre, str) else nombre
+    if replica:
+        with en_replica():
+            alias = router.db_for_read(exportacion.modelo)
+    else:
+        alias = 'default'
+    queryset = exportacion.queryset(desde, hasta, filtro, using=alias)
+    fechas_hora = exportacion.columnas_fecha_hora()
+    importes = exportacion.columnas_importe()
+    zona = timezone.get_current_timezone()
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=delimitador)
+    escritor.writerow(exportacion.cabecera)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+
+    pendientes = total = 0
+    for fila in _filas(queryset, lote):
+        fila = list(fila[1:])
+        for indice in fechas_hora:
+            if fila[indice] is not None:
+                fila[indice] = fila[indice].astimezone(zona).strftime('%Y-%m-%d %H:%M:%S')
+        for indice, exponente in importes:
+            if fila[indice] is not None:
+                fila[indice] = fila[indice].quantize(exponente)
+        escritor.writerow(fila)
+        pendientes += 1
+        if pendientes == lote:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            total += pendientes
+            pendientes = 0
+            if progreso:
+                progreso(total)
+    if pendientes:
+        yield buffer.getvalue().encode('utf-8')
+        total += pendientes
+    if progreso:
+        progreso(total)
+
+
+def respuesta_csv(nombre, desde=None, hasta=None, filtro=None, **opciones):
+    """
+    StreamingHttpResponse con la exportación como fichero adjunto.
+    """
+    periodo = '_'.join(str(fecha) for fecha in (desde, hasta) if fecha)
+    fichero = f"{nombre}_{periodo}.csv" if periodo else f"{nombre}.csv"
+    respuesta = StreamingHttpResponse(generar_csv(nombre, desde, hasta, filtro, **opciones),
+                                      content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{fichero}"'
+    return respuesta
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.administracion.agregados import actualizar_resumenes, cierre_mensual, reconstruir
+from datetime import date
+import time
+
+
+class Command(BaseCommand):
+    help = 'Actualiza los resúmenes diarios de ingresos desde la última marca de agua o los reconstruye'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reconstruir', action='store_true',
+                            help='Recalcula todo el histórico (o el periodo de --desde/--hasta) mes a mes')
+        parser.add_argument('--desde', type=date.fromisoformat, help='Primer día a reconstruir (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Último día a reconstruir (AAAA-MM-DD)')
+        parser.add_argument('--procesos', type=int,
+                            help='Procesos para reconstruir meses en paralelo (por defecto 4, o 1 con SQLite)')
+        parser.add_argument('--cierre', metavar='AAAA-MM',
+                            help='Muestra el cierre del mes indicado a partir de los resúmenes')
+
+    def handle(self, *args, **options):
+        if options['cierre']:
+            try:
+                anio, mes = (int(parte) for parte in options['cierre'].split('-'))
+                self.mostrar_cierre(cierre_mensual(anio, mes))
+            except ValueError:
+                raise CommandError('El mes de --cierre debe tener el formato AAAA-MM')
+            return
+
+        inicio = time.monotonic()
+        if options['reconstruir'] or options['desde'] or options['hasta']:
+            procesos = options['procesos'] or (1 if connection.vendor == 'sqlite' else 4)
+            resultado = reconstruir(
+                options['desde'], options['hasta'], procesos=procesos,
+                progreso=lambda indice, total, mes: self.stdout.write(f'  {mes:%m/%Y} ({indice}/{total})'),
+            )
+            mensaje = f"{resultado['meses']} meses reconstruidos, {resultado['filas']} filas de resumen"
+        else:
+            resultado = actualizar_resumenes()
+            if resultado['completa']:
+                mensaje = f"Primera ejecución: {resultado['filas']} filas de resumen generadas"
+            else:
+                mensaje = f"{resultado['dias']} días recalculados, {resultado['filas']} filas de resumen"
+        self.stdout.write(self.style.SUCCESS(f'{mensaje} en {time.monotonic() - inicio:.1f}s'))
+
+    def mostrar_cierre(self, cierre):
+        self.stdout.write(f"Cierre del {cierre['desde']:%d/%m/%Y} al {cierre['hasta']:%d/%m/%Y}")
+        for fuente, datos in cierre['fuentes'].items():
+            self.stdout.write(f"  {fuente:14} {datos['operaciones']:8} operaciones {datos['importe']:>14}")
+            for dimension, filas in cierre['desglose'].get(fuente, {}).items():
+                for fila in filas:
+                    self.stdout.write(f"      {dimension}: {fila['etiqueta'] or '-':30} {fila['importe']:>14}")
+        self.stdout.write(self.style.SUCCESS(f"  Total {cierre['total']:>36}"))
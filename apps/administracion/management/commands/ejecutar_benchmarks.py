@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from benchmarks.escenarios import escenarios
+from benchmarks.medicion import SinDatos, cargar, commit_actual, comparar, guardar
+from fnmatch import fnmatch
+import os
+
+
+class Command(BaseCommand):
+    help = ('Mide consultas y tiempo de los caminos críticos de los modelos, guarda el resultado '
+            'en JSON y falla si empeora respecto a una referencia')
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenarios', nargs='*',
+                            help='Patrones de escenarios a ejecutar (por ejemplo "venta.*"); por defecto todos')
+        parser.add_argument('--listar', action='store_true', help='Muestra los escenarios disponibles')
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--muestra', type=int, default=50,
+                            help='Filas por escenario y operaciones de los escenarios concurrentes')
+        parser.add_argument('--concurrencia', action='store_true',
+                            help='Incluye los escenarios concurrentes, que confirman datos en la base de datos')
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--salida',
+                            help='Fichero JSON de resultados (por defecto benchmarks/resultados/<fecha>-<commit>.json)')
+        parser.add_argument('--comparar', metavar='FICHERO', help='Resultado JSON de referencia')
+        parser.add_argument('--umbral', type=float, default=getattr(settings, 'BENCHMARKS_UMBRAL', 0.2),
+                            help='Aumento relativo de la mediana que se considera regresión (por defecto 0.2)')
+        parser.add_argument('--margen-ms', type=float, default=2.0,
+                            help='Aumento mínimo en ms para considerar regresión (por defecto 2)')
+        parser.add_argument('--umbral-consultas', type=int, default=0,
+                            help='Consultas adicionales permitidas (por defecto 0)')
+
+    def handle(self, *args, **options):
+        seleccion = [
+            escenario for escenario in escenarios()
+            if (not options['escenarios'] or any(fnmatch(escenario.nombre, patron) for patron in options['escenarios']))
+            and (options['concurrencia'] or not escenario.concurrente)
+        ]
+        if options['listar']:
+            for escenario in seleccion:
+                self.stdout.write(f'{escenario.nombre:40} {escenario.descripcion}')
+            return
+        if not seleccion:
+            raise CommandError('Ningún escenario coincide con los patrones indicados')
+
+        referencia = cargar(options['comparar']) if options['comparar'] else {}
+        resultados = {}
+        for escenario in seleccion:
+            try:
+                resultado = escenario.ejecutar(options['repeticiones'], options['muestra'], options['hilos'])
+            except SinDatos as error:
+                self.stdout.write(self.style.WARNING(f'  {escenario.nombre}: omitido ({error})'))
+                continue
+            resultados[escenario.nombre] = resultado
+            self.stdout.write(self.linea(escenario.nombre, resultado, referencia.get(escenario.nombre)))
+
+        ruta = options['salida'] or (settings.BASE_DIR / 'benchmarks' / 'resultados' /
+                                     f'{timezone.now():%Y%m%d-%H%M%S}-{commit_actual() or "sin-commit"}.json')
+        guardar(resultados, ruta, {'muestra': options['muestra'], 'hilos': options['hilos'],
+                                   'configuracion': self.configuracion()})
+        self.stdout.write(f'Resultados guardados en {ruta}')
+
+        regresiones = comparar(resultados, referencia, options['umbral'], options['margen_ms'],
+                               options['umbral_consultas'])
+        if regresiones:
+            for regresion in regresiones:
+                self.stderr.write(f'  {regresion}')
+            raise CommandError(f'{len(regresiones)} regresiones detectadas')
+        self.stdout.write(self.style.SUCCESS(f'{len(resultados)} escenarios sin regresiones'))
+
+    def configuracion(self):
+        """
+        Configuración de base de datos activa, para comparar resultados de
+        distintos perfiles (SQLite, PostgreSQL, pool...) sobre los mismos datos.
+        """
+        default = settings.DATABASES['default']
+        return {
+            'entorno': getattr(settings, 'ENTORNO', None),
+            'motor': default['ENGINE'],
+            'conn_max_age': default.get('CONN_MAX_AGE', 0),
+            'health_checks': default.get('CONN_HEALTH_CHECKS', False),
+            'pool': os.environ.get('DB_POOL') or None,
+            'replicas': len(getattr(settings, 'DATABASE_REPLICAS', [])),
+        }
+
+    def linea(self, nombre, resultado, base):
+        consultas = '-' if resultado['consultas'] is None else resultado['consultas']
+        linea = f'  {nombre:40} {resultado["mediana_ms"]:10.1f} ms {consultas:>6} consultas'
+        if base:
+            linea += f'  (referencia {base["mediana_ms"]:.1f} ms, {base.get("consultas") or "-"} consultas)'
+        extra = {clave: valor for clave, valor in resultado.items()
+                 if clave not in ('mediana_ms', 'min_ms', 'max_ms', 'consultas', 'repeticiones', 'invariantes')}
+        if extra:
+            linea += '  ' + ', '.join(f'{clave}={valor}' for clave, valor in extra.items())
+        return linea
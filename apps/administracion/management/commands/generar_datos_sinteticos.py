@@ -0,0 +1,566 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from apps.common.utils import sumar_meses
+from apps.recursos.models import (Categoria, TipoRecurso, EstadoRecurso, Recurso, EtiquetaRecurso,
+                                  ImagenRecurso, MantenimientoRecurso)
+from apps.alquiler.models import EstadoAlquiler, Alquiler, DetalleAlquiler, Penalizacion, ReservaRecurso
+from apps.ventas.models import (CategoriaProducto, Producto, ImagenProducto, EstadoVenta, MetodoPago,
+                                Venta, DetalleVenta, Carrito, ItemCarrito)
+from apps.clases.models import (CategoriaClase, NivelClase, Instructor, Clase, SesionClase,
+                                InscripcionClase, ListaEsperaClase, ValoracionClase)
+from apps.socios.models import (Usuario, TipoSuscripcion, FormaPago, EstadoSuscripcion, Suscripcion,
+                                PagoSuscripcion)
+from contextlib import contextmanager
+from datetime import time as hora, timedelta
+from decimal import Decimal
+import multiprocessing
+import random
+import time
+
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Javier', 'Elena', 'Pablo', 'Sara', 'Diego',
+           'Marta', 'Jorge', 'Laura', 'Álvaro', 'Paula', 'Hugo', 'Carmen', 'Daniel', 'Irene', 'Sergio']
+APELLIDOS = ['García', 'Martínez', 'López', 'Sánchez', 'Pérez', 'Gómez', 'Martín', 'Jiménez', 'Ruiz',
+             'Hernández', 'Díaz', 'Moreno', 'Álvarez', 'Romero', 'Navarro', 'Torres', 'Domínguez']
+CIUDADES = ['Madrid', 'Barcelona', 'Valencia', 'Sevilla', 'Zaragoza', 'Málaga', 'Bilbao', 'Murcia']
+OBJETOS = ['Balón', 'Raqueta', 'Libro', 'Guitarra', 'Taladro', 'Proyector', 'Cámara', 'Tienda de campaña',
+           'Bicicleta', 'Casco', 'Patines', 'Ajedrez', 'Altavoz', 'Micrófono', 'Esterilla', 'Pesas']
+ADJETIVOS = ['profesional', 'junior', 'clásico', 'ligero', 'plegable', 'eléctrico', 'premium', 'básico']
+ACTIVIDADES = ['Yoga', 'Pilates', 'Spinning', 'Zumba', 'Karate', 'Natación', 'Inglés', 'Pintura',
+               'Crossfit', 'Salsa', 'Boxeo', 'Tenis', 'Fotografía', 'Cerámica']
+SALAS = ['Sala 1', 'Sala 2', 'Sala 3', 'Piscina', 'Pista A', 'Pista B', 'Aula 1', 'Aula 2']
+HORAS = [hora(h, m) for h in range(8, 22) for m in (0, 30)]
+CENTIMOS = Decimal('0.01')
+
+# Campos auto_now_add que el generador rellena con fechas históricas
+FECHAS_HISTORICAS = [
+    (Alquiler, 'fecha_solicitud'),
+    (ReservaRecurso, 'fecha_reserva'),
+    (Venta, 'fecha_venta'),
+    (InscripcionClase, 'fecha_inscripcion'),
+    (ValoracionClase, 'fecha'),
+]
+
+
+@contextmanager
+def fechas_historicas():
+    """
+    Desactiva temporalmente auto_now_add en los campos de fecha de negocio
+    para poder insertar fechas pasadas con bulk_create.
+    """
+    campos = [modelo._meta.get_field(nombre) for modelo, nombre in FECHAS_HISTORICAS]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+def precio(rng, minimo, maximo):
+    return Decimal(rng.uniform(minimo, maximo)).quantize(CENTIMOS)
+
+
+def fecha_aleatoria(rng, desde, dias):
+    return desde + timedelta(days=rng.randrange(dias))
+
+
+def en_lotes(total, lote):
+    for inicio in range(0, total, lote):
+        yield inicio, min(lote, total - inicio)
+
+
+def ids_por_nombre(modelo):
+    return dict(modelo.all_with_deleted.values_list('nombre', 'pk'))
+
+
+class Contexto:
+    """
+    Identificadores compartidos por los generadores de cada aplicación.
+    Solo contiene tipos simples para poder enviarse a otros procesos.
+    """
+
+    def __init__(self, semilla, lote, hoy):
+        self.semilla = semilla
+        self.lote = lote
+        self.hoy = hoy
+        self.socios = []
+        self.instructores = []
+        self.recursos = []
+        self.precios_recursos = {}
+        self.productos = []
+        self.precios_productos = {}
+        self.gestor = None
+
+    def rng(self, nombre):
+        # Un generador independiente por tarea: el resultado no depende del
+        # orden de ejecución ni del número de procesos
+        return random.Random(f"{self.semilla}:{nombre}")
+
+
+def generar_socios(ctx, total):
+    rng = ctx.rng('socios')
+    password = make_password(None)
+    tipos = list(TipoSuscripcion.objects.values_list('pk', 'precio_mensual', 'precio_trimestral', 'precio_anual'))
+    formas = list(FormaPago.objects.values_list('pk', flat=True))
+    estados = ids_por_nombre(EstadoSuscripcion)
+    estados_ponderados = [estados['Activa']] * 8 + [estados['Expirada'], estados['Cancelada']]
+    periodicidades = list(Suscripcion.MESES_PERIODICIDAD.items())
+    filas = 0
+
+    for inicio, cantidad in en_lotes(total, ctx.lote):
+        with transaction.atomic():
+            usuarios = []
+            for i in range(inicio, inicio + cantidad):
+                nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+                usuarios.append(Usuario(
+                    username=f"socio{ctx.semilla}_{i}",
+                    first_name=nombre,
+                    last_name=f"{apellido} {rng.choice(APELLIDOS)}",
+                    email=f"socio{ctx.semilla}_{i}@example.com",
+                    password=password,
+                    es_socio=True,
+                    dni=f"{rng.randrange(10 ** 8):08d}{rng.choice('TRWAGMYFPDXBNJZSQVHLCKE')}",
+                    telefono=f"6{rng.randrange(10 ** 8):08d}",
+                    ciudad=rng.choice(CIUDADES),
+                    fecha_nacimiento=fecha_aleatoria(rng, ctx.hoy - timedelta(days=80 * 365), 62 * 365),
+                    fecha_alta=fecha_aleatoria(rng, ctx.hoy - timedelta(days=5 * 365), 5 * 365),
+                ))
+            Usuario.asignar_numeros_socio(usuarios)
+            Usuario.objects.bulk_create(usuarios)
+
+            suscripciones = []
+            for usuario in usuarios:
+                tipo_id, *precios_tipo = rng.choice(tipos)
+                indice = rng.randrange(len(periodicidades))
+                periodicidad, meses = periodicidades[indice]
+                fecha_inicio = fecha_aleatoria(rng, ctx.hoy - timedelta(days=365), 365)
+                suscripciones.append(Suscripcion(
+                    socio_id=usuario.pk,
+                    tipo_id=tipo_id,
+                    forma_pago_id=rng.choice(formas),
+                    estado_id=rng.choice(estados_ponderados),
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=sumar_meses(fecha_inicio, meses) - timedelta(days=1),
+                    periodicidad=periodicidad,
+                    precio=precios_tipo[indice] or precios_tipo[0] * meses,
+                    renovacion_automatica=rng.random() < 0.7,
+                ))
+            Suscripcion.objects.bulk_create(suscripciones)
+
+            PagoSuscripcion.objects.bulk_create([
+                PagoSuscripcion(
+                    suscripcion_id=suscripcion.pk,
+                    fecha=suscripcion.fecha_inicio,
+                    monto=suscripcion.precio,
+                    confirmado=suscripcion.fecha_inicio < ctx.hoy,
+                    fecha_confirmacion=suscripcion.fecha_inicio if suscripcion.fecha_inicio < ctx.hoy else None,
+                )
+                for suscripcion in suscripciones
+            ])
+        ctx.socios.extend(usuario.pk for usuario in usuarios)
+        filas += len(usuarios) + 2 * len(suscripciones)
+
+    # Uno de cada 200 socios es instructor
+    instructores = [
+        Instructor(usuario_id=socio_id, biografia="Instructor del club",
+                   especialidades=", ".join(rng.sample(ACTIVIDADES, 2)))
+        for socio_id in ctx.socios[::200]
+    ]
+    Instructor.objects.bulk_create(instructores, batch_size=ctx.lote)
+    ctx.instructores = [instructor.pk for instructor in instructores]
+    ctx.gestor = ctx.socios[0] if ctx.socios else None
+    return filas + len(instructores)
+
+
+def generar_recursos(ctx, total, total_productos):
+    rng = ctx.rng('recursos')
+    categorias = list(Categoria.objects.values_list('pk', flat=True))
+    tipos = list(TipoRecurso.objects.values_list('pk', flat=True))
+    estados = ids_por_nombre(EstadoRecurso)
+    estados_ponderados = [estados['Disponible']] * 8 + [estados['En mantenimiento'], estados['Alquilado']]
+    etiquetas = list(EtiquetaRecurso.objects.values_list('pk', flat=True))
+    RecursoEtiqueta = Recurso.etiquetas.through
+    filas = 0
+
+    for inicio, cantidad in en_lotes(total, ctx.lote):
+        with transaction.atomic():
+            recursos = []
+            for i in range(inicio, inicio + cantidad):
+                cantidad_total = rng.randint(1, 10)
+                recursos.append(Recurso(
+                    codigo=f"R{ctx.semilla}-{i:07d}",
+                    nombre=f"{rng.choice(OBJETOS)} {rng.choice(ADJETIVOS)} {i}",
+                    descripcion=f"Recurso sintético número {i}",
+                    categoria_id=rng.choice(categorias),
+                    tipo_id=rng.choice(tipos),
+                    estado_id=rng.choice(estados_ponderados),
+                    cantidad_total=cantidad_total,
+                    cantidad_disponible=cantidad_total,
+                    precio_alquiler=precio(rng, 2, 60),
+                    precio_venta=precio(rng, 10, 600) if rng.random() < 0.5 else None,
+                    deposito_garantia=precio(rng, 0, 100),
+                    fecha_adquisicion=fecha_aleatoria(rng, ctx.hoy - timedelta(days=10 * 365), 10 * 365),
+                    solo_socios=rng.random() < 0.3,
+                ))
+            Recurso.objects.bulk_create(recursos)
+
+            relaciones = [
+                RecursoEtiqueta(recurso_id=recurso.pk, etiquetarecurso_id=etiqueta_id)
+                for recurso in recursos
+                for etiqueta_id in rng.sample(etiquetas, min(len(etiquetas), rng.randint(0, 3)))
+            ]
+            RecursoEtiqueta.objects.bulk_create(relaciones)
+            imagenes = [ImagenRecurso(recurso_id=recurso.pk, imagen="recursos/galerias/sintetica.jpg")
+                        for recurso in recursos[::10]]
+            ImagenRecurso.objects.bulk_create(imagenes)
+            mantenimientos = [
+                MantenimientoRecurso(
+                    recurso_id=recurso.pk,
+                    fecha_inicio=fecha_aleatoria(rng, ctx.hoy - timedelta(days=730), 730),
+                    descripcion="Revisión periódica",
+                    costo=precio(rng, 5, 200),
+                    realizado_por="Servicio técnico",
+                )
+                for recurso in recursos[::5]
+            ]
+            MantenimientoRecurso.objects.bulk_create(mantenimientos)
+        ctx.recursos.extend(recurso.pk for recurso in recursos)
+        ctx.precios_recursos.update((recurso.pk, recurso.precio_alquiler) for recurso in recursos)
+        filas += len(recursos) + len(relaciones) + len(imagenes) + len(mantenimientos)
+
+    categorias_producto = list(CategoriaProducto.objects.values_list('pk', flat=True))
+    for inicio, cantidad in en_lotes(total_productos, ctx.lote):
+        with transaction.atomic():
+            productos = []
+            for i in range(inicio, inicio + cantidad):
+                precio_base = precio(rng, 3, 300)
+                productos.append(Producto(
+                    codigo=f"P{ctx.semilla}-{i:07d}",
+                    nombre=f"{rng.choice(OBJETOS)} {rng.choice(ADJETIVOS)} {i}",
+                    descripcion=f"Producto sintético número {i}",
+                    categoria_id=rng.choice(categorias_producto),
+                    recurso_id=rng.choice(ctx.recursos) if ctx.recursos and rng.random() < 0.2 else None,
+                    precio=precio_base,
+                    precio_oferta=(precio_base * Decimal('0.8')).quantize(CENTIMOS) if rng.random() < 0.15 else None,
+                    stock=rng.randint(0, 500),
+                    stock_minimo=rng.randint(2, 20),
+                    destacado=rng.random() < 0.05,
+                ))
+            Producto.objects.bulk_create(productos)
+            imagenes = [ImagenProducto(producto_id=producto.pk, imagen="productos/galerias/sintetica.jpg")
+                        for producto in productos[::10]]
+            ImagenProducto.objects.bulk_create(imagenes)
+        ctx.productos.extend(producto.pk for producto in productos)
+        ctx.precios_productos.update((producto.pk, producto.precio_actual) for producto in productos)
+        filas += len(productos) + len(imagenes)
+    return filas
+
+
+def generar_alquileres(ctx, total):
+    rng = ctx.rng('alquiler')
+    estados = ids_por_nombre(EstadoAlquiler)
+    filas = 0
+
+    for inicio, cantidad in en_lotes(total, ctx.lote):
+        with transaction.atomic():
+            alquileres = []
+            lineas = []
+            for i in range(inicio, inicio + cantidad):
+                fecha_inicio = fecha_aleatoria(rng, ctx.hoy - timedelta(days=730), 760)
+                fecha_fin = fecha_inicio + timedelta(days=rng.randint(1, 14))
+                devolucion = None
+                if fecha_fin < ctx.hoy and rng.random() < 0.95:
+                    devolucion = fecha_fin + timedelta(days=rng.choice([0, 0, 0, 0, 1, 3]))
+                if fecha_inicio > ctx.hoy:
+                    estado = estados['Reservado']
+                elif devolucion:
+                    estado = estados['Finalizado']
+                elif fecha_fin < ctx.hoy:
+                    estado = estados['Retrasado']
+                else:
+                    estado = estados['En curso']
+
+                recursos = rng.sample(ctx.recursos, min(len(ctx.recursos), rng.randint(1, 3)))
+                dias = (fecha_fin - fecha_inicio).days
+                detalle = [(recurso_id, rng.randint(1, 2)) for recurso_id in recursos]
+                lineas.append(detalle)
+                alquileres.append(Alquiler(
+                    codigo=f"A{ctx.semilla}-{i:08d}",
+                    socio_id=rng.choice(ctx.socios),
+                    fecha_solicitud=timezone.make_aware(timezone.datetime.combine(
+                        fecha_inicio - timedelta(days=rng.randint(0, 7)), rng.choice(HORAS))),
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin_prevista=fecha_fin,
+                    fecha_devolucion=devolucion,
+                    estado_id=estado,
+                    costo_total=sum(ctx.precios_recursos[r] * c * dias for r, c in detalle),
+                    deposito=Decimal(10 * len(detalle)),
+                    gestionado_por_id=ctx.gestor,
+                ))
+            Alquiler.objects.bulk_create(alquileres)
+
+            detalles = []
+            for alquiler, detalle in zip(alquileres, lineas):
+                for recurso_id, unidades in detalle:
+                    detalles.append(DetalleAlquiler(
+                        alquiler_id=alquiler.pk,
+                        recurso_id=recurso_id,
+                        cantidad=unidades,
+                        precio_unitario=ctx.precios_recursos[recurso_id],
+                        deposito_unitario=Decimal(5),
+                        devuelto=alquiler.fecha_devolucion is not None,
+                        fecha_devolucion=alquiler.fecha_devolucion,
+                    ))
+            DetalleAlquiler.objects.bulk_create(detalles)
+
+            penalizaciones = [
+                Penalizacion(
+                    alquiler_id=alquiler.pk,
+                    motivo="Retraso en la devolución",
+                    descripcion="Penalización generada",
+                    monto=Decimal(5 * (alquiler.fecha_devolucion - alquiler.fecha_fin_prevista).days),
+                    fecha=alquiler.fecha_devolucion,
+                    aplicada_por_id=ctx.gestor,
+                    pagada=rng.random() < 0.6,
+                )
+                for alquiler in alquileres
+                if alquiler.fecha_devolucion and alquiler.fecha_devolucion > alquiler.fecha_fin_prevista
+            ]
+            Penalizacion.objects.bulk_create(penalizaciones)
+
+            reservas = []
+            for _ in range(cantidad // 10):
+                fecha_inicio = fecha_aleatoria(rng, ctx.hoy, 90)
+                reservas.append(ReservaRecurso(
+                    socio_id=rng.choice(ctx.socios),
+                    recurso_id=rng.choice(ctx.recursos),
+                    fecha_reserva=timezone.now() - timedelta(days=rng.randint(0, 30)),
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_inicio + timedelta(days=rng.randint(1, 7)),
+                    confirmada=rng.random() < 0.5,
+                ))
+            ReservaRecurso.objects.bulk_create(reservas)
+        filas += len(alquileres) + len(detalles) + len(penalizaciones) + len(reservas)
+    return filas
+
+
+def generar_ventas(ctx, total):
+    rng = ctx.rng('ventas')
+    estados = ids_por_nombre(EstadoVenta)
+    estados_ponderados = [estados['Completada']] * 7 + [estados['Pagada'], estados['Pendiente'], estados['Cancelada']]
+    metodos = list(MetodoPago.objects.values_list('pk', flat=True))
+    filas = 0
+
+    for inicio, cantidad in en_lotes(total, ctx.lote):
+        with transaction.atomic():
+            ventas = []
+            lineas = []
+            for i in range(inicio, inicio + cantidad):
+                productos = rng.sample(ctx.productos, min(len(ctx.productos), rng.randint(1, 4)))
+                detalle = [(producto_id, rng.randint(1, 3)) for producto_id in productos]
+                subtotal = sum(ctx.precios_productos[p] * c for p, c in detalle)
+                impuestos = (subtotal * Decimal('0.21')).quantize(CENTIMOS)
+                fecha_venta = timezone.now() - timedelta(days=rng.randrange(730), minutes=rng.randrange(1440))
+                lineas.append(detalle)
+                ventas.append(Venta(
+                    codigo=f"V{ctx.semilla}-{i:08d}",
+                    cliente_id=rng.choice(ctx.socios),
+                    fecha_venta=fecha_venta,
+                    fecha_pago=fecha_venta,
+                    estado_id=rng.choice(estados_ponderados),
+                    subtotal=subtotal,
+                    impuestos=impuestos,
+                    total=subtotal + impuestos,
+                    metodo_pago_id=rng.choice(metodos),
+                    vendedor_id=ctx.gestor,
+                ))
+            Venta.objects.bulk_create(ventas)
+            detalles = [
+                DetalleVenta(venta_id=venta.pk, producto_id=producto_id, cantidad=unidades,
+                             precio_unitario=ctx.precios_productos[producto_id])
+                for venta, detalle in zip(ventas, lineas)
+                for producto_id, unidades in detalle
+            ]
+            DetalleVenta.objects.bulk_create(detalles)
+        filas += len(ventas) + len(detalles)
+
+    # Carritos abiertos para el 5 % de los socios
+    for inicio, cantidad in en_lotes(len(ctx.socios[::20]), ctx.lote):
+        with transaction.atomic():
+            carritos = Carrito.objects.bulk_create([
+                Carrito(usuario_id=socio_id) for socio_id in ctx.socios[::20][inicio:inicio + cantidad]
+            ])
+            items = [
+                ItemCarrito(carrito_id=carrito.pk, producto_id=producto_id, cantidad=rng.randint(1, 3))
+                for carrito in carritos
+                for producto_id in rng.sample(ctx.productos, min(len(ctx.productos), rng.randint(1, 5)))
+            ]
+            ItemCarrito.objects.bulk_create(items)
+        filas += len(carritos) + len(items)
+    return filas
+
+
+def generar_clases(ctx, total):
+    rng = ctx.rng('clases')
+    categorias = list(CategoriaClase.objects.values_list('pk', flat=True))
+    niveles = list(NivelClase.objects.values_list('pk', flat=True))
+    instructores = ctx.instructores or list(Instructor.objects.values_list('pk', flat=True))
+    if not instructores:
+        raise CommandError('Se necesita al menos un instructor para generar sesiones')
+
+    clases = Clase.objects.bulk_create([
+        Clase(
+            nombre=f"{rng.choice(ACTIVIDADES)} {rng.choice(ADJETIVOS)} {i}",
+            descripcion="Clase sintética",
+            categoria_id=rng.choice(categorias),
+            nivel_id=rng.choice(niveles),
+            duracion_minutos=rng.choice([45, 60, 90]),
+            capacidad_maxima=rng.choice([8, 10, 12, 15, 20, 25]),
+            precio=precio(rng, 5, 25),
+        )
+        for i in range(max(1, total // 50))
+    ], batch_size=ctx.lote)
+    filas = len(clases)
+
+    for inicio, cantidad in en_lotes(total, ctx.lote):
+        with transaction.atomic():
+            sesiones = []
+            for _ in range(cantidad):
+                clase = rng.choice(clases)
+                hora_inicio = rng.choice(HORAS[:-3])
+                fin = timezone.datetime.combine(ctx.hoy, hora_inicio) + timedelta(minutes=clase.duracion_minutos)
+                sesiones.append(SesionClase(
+                    clase_id=clase.pk,
+                    instructor_id=rng.choice(instructores),
+                    fecha=fecha_aleatoria(rng, ctx.hoy - timedelta(days=180), 360),
+                    hora_inicio=hora_inicio,
+                    hora_fin=fin.time(),
+                    ubicacion=rng.choice(SALAS),
+                    cancelada=rng.random() < 0.02,
+                ))
+            SesionClase.objects.bulk_create(sesiones)
+
+            capacidades = {clase.pk: (clase.capacidad_maxima, clase.precio) for clase in clases}
+            inscripciones = []
+            esperas = []
+            for sesion in sesiones:
+                capacidad, precio_clase = capacidades[sesion.clase_id]
+                socios = rng.sample(ctx.socios, min(len(ctx.socios), rng.randint(0, capacidad + 3)))
+                pasada = sesion.fecha < ctx.hoy
+                for socio_id in socios[:capacidad]:
+                    inscripciones.append(InscripcionClase(
+                        socio_id=socio_id,
+                        sesion_id=sesion.pk,
+                        fecha_inscripcion=timezone.make_aware(timezone.datetime.combine(
+                            sesion.fecha - timedelta(days=rng.randint(1, 20)), hora(12))),
+                        precio_pagado=precio_clase,
+                        pagado=pasada or rng.random() < 0.5,
+                        asistio=(rng.random() < 0.85) if pasada else None,
+                        cancelada=rng.random() < 0.05,
+                    ))
+                esperas.extend(ListaEsperaClase(socio_id=socio_id, sesion_id=sesion.pk)
+                               for socio_id in socios[capacidad:])
+            InscripcionClase.objects.bulk_create(inscripciones)
+            ListaEsperaClase.objects.bulk_create(esperas)
+
+            sesiones_por_id = {sesion.pk: sesion for sesion in sesiones}
+            valoraciones = []
+            for inscripcion in inscripciones:
+                if inscripcion.asistio and rng.random() < 0.2:
+                    sesion = sesiones_por_id[inscripcion.sesion_id]
+                    valoraciones.append(ValoracionClase(
+                        socio_id=inscripcion.socio_id,
+                        clase_id=sesion.clase_id,
+                        sesion_id=sesion.pk,
+                        instructor_id=sesion.instructor_id,
+                        puntuacion=rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 5, 10, 12])[0],
+                        fecha=timezone.make_aware(timezone.datetime.combine(sesion.fecha, hora(21))),
+                    ))
+            ValoracionClase.objects.bulk_create(valoraciones)
+        filas += len(sesiones) + len(inscripciones) + len(esperas) + len(valoraciones)
+    return filas
+
+
+def ejecutar_tarea(nombre, funcion, ctx, total):
+    """
+    Ejecuta un generador y devuelve (nombre, filas, segundos). Se usa tanto en
+    el proceso principal como en los procesos hijos.
+    """
+    inicio = time.monotonic()
+    try:
+        with fechas_historicas():
+            filas = funcion(ctx, total)
+    finally:
+        connections.close_all()
+    return nombre, filas, time.monotonic() - inicio
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos reproducibles para pruebas de rendimiento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socios', type=int, default=1000)
+        parser.add_argument('--recursos', type=int, default=500)
+        parser.add_argument('--productos', type=int,
+                            help='Número de productos (por defecto, la mitad de los recursos)')
+        parser.add_argument('--alquileres', type=int, default=5000)
+        parser.add_argument('--ventas', type=int, default=5000)
+        parser.add_argument('--sesiones', type=int, default=500)
+        parser.add_argument('--semilla', type=int, default=42,
+                            help='Semilla del generador aleatorio; también prefija los códigos generados')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por bulk_create y por transacción (por defecto 5000)')
+        parser.add_argument('--procesos', type=int,
+                            help='Procesos para generar alquileres, ventas y clases en paralelo '
+                                 '(por defecto 3, o 1 con SQLite)')
+
+    def handle(self, *args, **options):
+        if not EstadoAlquiler.objects.exists():
+            call_command('cargar_datos_iniciales', stdout=self.stdout)
+
+        ctx = Contexto(options['semilla'], options['lote'], timezone.now().date())
+        if Usuario.objects.filter(username=f"socio{ctx.semilla}_0").exists():
+            raise CommandError(f'Ya existen datos generados con la semilla {ctx.semilla}; usa otra semilla')
+
+        inicio = time.monotonic()
+        self.stdout.write(self.style.SUCCESS('Generando datos sintéticos...'))
+        self.informar(*ejecutar_tarea('socios', generar_socios, ctx, options['socios']))
+        productos = options['productos'] if options['productos'] is not None else options['recursos'] // 2
+        self.informar(*ejecutar_tarea('recursos y productos', lambda c, t: generar_recursos(c, t, productos),
+                                      ctx, options['recursos']))
+
+        if options['alquileres'] and not (ctx.socios and ctx.recursos):
+            raise CommandError('Se necesitan socios y recursos para generar alquileres')
+        if options['ventas'] and not (ctx.socios and ctx.productos):
+            raise CommandError('Se necesitan socios y productos para generar ventas')
+
+        # Alquiler, ventas y clases solo dependen de socios, recursos y productos
+        tareas = [
+            ('alquiler', generar_alquileres, ctx, options['alquileres']),
+            ('ventas', generar_ventas, ctx, options['ventas']),
+            ('clases', generar_clases, ctx, options['sesiones']),
+        ]
+        procesos = options['procesos'] or (1 if connection.vendor == 'sqlite' else 3)
+        if procesos > 1:
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(min(procesos, len(tareas))) as pool:
+                resultados = pool.starmap(ejecutar_tarea, tareas)
+        else:
+            resultados = [ejecutar_tarea(*tarea) for tarea in tareas]
+        for resultado in resultados:
+            self.informar(*resultado)
+
+        # bulk_create no dispara las señales que mantienen el índice de búsqueda
+        call_command('indexar_busqueda', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos sintéticos generados en {time.monotonic() - inicio:.1f}s'
+        ))
+
+    def informar(self, nombre, filas, segundos):
+        self.stdout.write(f'  {nombre}: {filas} filas en {segundos:.1f}s '
+                          f'({filas / segundos if segundos else 0:.0f} filas/s)')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from apps.recursos.models import Recurso
+from apps.ventas.models import Producto
+import time
+
+
+class Command(BaseCommand):
+    help = 'Crea los índices de búsqueda de texto completo y los recalcula para todo el catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', choices=['recursos', 'productos'],
+                            help='Indexar solo recursos o solo productos')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por lote de actualización')
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        modelos = {'recursos': Recurso, 'productos': Producto}
+        if options['modelo']:
+            modelos = {options['modelo']: modelos[options['modelo']]}
+
+        for nombre, modelo in modelos.items():
+            inicio = time.monotonic()
+            modelo.indice_busqueda.preparar(using=options['database'])
+            total = modelo.indice_busqueda.reindexar(using=options['database'], lote=options['lote'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{total} {nombre} indexados en {time.monotonic() - inicio:.1f}s'
+            ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.alquiler.services import penalizar_retrasos
+from datetime import date
+import time
+
+
+class Command(BaseCommand):
+    help = 'Genera la penalización diaria de los alquileres retrasados según la tarifa configurada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat,
+                            help='Día a penalizar en formato AAAA-MM-DD (por defecto hoy); '
+                                 'permite recuperar una noche en la que no se ejecutó')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Número de alquileres por transacción (por defecto 5000)')
+        parser.add_argument('--desde-id', type=int, default=0,
+                            help='Reanuda el proceso a partir de este id de alquiler')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Calcula las penalizaciones sin escribir en la base de datos')
+
+    def handle(self, *args, **options):
+        fecha = options['fecha'] or timezone.now().date()
+        if fecha > timezone.now().date():
+            raise CommandError('No se pueden generar penalizaciones de días futuros')
+
+        dry_run = options['dry_run']
+        self.stdout.write(f'Penalizando retrasos del {fecha:%d/%m/%Y}{" (dry-run)" if dry_run else ""}...')
+        inicio = time.monotonic()
+        resultado = penalizar_retrasos(
+            fecha=fecha,
+            lote=options['lote'],
+            desde_id=options['desde_id'],
+            dry_run=dry_run,
+            progreso=lambda total, ultimo_id: self.stdout.write(
+                f'  {total} alquileres procesados (último id: {ultimo_id})'
+            ),
+        )
+
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado["penalizaciones"]} penalizaciones {"a generar" if dry_run else "generadas"} '
+            f'por {resultado["importe"]} en {duracion:.1f}s'
+        ))
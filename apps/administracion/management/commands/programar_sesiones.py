@@ -0,0 +1,87 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from apps.clases.models import Clase, Instructor
+from apps.clases.programacion import Horario, Recurrencia, generar_sesiones
+from datetime import date, time as hora
+import json
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Genera las sesiones de clase de un periodo a partir de horarios recurrentes'
+    epilog = '''
+Formato del fichero JSON:
+  {"desde": "2025-09-15", "hasta": "2026-06-19", "festivos": ["2025-12-08"],
+   "horarios": [{"clase": 1, "instructor": 2, "regla": "FREQ=WEEKLY;BYDAY=MO,WE",
+                 "hora_inicio": "18:00", "ubicacion": "Sala 1", "excepciones": ["2025-10-13"]}]}
+Cada horario puede redefinir "desde" y "hasta" e indicar "hora_fin",
+"capacidad_maxima", "precio_especial" y "notas".
+'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichero', help='Fichero JSON con los horarios')
+        parser.add_argument('--simular', action='store_true', help='Calcula las sesiones sin crearlas')
+        parser.add_argument('--omitir-conflictos', action='store_true',
+                            help='Crea las sesiones sin conflicto y descarta las que se solapan')
+
+    def leer_fichero(self, ruta):
+        if not os.path.exists(ruta):
+            raise CommandError(f'No se encontró el fichero {ruta}')
+        with open(ruta, encoding='utf-8') as fichero:
+            contenido = json.load(fichero)
+        if not isinstance(contenido, dict) or not contenido.get('horarios'):
+            raise CommandError(f'El fichero {ruta} debe contener una lista de horarios')
+        return contenido
+
+    def construir_horarios(self, contenido):
+        filas = contenido['horarios']
+        clases = Clase.objects.in_bulk({fila['clase'] for fila in filas})
+        instructores = Instructor.objects.in_bulk({fila['instructor'] for fila in filas})
+        horarios = []
+        for numero, fila in enumerate(filas, 1):
+            if fila['clase'] not in clases or fila['instructor'] not in instructores:
+                raise CommandError(f'Horario {numero}: clase o instructor inexistente')
+            hasta = fila.get('hasta', contenido.get('hasta'))
+            recurrencia = Recurrencia.desde_regla(
+                fila.get('regla', 'FREQ=WEEKLY'),
+                desde=date.fromisoformat(fila.get('desde', contenido['desde'])),
+                hasta=date.fromisoformat(hasta) if hasta else None,
+                excepciones=[date.fromisoformat(fecha) for fecha in fila.get('excepciones', [])],
+            )
+            horarios.append(Horario(
+                clase=clases[fila['clase']],
+                instructor=instructores[fila['instructor']],
+                hora_inicio=hora.fromisoformat(fila['hora_inicio']),
+                hora_fin=hora.fromisoformat(fila['hora_fin']) if fila.get('hora_fin') else None,
+                ubicacion=fila.get('ubicacion', ''),
+                recurrencia=recurrencia,
+                capacidad_maxima=fila.get('capacidad_maxima'),
+                precio_especial=fila.get('precio_especial'),
+                notas=fila.get('notas', ''),
+            ))
+        return horarios
+
+    def handle(self, *args, **options):
+        contenido = self.leer_fichero(options['fichero'])
+        inicio = time.monotonic()
+        try:
+            horarios = self.construir_horarios(contenido)
+            resultado = generar_sesiones(
+                horarios,
+                festivos=[date.fromisoformat(fecha) for fecha in contenido.get('festivos', [])],
+                omitir_conflictos=options['omitir_conflictos'],
+                simular=options['simular'],
+            )
+        except (KeyError, ValueError) as error:
+            raise CommandError(f'Fichero de horarios no válido: {error}')
+        except ValidationError as error:
+            raise CommandError('\n'.join(error.messages))
+
+        for conflicto in resultado.conflictos:
+            self.stdout.write(self.style.WARNING(f'  Conflicto: {conflicto}'))
+        accion = 'a crear' if options['simular'] else 'creadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(resultado.sesiones)} sesiones {accion}, {resultado.duplicadas} ya existentes, '
+            f'{resultado.omitidas} omitidas por conflicto en {time.monotonic() - inicio:.1f}s'
+        ))
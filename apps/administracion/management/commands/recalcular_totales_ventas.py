@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Min, Max
+from django.utils import timezone
+from apps.common.utils import filtro_periodo
+from apps.ventas.models import Venta
+from datetime import date, timedelta
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recalcula subtotal y total de las ventas a partir de sus detalles, por tramos de fechas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat,
+                            help='Fecha inicial (AAAA-MM-DD). Por defecto, la primera venta')
+        parser.add_argument('--hasta', type=date.fromisoformat,
+                            help='Fecha final incluida (AAAA-MM-DD). Por defecto, la última venta')
+        parser.add_argument('--dias-por-lote', type=int, default=7,
+                            help='Días de ventas recalculados en cada transacción (por defecto 7)')
+
+    def handle(self, *args, **options):
+        if options['dias_por_lote'] < 1:
+            raise CommandError('--dias-por-lote debe ser al menos 1')
+
+        ventas = Venta.all_with_deleted.all()
+        limites = ventas.aggregate(primera=Min('fecha_venta'), ultima=Max('fecha_venta'))
+        if limites['primera'] is None:
+            self.stdout.write(self.style.WARNING('No hay ventas que recalcular'))
+            return
+
+        desde = options['desde'] or timezone.localtime(limites['primera']).date()
+        hasta = options['hasta'] or timezone.localtime(limites['ultima']).date()
+        paso = timedelta(days=options['dias_por_lote'])
+
+        self.stdout.write(f'Recalculando totales de ventas del {desde} al {hasta}...')
+        inicio = time.monotonic()
+        total = 0
+        tramo = desde
+        while tramo <= hasta:
+            fin_tramo = min(tramo + paso - timedelta(days=1), hasta)
+            with transaction.atomic():
+                actualizadas = Venta.all_with_deleted.filter(
+                    filtro_periodo(Venta, 'fecha_venta', tramo, fin_tramo)
+                ).recalcular_totales()
+            total += actualizadas
+            self.stdout.write(f'  {tramo} - {fin_tramo}: {actualizadas} ventas')
+            tramo = fin_tramo + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} ventas recalculadas en {time.monotonic() - inicio:.1f}s'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.clases.valoraciones import DESTINOS, desviaciones, recalcular
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde las valoraciones las calificaciones de instructores y clases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comprobar', action='store_true',
+                            help='Solo informa de los agregados desviados, sin corregirlos')
+
+    def handle(self, *args, **options):
+        for destino in DESTINOS:
+            inicio = time.monotonic()
+            desviados = desviaciones(destino).count()
+            if options['comprobar']:
+                estilo = self.style.WARNING if desviados else self.style.SUCCESS
+                self.stdout.write(estilo(f'{destino}: {desviados} con agregados desviados'))
+                continue
+            filas = recalcular(destino)
+            self.stdout.write(self.style.SUCCESS(
+                f'{destino}: {filas} recalculados ({desviados} desviados) en {time.monotonic() - inicio:.1f}s'
+            ))
@@ -0,0 +1,112 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from apps.socios.models import Suscripcion, PagoSuscripcion, EstadoSuscripcion
+from datetime import timedelta
+import time
+
+
+class Command(BaseCommand):
+    help = 'Renueva en bloque las suscripciones con renovación automática que vencen en una ventana de fechas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=7,
+                            help='Renueva las suscripciones que vencen en los próximos N días (por defecto 7)')
+        parser.add_argument('--dias-atras', type=int, default=30,
+                            help='Incluye las vencidas en los últimos N días (por defecto 30)')
+        parser.add_argument('--lote', type=int, default=2000,
+                            help='Número de suscripciones por transacción (por defecto 2000)')
+        parser.add_argument('--desde-id', type=int, default=0,
+                            help='Reanuda el proceso a partir de este id de suscripción')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Calcula las renovaciones sin escribir en la base de datos')
+
+    def handle(self, *args, **options):
+        hoy = timezone.now().date()
+        lote = options['lote']
+        dry_run = options['dry_run']
+
+        estado_activa = EstadoSuscripcion.objects.por_nombre("Activa")
+        if estado_activa is None:
+            raise CommandError('No existe el estado de suscripción "Activa"')
+
+        # Cada suscripción se renueva tantos periodos como haga falta para que
+        # su nueva fecha de fin quede fuera de la ventana, así que una segunda
+        # ejecución ya no la selecciona. Los pagos se identifican por periodo
+        # y los que ya existen no se vuelven a crear.
+        limite = hoy + timedelta(days=options['dias'])
+        pendientes = Suscripcion.objects.filter(
+            renovacion_automatica=True,
+            fecha_cancelacion__isnull=True,
+            fecha_fin__gte=hoy - timedelta(days=options['dias_atras']),
+            fecha_fin__lte=limite,
+        ).only('id', 'fecha_fin', 'periodicidad', 'precio').order_by('id')
+
+        self.stdout.write(f'Renovando suscripciones{" (dry-run)" if dry_run else ""}...')
+        inicio = time.monotonic()
+        ultimo_id = options['desde_id']
+        total = 0
+
+        while True:
+            suscripciones = list(pendientes.filter(id__gt=ultimo_id)[:lote])
+            if not suscripciones:
+                break
+
+            # Las nuevas fechas solo dependen de la fecha de fin y la periodicidad,
+            # así que cada grupo se actualiza con un único UPDATE.
+            grupos = {}
+            pagos = []
+            for suscripcion in suscripciones:
+                clave = (suscripcion.fecha_fin, suscripcion.periodicidad)
+                if clave not in grupos:
+                    grupos[clave] = (self.periodos(suscripcion, limite), [])
+                periodos, ids = grupos[clave]
+                ids.append(suscripcion.id)
+                for nueva_fecha_inicio, _ in periodos:
+                    pagos.append(PagoSuscripcion(
+                        suscripcion_id=suscripcion.id,
+                        fecha=hoy,
+                        monto=suscripcion.precio,
+                        referencia=f"RENOV-{suscripcion.id}-{nueva_fecha_inicio:%Y%m%d}",
+                    ))
+
+            cobrados = set(PagoSuscripcion.all_with_deleted.filter(
+                suscripcion_id__in=[suscripcion.id for suscripcion in suscripciones],
+                referencia__in=[pago.referencia for pago in pagos],
+            ).values_list('referencia', flat=True))
+            pagos = [pago for pago in pagos if pago.referencia not in cobrados]
+
+            if not dry_run:
+                ahora = timezone.now()
+                with transaction.atomic():
+                    for periodos, ids in grupos.values():
+                        Suscripcion.objects.filter(id__in=ids).update(
+                            fecha_inicio=periodos[-1][0],
+                            fecha_fin=periodos[-1][1],
+                            estado_id=estado_activa.pk,
+                            fecha_cancelacion=None,
+                            motivo_cancelacion="",
+                            updated_at=ahora,
+                        )
+                    PagoSuscripcion.objects.bulk_create(pagos)
+
+            ultimo_id = suscripciones[-1].id
+            total += len(suscripciones)
+            self.stdout.write(f'  {total} suscripciones procesadas (último id: {ultimo_id})')
+
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} suscripciones {"a renovar" if dry_run else "renovadas"} en {duracion:.1f}s'
+        ))
+
+    def periodos(self, suscripcion, limite):
+        """
+        (inicio, fin) de cada periodo a renovar hasta que la fecha de fin
+        supere `limite`. Siempre hay al menos uno.
+        """
+        periodos = []
+        fin = suscripcion.fecha_fin
+        while fin <= limite:
+            inicio, fin = fin + timedelta(days=1), suscripcion.calcular_renovacion(len(periodos) + 1)[1]
+            periodos.append((inicio, fin))
+        return periodos
@@ -0,0 +1,80 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = ('Comprueba que los listados del admin hacen el mismo número de consultas con una fila por página '
+            'que con una página completa')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--por-pagina', type=int, default=50, help='Filas de la página completa')
+        parser.add_argument('--modelo', action='append', default=[],
+                            help='Limita la comprobación a un modelo (app_label.modelo); se puede repetir')
+        parser.add_argument('--consultas', action='store_true', help='Muestra las consultas de cada listado')
+
+    def handle(self, *args, **options):
+        registrados = sorted(admin.site._registry.items(), key=lambda item: item[0]._meta.label_lower)
+        if options['modelo']:
+            registrados = [(model, model_admin) for model, model_admin in registrados
+                           if model._meta.label_lower in options['modelo']]
+
+        problemas = 0
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*']):
+            usuario = get_user_model().objects.create(username='verificar-admin', is_staff=True,
+                                                      is_superuser=True)
+            cliente = Client()
+            cliente.force_login(usuario)
+
+            for model, model_admin in registrados:
+                etiqueta = model._meta.label_lower
+                filas = model._base_manager.count()
+                if filas < 2:
+                    self.stdout.write(f'  {etiqueta}: sin datos suficientes ({filas} filas)')
+                    continue
+                url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                # Primera petición sin medir: llena las caches de catálogos
+                cliente.get(url)
+                medidas = [self.medir(cliente, model_admin, url, por_pagina)
+                           for por_pagina in (1, options['por_pagina'])]
+                if None in medidas:
+                    problemas += 1
+                    self.stdout.write(self.style.ERROR(f'  {etiqueta}: el listado no responde con 200'))
+                    continue
+
+                (una, _consultas), (pagina, consultas) = medidas
+                if una != pagina:
+                    problemas += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  {etiqueta}: {una} consultas con 1 fila, {pagina} con {options["por_pagina"]}'
+                    ))
+                else:
+                    self.stdout.write(f'  {etiqueta}: {pagina} consultas')
+                if options['consultas']:
+                    for consulta in consultas:
+                        self.stdout.write(f'      {consulta["sql"][:200]}')
+            transaction.set_rollback(True)
+
+        if problemas:
+            raise CommandError(f'{problemas} listados no hacen un número fijo de consultas')
+        self.stdout.write(self.style.SUCCESS('Todos los listados hacen un número fijo de consultas'))
+
+    def medir(self, cliente, model_admin, url, por_pagina):
+        """
+        (número de consultas, consultas) de la primera página del listado con
+        `por_pagina` filas, o None si no responde con 200.
+        """
+        original = model_admin.list_per_page
+        model_admin.list_per_page = por_pagina
+        try:
+            with CaptureQueriesContext(connection) as capturadas:
+                respuesta = cliente.get(url)
+        finally:
+            model_admin.list_per_page = original
+        if respuesta.status_code != 200:
+            return None
+        return len(capturadas), capturadas.captured_queries
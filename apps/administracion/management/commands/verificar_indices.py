@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.alquiler.models import Alquiler, ReservaRecurso
+from apps.clases.models import SesionClase
+from apps.socios.models import Suscripcion, PagoSuscripcion
+from apps.ventas.models import Producto, Venta
+from datetime import timedelta
+import re
+
+
+def consultas_canonicas():
+    """
+    Consultas representativas de cada aplicación, con el índice que deberían usar.
+    """
+    hoy = timezone.now().date()
+    return [
+        ('Alquileres de un socio por estado', 'alquiler_socio_estado_idx',
+         Alquiler.objects.filter(socio_id=1, estado_id=1)),
+        ('Alquileres retrasados', 'alquiler_sin_devolver_idx',
+         Alquiler.objects.retrasados(hoy).order_by('fecha_fin_prevista')),
+        ('Alquileres que se solapan con un rango', 'alquiler_intervalo_idx',
+         Alquiler.objects.filter(fecha_inicio__lte=hoy, fecha_fin_prevista__gte=hoy).order_by()),
+        ('Reservas de un recurso en un rango', 'reserva_recurso_intervalo_idx',
+         ReservaRecurso.objects.filter(recurso_id=1, fecha_inicio__lte=hoy + timedelta(days=7),
+                                       fecha_fin__gte=hoy)),
+        ('Sesiones de un día', 'sesion_activa_fecha_idx',
+         SesionClase.objects.filter(fecha=hoy).order_by('hora_inicio')),
+        ('Compras de un cliente', 'venta_cliente_fecha_idx',
+         Venta.objects.filter(cliente_id=1).order_by('-fecha_venta')),
+        ('Ventas recientes', 'venta_activa_fecha_idx',
+         Venta.objects.filter(fecha_venta__gte=timezone.now() - timedelta(days=7))),
+        ('Suscripción más reciente de un socio', 'suscripcion_socio_fin_idx',
+         Suscripcion.objects.filter(socio_id=1).order_by('-fecha_fin')[:1]),
+        ('Pagos pendientes de confirmar', 'pago_confirmado_fecha_idx',
+         PagoSuscripcion.objects.filter(confirmado=False, fecha__lte=hoy)),
+        ('Productos con stock bajo', 'producto_stock_bajo_idx',
+         Producto.objects.filter(stock__lte=F('stock_minimo'))),
+    ]
+
+
+# Recorridos completos de una tabla en los planes de PostgreSQL y SQLite
+RECORRIDO_COMPLETO = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)(?:\s|$)'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas habituales y señala las que recorren tablas completas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar-indices', action='store_true',
+                            help='En PostgreSQL desactiva enable_seqscan para comprobar que existe un índice '
+                                 'utilizable aunque la tabla sea pequeña')
+        parser.add_argument('--planes', action='store_true', help='Muestra el plan completo de cada consulta')
+
+    def handle(self, *args, **options):
+        patron = RECORRIDO_COMPLETO.get(connection.vendor)
+        if patron is None:
+            raise CommandError(f'Motor no soportado: {connection.vendor}')
+
+        problemas = 0
+        with transaction.atomic():
+            if options['forzar_indices'] and connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for nombre, indice, queryset in consultas_canonicas():
+                plan = queryset.explain()
+                recorridos = sorted(set(patron.findall(plan)))
+                if recorridos:
+                    problemas += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  {nombre}: recorrido completo de {", ".join(recorridos)} (índice esperado: {indice})'
+                    ))
+                elif indice not in plan:
+                    self.stdout.write(f'  {nombre}: usa otro índice (esperado: {indice})')
+                else:
+                    self.stdout.write(f'  {nombre}: {indice}')
+                if options['planes']:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if problemas:
+            raise CommandError(f'{problemas} consultas recorren tablas completas')
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
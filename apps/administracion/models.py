@@ -0,0 +1,97 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ResumenDiario(models.Model):
+    """
+    Ingresos agregados por día, fuente y dimensión. Lo mantiene
+    apps.administracion.agregados a partir de las tablas de movimientos;
+    no debe editarse a mano.
+
+    La dimensión "total" tiene una fila por día y fuente; el resto una por
+    valor de la dimensión (método de pago, categoría...), identificado por
+    `clave` (su pk) y `etiqueta` (su nombre en el momento del cálculo).
+    """
+    FUENTES = [
+        ('venta', _("Ventas")),
+        ('alquiler', _("Alquileres")),
+        ('penalizacion', _("Penalizaciones")),
+        ('suscripcion', _("Suscripciones")),
+        ('clase', _("Clases")),
+    ]
+    DIMENSIONES = [
+        ('total', _("Total")),
+        ('metodo_pago', _("Método de pago")),
+        ('forma_pago', _("Forma de pago")),
+        ('categoria', _("Categoría")),
+        ('tipo_suscripcion', _("Tipo de suscripción")),
+    ]
+
+    fecha = models.DateField(_("Fecha"))
+    fuente = models.CharField(_("Fuente"), max_length=20, choices=FUENTES)
+    dimension = models.CharField(_("Dimensión"), max_length=20, choices=DIMENSIONES, default='total')
+    clave = models.CharField(_("Clave"), max_length=50, blank=True)
+    etiqueta = models.CharField(_("Etiqueta"), max_length=200, blank=True)
+    operaciones = models.PositiveIntegerField(_("Operaciones"), default=0)
+    importe = models.DecimalField(_("Importe"), max_digits=14, decimal_places=2, default=0)
+    calculado = models.DateTimeField(_("Fecha de cálculo"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Resumen diario")
+        verbose_name_plural = _("Resúmenes diarios")
+        ordering = ['fecha', 'fuente', 'dimension', 'clave']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'fuente', 'dimension', 'clave'],
+                                    name='resumen_diario_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', 'fecha'], name='resumen_dimension_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.fuente}/{self.dimension} {self.etiqueta}: {self.importe}"
+
+
+class MarcaAgregado(models.Model):
+    """
+    Marca de agua de un proceso de agregación: instante hasta el que se han
+    incorporado los cambios de las tablas de origen.
+    """
+    nombre = models.CharField(_("Nombre"), max_length=50, unique=True)
+    marca = models.DateTimeField(_("Marca"), null=True, blank=True)
+    actualizado = models.DateTimeField(_("Fecha de actualización"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Marca de agregación")
+        verbose_name_plural = _("Marcas de agregación")
+
+    def __str__(self):
+        return f"{self.nombre}: {self.marca}"
+
+
+class DiaPendiente(models.Model):
+    """
+    Día de una fuente cuyos resúmenes hay que recalcular. Lo anotan las
+    señales de guardado y borrado de las tablas de origen (también el día
+    anterior cuando cambia la fecha de un movimiento, y los borrados
+    físicos) y lo consume actualizar_resumenes().
+
+    No es único a propósito: cada cambio inserta su fila y solo se borran
+    las filas leídas, así que un cambio concurrente con la actualización
+    nunca se pierde.
+    """
+    fuente = models.CharField(_("Fuente"), max_length=20, choices=ResumenDiario.FUENTES)
+    fecha = models.DateField(_("Fecha"))
+    creado = models.DateTimeField(_("Fecha de creación"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Día pendiente de resumir")
+        verbose_name_plural = _("Días pendientes de resumir")
+        ordering = ['fecha', 'fuente']
+
+    def __str__(self):
+        return f"{self.fecha} {self.fuente}"
+
+
+# Conecta las señales que anotan los días pendientes
+from apps.administracion import agregados  # noqa: E402,F401
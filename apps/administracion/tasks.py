@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from apps.administracion.agregados import actualizar_resumenes
+
+
+@shared_task(name='administracion.actualizar_resumenes')
+def actualizar_resumenes_periodico():
+    """
+    Tarea periódica programada en club_core.celery: incorpora a los
+    resúmenes diarios los cambios desde la última marca de agua.
+    """
+    return actualizar_resumenes()
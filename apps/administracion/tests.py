@@ -0,0 +1,256 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import Permission
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.administracion.agregados import actualizar_resumenes, ingresos
+from apps.administracion.models import DiaPendiente
+from apps.socios.models import EstadoSuscripcion, FormaPago, PagoSuscripcion, Suscripcion, TipoSuscripcion, Usuario
+from apps.recursos.models import Categoria
+from apps.ventas.models import CategoriaProducto, DetalleVenta, EstadoVenta, Producto, Venta
+
+
+class RenovarSuscripcionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoy = timezone.now().date()
+        EstadoSuscripcion.objects.create(nombre="Activa")
+        cls.vencida = EstadoSuscripcion.objects.create(nombre="Vencida")
+        cls.tipo = TipoSuscripcion.objects.create(nombre="Básica", descripcion="", precio_mensual=Decimal('30'),
+                                                  precio_trimestral=Decimal('80'), precio_anual=Decimal('300'))
+        cls.forma_pago = FormaPago.objects.create(nombre="Domiciliación")
+        cls.socio = Usuario.objects.create(username="socio")
+
+    def crear_suscripcion(self, fecha_fin, periodicidad='mensual'):
+        return Suscripcion.objects.create(socio=self.socio, tipo=self.tipo, estado=self.vencida,
+                                          forma_pago=self.forma_pago, periodicidad=periodicidad,
+                                          precio=Decimal('30'), fecha_inicio=fecha_fin - timedelta(days=30),
+                                          fecha_fin=fecha_fin)
+
+    def renovar(self, *args):
+        call_command('renovar_suscripciones', *args, stdout=StringIO())
+
+    def test_segunda_ejecucion_no_vuelve_a_cobrar(self):
+        # Vencida hace 25 días: el primer periodo renovado sigue dentro de la ventana
+        suscripcion = self.crear_suscripcion(self.hoy - timedelta(days=25))
+
+        self.renovar()
+        pagos = list(PagoSuscripcion.objects.filter(suscripcion=suscripcion).values_list('referencia', flat=True))
+        self.renovar()
+
+        suscripcion.refresh_from_db()
+        self.assertGreater(suscripcion.fecha_fin, self.hoy + timedelta(days=7))
+        self.assertEqual(len(pagos), len(set(pagos)))
+        self.assertCountEqual(
+            PagoSuscripcion.objects.filter(suscripcion=suscripcion).values_list('referencia', flat=True), pagos
+        )
+
+    def test_un_pago_por_periodo(self):
+        suscripcion = self.crear_suscripcion(self.hoy + timedelta(days=2))
+
+        self.renovar('--dias', '70')
+        self.renovar('--dias', '70')
+
+        suscripcion.refresh_from_db()
+        self.assertGreater(suscripcion.fecha_fin, self.hoy + timedelta(days=70))
+        self.assertEqual(PagoSuscripcion.objects.filter(suscripcion=suscripcion).count(), 3)
+        self.assertEqual(
+            PagoSuscripcion.objects.filter(suscripcion=suscripcion).values('referencia').distinct().count(), 3
+        )
+
+    def test_no_duplica_pagos_existentes(self):
+        suscripcion = self.crear_suscripcion(self.hoy + timedelta(days=1))
+        inicio = suscripcion.fecha_fin + timedelta(days=1)
+        PagoSuscripcion.objects.create(suscripcion=suscripcion, monto=Decimal('30'),
+                                       referencia=f"RENOV-{suscripcion.id}-{inicio:%Y%m%d}")
+
+        self.renovar()
+
+        self.assertEqual(PagoSuscripcion.objects.filter(suscripcion=suscripcion).count(), 1)
+
+
+class ActualizarResumenesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dia = timezone.localdate() - timedelta(days=10)
+        categoria = CategoriaProducto.objects.create(nombre="Material", slug="material")
+        productos = [Producto.objects.create(codigo=codigo, nombre=codigo, categoria=categoria,
+                                             precio=Decimal('10'), stock=10)
+                     for codigo in ("P1", "P2")]
+        cls.venta = Venta.objects.create(codigo="V1", cliente=Usuario.objects.create(username="cliente"),
+                                         estado=EstadoVenta.objects.create(nombre="Pagada"),
+                                         subtotal=Decimal('30'), total=Decimal('30'))
+        cls.venta.fecha_venta = cls.en_dia(cls.dia)
+        cls.venta.save()
+        cls.detalles = [
+            DetalleVenta.objects.create(venta=cls.venta, producto=producto, cantidad=cantidad,
+                                        precio_unitario=Decimal('10'))
+            for producto, cantidad in zip(productos, (1, 2))
+        ]
+
+    @staticmethod
+    def en_dia(dia):
+        return timezone.make_aware(datetime.combine(dia, time(12)))
+
+    def importes(self, dimension):
+        return {fila['periodo']: fila['importe']
+                for fila in ingresos(self.dia - timedelta(days=5), self.dia, dimension, fuente='venta')}
+
+    def test_cambiar_la_fecha_recalcula_el_dia_anterior(self):
+        actualizar_resumenes()
+        self.assertEqual(self.importes('total'), {self.dia: Decimal('30.00')})
+
+        self.venta.fecha_venta = self.en_dia(self.dia - timedelta(days=3))
+        self.venta.save()
+        actualizar_resumenes()
+
+        self.assertEqual(self.importes('total'), {self.dia - timedelta(days=3): Decimal('30.00')})
+        self.assertEqual(self.importes('categoria'), {self.dia - timedelta(days=3): Decimal('30.00')})
+        self.assertFalse(DiaPendiente.objects.exists())
+
+    def test_borrado_fisico_de_un_detalle(self):
+        actualizar_resumenes()
+        self.assertEqual(self.importes('categoria'), {self.dia: Decimal('30.00')})
+
+        self.detalles[1].hard_delete()
+        actualizar_resumenes()
+
+        self.assertEqual(self.importes('categoria'), {self.dia: Decimal('10.00')})
+
+    def test_borrado_en_cascada(self):
+        actualizar_resumenes()
+
+        self.venta.hard_delete()
+        actualizar_resumenes()
+
+        self.assertEqual(self.importes('total'), {})
+        self.assertEqual(self.importes('categoria'), {})
+
+
+class RecalcularTotalesVentasTests(TestCase):
+
+    def test_recalcula_por_tramos(self):
+        categoria = CategoriaProducto.objects.create(nombre="Material", slug="material")
+        producto = Producto.objects.create(codigo="P1", nombre="Pelota", categoria=categoria,
+                                           precio=Decimal('10'), stock=10)
+        cliente = Usuario.objects.create(username="cliente")
+        estado = EstadoVenta.objects.create(nombre="Pagada")
+        for numero in range(3):
+            venta = Venta.objects.create(codigo=f"V{numero}", cliente=cliente, estado=estado, subtotal=0, total=0)
+            DetalleVenta.objects.create(venta=venta, producto=producto, cantidad=numero + 1,
+                                        precio_unitario=Decimal('10'))
+            Venta.objects.filter(pk=venta.pk).update(
+                fecha_venta=timezone.now() - timedelta(days=numero * 2), subtotal=0, total=0
+            )
+
+        call_command('recalcular_totales_ventas', '--dias-por-lote', '1', stdout=StringIO())
+
+        self.assertEqual(sorted(Venta.objects.values_list('subtotal', flat=True)),
+                         [Decimal('10'), Decimal('20'), Decimal('30')])
+
+    def test_dias_por_lote_debe_ser_positivo(self):
+        with self.assertRaisesMessage(CommandError, '--dias-por-lote'):
+            call_command('recalcular_totales_ventas', '--dias-por-lote', '0', stdout=StringIO())
+
+    def test_fecha_no_valida(self):
+        with self.assertRaises(CommandError):
+            call_command('recalcular_totales_ventas', '--desde', '2030-13-01', stdout=StringIO())
+
+
+class CargarDatosInicialesTests(TestCase):
+
+    def cargar(self, *args):
+        call_command('cargar_datos_iniciales', *args, stdout=StringIO())
+
+    def test_recargar_no_restaura_eliminados(self):
+        self.cargar()
+        EstadoVenta.objects.get(nombre="Cancelada").delete()
+
+        self.cargar()
+
+        self.assertFalse(EstadoVenta.all_with_deleted.get(nombre="Cancelada").is_active)
+        self.assertEqual(Categoria.objects.get(slug="futbol").parent.slug, "deportes")
+
+    def test_restaurar(self):
+        self.cargar()
+        EstadoVenta.objects.get(nombre="Cancelada").delete()
+
+        self.cargar('--restaurar')
+
+        estado = EstadoVenta.all_with_deleted.get(nombre="Cancelada")
+        self.assertTrue(estado.is_active)
+        self.assertIsNone(estado.deleted_at)
+
+
+class VerificarIndicesTests(TestCase):
+
+    def test_consultas_canonicas_usan_su_indice(self):
+        salida = StringIO()
+
+        call_command('verificar_indices', stdout=salida)
+
+        self.assertNotIn('usa otro índice', salida.getvalue())
+        self.assertIn('Todas las consultas usan índices', salida.getvalue())
+
+
+class ListadosAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('cargar_datos_iniciales', stdout=StringIO())
+        call_command('generar_datos_sinteticos', '--socios', '60', '--recursos', '30', '--productos', '30',
+                     '--alquileres', '60', '--ventas', '60', '--sesiones', '20', '--procesos', '1',
+                     stdout=StringIO())
+        cls.usuario = Usuario.objects.create(username="verificar-admin", is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_consultas_fijas_por_pagina(self):
+        for model, model_admin in admin.site._registry.items():
+            if model._base_manager.count() < 2:
+                continue
+            with self.subTest(model._meta.label_lower):
+                url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                # Primera petición sin medir: llena las caches de catálogos
+                self.assertEqual(self.client.get(url).status_code, 200)
+                with mock.patch.object(model_admin, 'list_per_page', 1), \
+                        CaptureQueriesContext(connection) as una_fila:
+                    self.client.get(url)
+                with mock.patch.object(model_admin, 'list_per_page', 50), self.assertNumQueries(len(una_fila)):
+                    self.client.get(url)
+
+
+class ExportarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(username="contable", is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.url = reverse('administracion:exportar', args=['ventas'])
+
+    def test_sin_permiso_sobre_el_modelo(self):
+        self.usuario.user_permissions.add(Permission.objects.get(codename='view_pagosuscripcion'))
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_con_permiso_sobre_el_modelo(self):
+        self.usuario.user_permissions.add(Permission.objects.get(codename='view_detalleventa'))
+
+        respuesta = self.client.get(self.url)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'venta,fecha,', b''.join(respuesta.streaming_content))
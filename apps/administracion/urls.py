@@ -0,0 +1,9 @@
+from django.urls import path
+
+from apps.administracion import views
+
+app_name = 'administracion'
+
+urlpatterns = [
+    path('exportar/<slug:nombre>.csv', views.exportar, name='exportar'),
+]
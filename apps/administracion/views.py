@@ -0,0 +1,33 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponseBadRequest
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+
+from apps.administracion.exportacion import exportaciones, respuesta_csv
+
+
+@staff_member_required
+@require_GET
+def exportar(request, nombre):
+    """
+    Descarga en streaming una exportación contable en CSV.
+    Parámetros opcionales: desde y hasta (AAAA-MM-DD) y delimitador.
+    Requiere el permiso de ver el modelo exportado.
+    """
+    exportacion = exportaciones().get(nombre)
+    if exportacion is None:
+        raise Http404
+    if not request.user.has_perm(exportacion.permiso):
+        raise PermissionDenied
+    fechas = {}
+    for clave in ('desde', 'hasta'):
+        valor = request.GET.get(clave)
+        try:
+            fechas[clave] = parse_date(valor) if valor else None
+        except ValueError:
+            fechas[clave] = None
+        if valor and fechas[clave] is None:
+            return HttpResponseBadRequest(f"Fecha no válida en '{clave}'")
+    delimitador = ';' if request.GET.get('delimitador') == ';' else ','
+    return respuesta_csv(nombre, fechas['desde'], fechas['hasta'], delimitador=delimitador)
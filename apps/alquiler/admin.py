@@ -0,0 +1,91 @@
+from django.contrib import admin
+from django.db.models import BooleanField, DecimalField, ExpressionWrapper, Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.alquiler.models import Alquiler, DetalleAlquiler, EstadoAlquiler, Penalizacion, ReservaRecurso
+from apps.common.admin import BorradoLogicoAdmin, CatalogoAdmin
+
+
+@admin.register(EstadoAlquiler)
+class EstadoAlquilerAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'color')
+
+
+class DetalleAlquilerInline(admin.TabularInline):
+    model = DetalleAlquiler
+    fields = ('recurso', 'cantidad', 'precio_unitario', 'deposito_unitario', 'devuelto', 'fecha_devolucion',
+              'estado_devolucion')
+    autocomplete_fields = ('recurso',)
+    extra = 0
+
+
+@admin.register(Alquiler)
+class AlquilerAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo', 'socio', 'estado', 'fecha_inicio', 'fecha_fin_prevista', 'fecha_devolucion',
+                    'costo_total', 'deposito', 'retrasado')
+    list_select_related = ('socio', 'estado')
+    list_filter = ('estado',)
+    search_fields = ('codigo', 'socio__username', 'socio__numero_socio')
+    autocomplete_fields = ('socio', 'gestionado_por')
+    inlines = [DetalleAlquilerInline]
+
+    def get_queryset(self, request):
+        condicion = Q(fecha_devolucion__isnull=True, fecha_fin_prevista__lt=timezone.now().date())
+        cancelado = EstadoAlquiler.objects.por_nombre("Cancelado")
+        if cancelado is not None:
+            condicion &= ~Q(estado_id=cancelado.pk)
+        return super().get_queryset(request).annotate(
+            retrasado_anotado=ExpressionWrapper(condicion, output_field=BooleanField())
+        )
+
+    @admin.display(boolean=True, description=_("Retrasado"))
+    def retrasado(self, obj):
+        return obj.retrasado_anotado
+
+
+@admin.register(DetalleAlquiler)
+class DetalleAlquilerAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo_alquiler', 'recurso', 'cantidad', 'precio_unitario', 'deposito_unitario',
+                    'importe', 'devuelto')
+    list_select_related = ('alquiler', 'recurso')
+    list_filter = ('devuelto',)
+    search_fields = ('alquiler__codigo', 'recurso__codigo', 'recurso__nombre')
+    raw_id_fields = ('alquiler',)
+    autocomplete_fields = ('recurso',)
+    anotaciones = {
+        'importe_anotado': ExpressionWrapper(DetalleAlquiler.expresion_subtotal(),
+                                             output_field=DecimalField(max_digits=12, decimal_places=2)),
+    }
+
+    @admin.display(description=_("Alquiler"), ordering='alquiler__codigo')
+    def codigo_alquiler(self, obj):
+        return obj.alquiler.codigo
+
+    @admin.display(description=_("Subtotal"), ordering='importe_anotado')
+    def importe(self, obj):
+        return obj.importe_anotado
+
+
+@admin.register(Penalizacion)
+class PenalizacionAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo_alquiler', 'motivo', 'monto', 'fecha', 'pagada', 'fecha_pago', 'automatica')
+    list_select_related = ('alquiler',)
+    list_filter = ('pagada', 'automatica')
+    search_fields = ('alquiler__codigo', 'motivo')
+    raw_id_fields = ('alquiler', 'detalle')
+    autocomplete_fields = ('aplicada_por',)
+
+    @admin.display(description=_("Alquiler"), ordering='alquiler__codigo')
+    def codigo_alquiler(self, obj):
+        return obj.alquiler.codigo
+
+
+@admin.register(ReservaRecurso)
+class ReservaRecursoAdmin(BorradoLogicoAdmin):
+    list_display = ('recurso', 'socio', 'cantidad', 'fecha_inicio', 'fecha_fin', 'confirmada')
+    list_select_related = ('recurso', 'socio')
+    list_filter = ('confirmada',)
+    search_fields = ('recurso__codigo', 'recurso__nombre', 'socio__username')
+    autocomplete_fields = ('socio', 'recurso')
+    raw_id_fields = ('alquiler',)
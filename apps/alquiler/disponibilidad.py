@@ -0,0 +1,113 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.alquiler.models import DetalleAlquiler, ReservaRecurso, EstadoAlquiler
+from apps.recursos.models import Recurso
+
+
+def _ocupaciones(recurso_ids, desde, hasta):
+    """
+    Devuelve (recurso_id, cantidad, inicio, fin) de cada ocupación que se solapa
+    con [desde, hasta], en una sola consulta.
+    """
+    hoy = timezone.now().date()
+    # Un alquiler sin devolver ocupa el recurso al menos hasta hoy, aunque esté retrasado
+    fin_alquiler = Case(
+        When(devuelto=True, fecha_devolucion__isnull=False, then=F('fecha_devolucion')),
+        When(alquiler__fecha_devolucion__isnull=False, then=F('alquiler__fecha_devolucion')),
+        default=Greatest(F('alquiler__fecha_fin_prevista'), Value(hoy)),
+    )
+    alquileres = (DetalleAlquiler.objects
+                  .filter(recurso_id__in=recurso_ids,
+                          alquiler__is_active=True,
+                          alquiler__fecha_inicio__lte=hasta)
+                  .annotate(r=F('recurso_id'), c=F('cantidad'),
+                            ini=F('alquiler__fecha_inicio'), fin=fin_alquiler)
+                  .filter(fin__gte=desde))
+    cancelado = EstadoAlquiler.objects.por_nombre("Cancelado")
+    if cancelado is not None:
+        alquileres = alquileres.exclude(alquiler__estado_id=cancelado.pk)
+
+    reservas = (ReservaRecurso.objects
+                .filter(recurso_id__in=recurso_ids,
+                        alquiler__isnull=True,
+                        fecha_inicio__lte=hasta,
+                        fecha_fin__gte=desde)
+                .annotate(r=F('recurso_id'), c=F('cantidad'),
+                          ini=F('fecha_inicio'), fin=F('fecha_fin')))
+
+    campos = ('r', 'c', 'ini', 'fin')
+    return (alquileres.order_by().values_list(*campos)
+            .union(reservas.order_by().values_list(*campos), all=True))
+
+
+def _totales(recursos):
+    """
+    Acepta instancias de Recurso o ids y devuelve {id: cantidad_total}.
+    """
+    recursos = list(recursos)
+    if all(isinstance(recurso, Recurso) for recurso in recursos):
+        return {recurso.pk: recurso.cantidad_total for recurso in recursos}
+    ids = [getattr(recurso, 'pk', recurso) for recurso in recursos]
+    return dict(Recurso.objects.filter(pk__in=ids).values_list('pk', 'cantidad_total'))
+
+
+def _eventos(ocupaciones, desde, hasta):
+    eventos = defaultdict(list)
+    for recurso_id, cantidad, inicio, fin in ocupaciones:
+        eventos[recurso_id].append((max(inicio, desde), cantidad))
+        eventos[recurso_id].append((min(fin, hasta) + timedelta(days=1), -cantidad))
+    return eventos
+
+
+def disponibilidad(recursos, desde, hasta=None):
+    """
+    Unidades libres de cada recurso durante todo el rango [desde, hasta].
+
+    `recursos` puede ser una página de instancias de Recurso o de ids.
+    Devuelve {recurso_id: unidades_libres}.
+    """
+    hasta = hasta or desde
+    totales = _totales(recursos)
+    eventos = _eventos(_ocupaciones(list(totales), desde, hasta), desde, hasta)
+
+    resultado = {}
+    for recurso_id, total in totales.items():
+        ocupadas = pico = 0
+        # Las liberaciones (negativas) de un mismo día se aplican antes que las altas
+        for _fecha, cantidad in sorted(eventos.get(recurso_id, ())):
+            ocupadas += cantidad
+            pico = max(pico, ocupadas)
+        resultado[recurso_id] = max(0, total - pico)
+    return resultado
+
+
+def calendario(recursos, desde, hasta):
+    """
+    Unidades libres por día para cada recurso en [desde, hasta].
+
+    Devuelve {recurso_id: [libres_dia_0, libres_dia_1, ...]}, indexado por días
+    desde `desde`.
+    """
+    totales = _totales(recursos)
+    dias = (hasta - desde).days + 1
+    diferencias = {recurso_id: [0] * (dias + 1) for recurso_id in totales}
+
+    for recurso_id, eventos in _eventos(_ocupaciones(list(totales), desde, hasta), desde, hasta).items():
+        fila = diferencias[recurso_id]
+        for fecha, cantidad in eventos:
+            fila[(fecha - desde).days] += cantidad
+
+    resultado = {}
+    for recurso_id, total in totales.items():
+        ocupadas = 0
+        libres = []
+        for cambio in diferencias[recurso_id][:dias]:
+            ocupadas += cambio
+            libres.append(max(0, total - ocupadas))
+        resultado[recurso_id] = libres
+    return resultado
@@ -2,7 +2,9 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from apps.common.models import BaseModel
+from apps.common.models import BaseModel, SoftDeleteManager, SoftDeleteQuerySet
+from apps.common.cache import CatalogoManager
+from apps.common.expresiones import DiasEntre
 from apps.recursos.models import Recurso
 from django.conf import settings
 
@@ -12,11 +14,13 @@ class EstadoAlquiler(BaseModel):
     Define los posibles estados de un alquiler.
     Ejemplos: Reservado, En curso, Finalizado, Cancelado, etc.
     """
-    nombre = models.CharField(_("Nombre"), max_length=50)
+    nombre = models.CharField(_("Nombre"), max_length=50, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     color = models.CharField(_("Color"), max_length=20, default="primary",
                             help_text=_("Clase de color de Bootstrap (primary, success, danger, etc.)"))
     
+    objects = CatalogoManager()
+    
     class Meta:
         verbose_name = _("Estado de alquiler")
         verbose_name_plural = _("Estados de alquiler")
@@ -26,6 +30,27 @@ class EstadoAlquiler(BaseModel):
         return self.nombre
 
 
+class AlquilerQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet de alquileres con consultas de seguimiento de devoluciones.
+    """
+    
+    def retrasados(self, fecha=None):
+        """
+        Alquileres no devueltos cuya fecha de fin prevista es anterior a `fecha`
+        (hoy por defecto), excluyendo los cancelados. Anota `dias_retraso`
+        en la propia consulta.
+        """
+        fecha = fecha or timezone.now().date()
+        queryset = self.filter(fecha_devolucion__isnull=True, fecha_fin_prevista__lt=fecha)
+        cancelado = EstadoAlquiler.objects.por_nombre("Cancelado")
+        if cancelado is not None:
+            queryset = queryset.exclude(estado_id=cancelado.pk)
+        return queryset.annotate(
+            dias_retraso=DiasEntre(models.Value(fecha, output_field=models.DateField()), 'fecha_fin_prevista')
+        )
+
+
 class Alquiler(BaseModel):
     """
     Modelo principal para gestionar los alquileres de recursos del club.
@@ -59,10 +84,25 @@ class Alquiler(BaseModel):
                                       on_delete=models.PROTECT, related_name="alquileres_gestionados",
                                       null=True, blank=True)
     
+    objects = SoftDeleteManager.from_queryset(AlquilerQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(AlquilerQuerySet)()
+    
     class Meta:
         verbose_name = _("Alquiler")
         verbose_name_plural = _("Alquileres")
         ordering = ['-fecha_solicitud']
+        indexes = [
+            models.Index(fields=['-fecha_solicitud'], condition=models.Q(is_active=True),
+                         name='alquiler_activo_fecha_idx'),
+            models.Index(fields=['fecha_inicio', 'fecha_fin_prevista'], name='alquiler_intervalo_idx'),
+            models.Index(fields=['socio', 'estado'], name='alquiler_socio_estado_idx'),
+            # Alquileres sin devolver: solo una fracción pequeña de la tabla
+            models.Index(fields=['fecha_fin_prevista'],
+                         condition=models.Q(fecha_devolucion__isnull=True, is_active=True),
+                         name='alquiler_sin_devolver_idx'),
+            # Cambios desde la marca de agua de los resúmenes diarios
+            models.Index(fields=['updated_at'], name='alquiler_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Alquiler {self.codigo} - {self.socio.username}"
@@ -96,11 +136,18 @@ class Alquiler(BaseModel):
     def dias_retraso(self):
         """
         Calcula los días de retraso en la devolución.
+        Usa el valor anotado por retrasados() si existe.
         """
+        if '_dias_retraso' in self.__dict__:
+            return self._dias_retraso
         if not self.esta_retrasado:
             return 0
         hoy = timezone.now().date()
         return (hoy - self.fecha_fin_prevista).days
+    
+    @dias_retraso.setter
+    def dias_retraso(self, valor):
+        self._dias_retraso = valor
 
 
 class DetalleAlquiler(BaseModel):
@@ -129,6 +176,9 @@ class DetalleAlquiler(BaseModel):
         verbose_name_plural = _("Detalles de alquiler")
         ordering = ['alquiler', 'id']
         unique_together = [['alquiler', 'recurso']]
+        indexes = [
+            models.Index(fields=['updated_at'], name='detalle_alquiler_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.recurso.nombre} ({self.cantidad}) - {self.alquiler.codigo}"
@@ -140,6 +190,13 @@ class DetalleAlquiler(BaseModel):
         """
         return self.precio_unitario * self.cantidad
     
+    @staticmethod
+    def expresion_subtotal():
+        """
+        Expresión SQL equivalente a subtotal.
+        """
+        return models.F('precio_unitario') * models.F('cantidad')
+    
     @property
     def deposito_total(self):
         """
@@ -166,11 +223,21 @@ class Penalizacion(BaseModel):
                                     on_delete=models.PROTECT, related_name="penalizaciones_aplicadas")
     pagada = models.BooleanField(_("Pagada"), default=False)
     fecha_pago = models.DateField(_("Fecha de pago"), null=True, blank=True)
+    automatica = models.BooleanField(_("Automática"), default=False,
+                                    help_text=_("Generada por el proceso diario de retrasos"))
     
     class Meta:
         verbose_name = _("Penalización")
         verbose_name_plural = _("Penalizaciones")
         ordering = ['-fecha']
+        constraints = [
+            # El proceso diario genera como mucho una penalización por alquiler y día
+            models.UniqueConstraint(fields=['alquiler', 'fecha'], condition=models.Q(automatica=True),
+                                    name='penalizacion_retraso_diaria_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at'], name='penalizacion_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Penalización {self.motivo} - {self.alquiler.codigo}"
@@ -198,6 +265,9 @@ class ReservaRecurso(BaseModel):
         verbose_name = _("Reserva de recurso")
         verbose_name_plural = _("Reservas de recursos")
         ordering = ['-fecha_reserva']
+        indexes = [
+            models.Index(fields=['recurso', 'fecha_inicio', 'fecha_fin'], name='reserva_recurso_intervalo_idx'),
+        ]
     
     def __str__(self):
         return f"Reserva de {self.recurso.nombre} para {self.socio.username}"
@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.alquiler.models import Alquiler, DetalleAlquiler, EstadoAlquiler, Penalizacion
+
+TARIFA_RETRASO = {
+    'importe_diario': '2.00',
+    'por_unidad': False,
+    'dias_gracia': 0,
+    'maximo_dias': None,
+    'motivo': 'Retraso en la devolución',
+    'usuario': None,
+}
+
+
+def tarifa_retraso():
+    """
+    Tarifa de penalización por retraso: valores por defecto combinados con
+    settings.PENALIZACION_RETRASO.
+    """
+    tarifa = {**TARIFA_RETRASO, **getattr(settings, 'PENALIZACION_RETRASO', {})}
+    tarifa['importe_diario'] = Decimal(str(tarifa['importe_diario']))
+    return tarifa
+
+
+def _usuario_sistema(username):
+    Usuario = get_user_model()
+    usuarios = Usuario.objects.filter(username=username) if username else Usuario.objects.filter(is_superuser=True)
+    usuario_id = usuarios.order_by('pk').values_list('pk', flat=True).first()
+    if usuario_id is None:
+        raise ImproperlyConfigured('No hay usuario para aplicar penalizaciones: define '
+                                   'PENALIZACION_RETRASO["usuario"] o crea un superusuario')
+    return usuario_id
+
+
+def penalizar_retrasos(fecha=None, lote=5000, desde_id=0, dry_run=False, progreso=None):
+    """
+    Crea la penalización del día `fecha` (hoy por defecto) para cada alquiler
+    retrasado y marca los alquileres como "Retrasado".
+
+    Es idempotente: los alquileres ya penalizados ese día se excluyen y una
+    restricción única impide duplicados si dos procesos coinciden. Los
+    alquileres se recorren por id en lotes de `lote`, cada uno en su propia
+    transacción, por lo que una ejecución interrumpida puede reanudarse.
+    `progreso(total, ultimo_id)` se llama tras cada lote.
+    Devuelve {'penalizaciones': n, 'importe': Decimal}.
+    """
+    fecha = fecha or timezone.now().date()
+    tarifa = tarifa_retraso()
+    aplicada_por = _usuario_sistema(tarifa['usuario'])
+    estado_retrasado = EstadoAlquiler.objects.por_nombre("Retrasado")
+
+    pendientes = (Alquiler.objects
+                  .retrasados(fecha)
+                  .filter(dias_retraso__gt=tarifa['dias_gracia'])
+                  .exclude(Exists(Penalizacion.all_with_deleted.filter(
+                      alquiler=OuterRef('pk'), fecha=fecha, automatica=True)))
+                  .order_by('id'))
+    if tarifa['maximo_dias']:
+        pendientes = pendientes.filter(dias_retraso__lte=tarifa['dias_gracia'] + tarifa['maximo_dias'])
+    if tarifa['por_unidad']:
+        unidades = (DetalleAlquiler.objects
+                    .filter(alquiler=OuterRef('pk'), devuelto=False)
+                    .order_by()
+                    .values('alquiler')
+                    .annotate(total=Sum('cantidad'))
+                    .values('total'))
+        pendientes = pendientes.annotate(unidades=Coalesce(Subquery(unidades), Value(1)))
+    else:
+        pendientes = pendientes.annotate(unidades=Value(1, output_field=models.IntegerField()))
+    pendientes = pendientes.values_list('id', 'dias_retraso', 'unidades')
+
+    total = 0
+    importe = Decimal('0')
+    ultimo_id = desde_id
+    while True:
+        filas = list(pendientes.filter(id__gt=ultimo_id)[:lote])
+        if not filas:
+            break
+
+        penalizaciones = [
+            Penalizacion(
+                alquiler_id=alquiler_id,
+                motivo=tarifa['motivo'],
+                descripcion=f"{dias} días de retraso a {fecha:%d/%m/%Y}",
+                monto=tarifa['importe_diario'] * unidades,
+                fecha=fecha,
+                aplicada_por_id=aplicada_por,
+                automatica=True,
+            )
+            for alquiler_id, dias, unidades in filas
+        ]
+        if not dry_run:
+            with transaction.atomic():
+                # Las penalizadas por otro proceso desde la consulta no se cuentan;
+                # ignore_conflicts cubre las que aún no ha confirmado
+                penalizados = set(Penalizacion.all_with_deleted
+                                  .filter(alquiler_id__in=[fila[0] for fila in filas], fecha=fecha, automatica=True)
+                                  .values_list('alquiler_id', flat=True))
+                penalizaciones = [penalizacion for penalizacion in penalizaciones
+                                  if penalizacion.alquiler_id not in penalizados]
+                Penalizacion.objects.bulk_create(penalizaciones, ignore_conflicts=True)
+                if estado_retrasado is not None:
+                    (Alquiler.objects
+                     .filter(id__in=[fila[0] for fila in filas])
+                     .exclude(estado_id=estado_retrasado.pk)
+                     .update(estado_id=estado_retrasado.pk, updated_at=timezone.now()))
+
+        ultimo_id = filas[-1][0]
+        total += len(penalizaciones)
+        importe += sum(penalizacion.monto for penalizacion in penalizaciones)
+        if progreso:
+            progreso(total, ultimo_id)
+    return {'penalizaciones': total, 'importe': importe}
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from apps.alquiler.services import penalizar_retrasos
+
+
+@shared_task(name='alquiler.penalizar_retrasos')
+def penalizar_retrasos_diario():
+    """
+    Tarea nocturna programada en club_core.celery. Repetirla el mismo día no
+    genera penalizaciones duplicadas.
+    """
+    resultado = penalizar_retrasos()
+    return {'penalizaciones': resultado['penalizaciones'], 'importe': str(resultado['importe'])}
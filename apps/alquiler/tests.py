@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db.models import Q
+from django.test import TestCase
+
+from apps.alquiler.models import Alquiler, EstadoAlquiler, Penalizacion
+from apps.alquiler.services import penalizar_retrasos
+from apps.socios.models import Usuario
+
+
+class PenalizarRetrasosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fecha = date(2030, 1, 10)
+        cls.admin = Usuario.objects.create(username="admin", is_superuser=True)
+        estado = EstadoAlquiler.objects.create(nombre="En curso")
+        cls.alquileres = [
+            Alquiler.objects.create(codigo=f"A{numero}", socio=cls.admin, estado=estado, costo_total=Decimal('5'),
+                                    fecha_inicio=cls.fecha - timedelta(days=10),
+                                    fecha_fin_prevista=cls.fecha - timedelta(days=numero + 1))
+            for numero in range(3)
+        ]
+
+    def test_segunda_ejecucion_no_crea_ni_cuenta_nada(self):
+        self.assertEqual(penalizar_retrasos(self.fecha)['penalizaciones'], 3)
+
+        resultado = penalizar_retrasos(self.fecha)
+
+        self.assertEqual(resultado, {'penalizaciones': 0, 'importe': Decimal('0')})
+        self.assertEqual(Penalizacion.objects.filter(fecha=self.fecha).count(), 3)
+
+    def test_no_cuenta_las_penalizadas_por_otro_proceso(self):
+        Penalizacion.objects.create(alquiler=self.alquileres[0], motivo="Retraso", monto=Decimal('2'),
+                                    fecha=self.fecha, automatica=True, aplicada_por=self.admin)
+
+        # Simula que la penalización se creó después de seleccionar los alquileres
+        with mock.patch('apps.alquiler.services.Exists', return_value=Q(pk__in=[])):
+            resultado = penalizar_retrasos(self.fecha, lote=2)
+
+        self.assertEqual(resultado, {'penalizaciones': 2, 'importe': Decimal('4.00')})
+        self.assertEqual(Penalizacion.objects.filter(fecha=self.fecha).count(), 3)
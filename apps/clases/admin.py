@@ -0,0 +1,101 @@
+from django.contrib import admin, messages
+from django.utils.translation import gettext_lazy as _
+
+from apps.clases.models import (CategoriaClase, Clase, InscripcionClase, Instructor, ListaEsperaClase, NivelClase,
+                                SesionClase, ValoracionClase)
+from apps.common.admin import BorradoLogicoAdmin, CatalogoAdmin
+
+
+@admin.register(CategoriaClase)
+class CategoriaClaseAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'slug', 'color')
+    prepopulated_fields = {'slug': ('nombre',)}
+
+
+@admin.register(NivelClase)
+class NivelClaseAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'orden')
+
+
+@admin.register(Instructor)
+class InstructorAdmin(BorradoLogicoAdmin):
+    list_display = ('nombre', 'email_contacto', 'telefono', 'calificacion', 'num_valoraciones')
+    list_select_related = ('usuario',)
+    search_fields = ('usuario__username', 'usuario__first_name', 'usuario__last_name', 'especialidades')
+    autocomplete_fields = ('usuario',)
+    readonly_fields = ('calificacion', 'suma_valoraciones', 'num_valoraciones')
+
+    @admin.display(description=_("Nombre"), ordering='usuario__last_name')
+    def nombre(self, obj):
+        return obj.usuario.get_full_name() or obj.usuario.username
+
+
+@admin.register(Clase)
+class ClaseAdmin(BorradoLogicoAdmin):
+    list_display = ('nombre', 'categoria', 'nivel', 'duracion_minutos', 'capacidad_maxima', 'precio', 'activa',
+                    'destacada', 'calificacion', 'num_valoraciones')
+    list_select_related = ('categoria', 'nivel')
+    list_filter = ('activa', 'destacada', 'solo_socios', 'categoria', 'nivel')
+    search_fields = ('nombre',)
+    readonly_fields = ('calificacion', 'suma_valoraciones', 'num_valoraciones')
+
+
+@admin.register(SesionClase)
+class SesionClaseAdmin(BorradoLogicoAdmin):
+    list_display = ('clase', 'fecha', 'hora_inicio', 'hora_fin', 'instructor', 'ubicacion', 'inscritos',
+                    'plazas', 'cancelada')
+    list_select_related = ('clase', 'instructor__usuario')
+    list_filter = ('cancelada',)
+    search_fields = ('clase__nombre', 'ubicacion')
+    autocomplete_fields = ('clase', 'instructor')
+    metodos_queryset = ('with_availability',)
+
+    @admin.display(description=_("Inscritos"), ordering='inscritos')
+    def inscritos(self, obj):
+        return obj.inscritos
+
+    @admin.display(description=_("Plazas disponibles"), ordering='plazas_disponibles')
+    def plazas(self, obj):
+        return obj.plazas_disponibles
+
+
+@admin.register(InscripcionClase)
+class InscripcionClaseAdmin(BorradoLogicoAdmin):
+    list_display = ('socio', 'sesion', 'fecha_inscripcion', 'precio_pagado', 'pagado', 'asistio', 'cancelada',
+                    'reembolsado')
+    list_select_related = ('socio', 'sesion__clase')
+    list_filter = ('pagado', 'asistio', 'cancelada', 'reembolsado')
+    search_fields = ('socio__username', 'socio__numero_socio', 'sesion__clase__nombre')
+    autocomplete_fields = ('socio',)
+    raw_id_fields = ('sesion',)
+
+
+@admin.register(ListaEsperaClase)
+class ListaEsperaClaseAdmin(BorradoLogicoAdmin):
+    list_display = ('socio', 'sesion', 'fecha_solicitud', 'atendida')
+    list_select_related = ('socio', 'sesion__clase')
+    list_filter = ('atendida',)
+    search_fields = ('socio__username', 'sesion__clase__nombre')
+    autocomplete_fields = ('socio',)
+    raw_id_fields = ('sesion', 'inscripcion')
+
+
+@admin.register(ValoracionClase)
+class ValoracionClaseAdmin(BorradoLogicoAdmin):
+    list_display = ('socio', 'clase', 'instructor', 'puntuacion', 'fecha', 'aprobado')
+    list_select_related = ('socio', 'clase', 'instructor__usuario')
+    list_filter = ('aprobado', 'puntuacion')
+    search_fields = ('socio__username', 'clase__nombre', 'comentario')
+    autocomplete_fields = ('socio', 'clase', 'instructor')
+    raw_id_fields = ('sesion',)
+    actions = ['restaurar', 'aprobar', 'retirar_aprobacion']
+
+    @admin.action(description=_("Aprobar las valoraciones seleccionadas"))
+    def aprobar(self, request, queryset):
+        filas = queryset.update(aprobado=True)
+        self.message_user(request, _("%(filas)d valoraciones aprobadas.") % {'filas': filas}, messages.SUCCESS)
+
+    @admin.action(description=_("Retirar la aprobación de las valoraciones seleccionadas"))
+    def retirar_aprobacion(self, request, queryset):
+        filas = queryset.update(aprobado=False)
+        self.message_user(request, _("%(filas)d valoraciones retiradas.") % {'filas': filas}, messages.SUCCESS)
@@ -1,11 +1,30 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.signals import post_delete
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from apps.common.models import BaseModel
+from apps.common.models import BaseModel, SoftDeleteManager, SoftDeleteQuerySet
+from apps.clases.valoraciones import aplicar_diferencias, contribucion, diferencias, recalcular
 from django.conf import settings
 
 
+class ValoradosQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet de modelos con agregados de valoraciones (Instructor y Clase).
+    """
+
+    def mejor_valorados(self, minimo=1):
+        """
+        Ordena por calificación descendente (a igualdad, por número de
+        valoraciones) los que tienen al menos `minimo` valoraciones. El orden
+        coincide con el índice parcial sobre la calificación.
+        """
+        return (self.filter(calificacion__isnull=False, num_valoraciones__gte=minimo)
+                .order_by('-calificacion', '-num_valoraciones'))
+
+
 class CategoriaClase(BaseModel):
     """
     Categorías para clasificar los tipos de clases ofrecidas.
@@ -41,12 +60,22 @@ class Instructor(BaseModel):
     sitio_web = models.URLField(_("Sitio web"), blank=True)
     redes_sociales = models.JSONField(_("Redes sociales"), default=dict, blank=True)
     calificacion = models.DecimalField(_("Calificación promedio"), max_digits=3, decimal_places=2,
-                                      null=True, blank=True, validators=[MinValueValidator(0)])
+                                      null=True, blank=True, editable=False, validators=[MinValueValidator(0)])
+    suma_valoraciones = models.PositiveIntegerField(_("Suma de valoraciones"), default=0, editable=False)
+    num_valoraciones = models.PositiveIntegerField(_("Número de valoraciones"), default=0, editable=False)
+    
+    objects = SoftDeleteManager.from_queryset(ValoradosQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(ValoradosQuerySet)()
     
     class Meta:
         verbose_name = _("Instructor")
         verbose_name_plural = _("Instructores")
         ordering = ['usuario__last_name', 'usuario__first_name']
+        indexes = [
+            models.Index(fields=['-calificacion', '-num_valoraciones'],
+                         condition=models.Q(is_active=True, calificacion__isnull=False),
+                         name='instructor_calificacion_idx'),
+        ]
     
     def __str__(self):
         return f"{self.usuario.get_full_name()}"
@@ -64,7 +93,7 @@ class NivelClase(BaseModel):
     Niveles de dificultad o experiencia para las clases.
     Ejemplos: Principiante, Intermedio, Avanzado, etc.
     """
-    nombre = models.CharField(_("Nombre"), max_length=50)
+    nombre = models.CharField(_("Nombre"), max_length=50, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     orden = models.PositiveSmallIntegerField(_("Orden"), default=0)
     
@@ -77,6 +106,15 @@ class NivelClase(BaseModel):
         return self.nombre
 
 
+class ClaseQuerySet(ValoradosQuerySet):
+    
+    def mejor_valoradas(self, minimo=1):
+        """
+        Ranking de clases activas por calificación.
+        """
+        return self.filter(activa=True).mejor_valorados(minimo)
+
+
 class Clase(BaseModel):
     """
     Modelo principal para las clases ofrecidas por el club.
@@ -107,10 +145,24 @@ class Clase(BaseModel):
     activa = models.BooleanField(_("Activa"), default=True)
     destacada = models.BooleanField(_("Destacada"), default=False)
     
+    # Valoraciones (mantenidas por apps.clases.valoraciones)
+    calificacion = models.DecimalField(_("Calificación promedio"), max_digits=3, decimal_places=2,
+                                      null=True, blank=True, editable=False)
+    suma_valoraciones = models.PositiveIntegerField(_("Suma de valoraciones"), default=0, editable=False)
+    num_valoraciones = models.PositiveIntegerField(_("Número de valoraciones"), default=0, editable=False)
+    
+    objects = SoftDeleteManager.from_queryset(ClaseQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(ClaseQuerySet)()
+    
     class Meta:
         verbose_name = _("Clase")
         verbose_name_plural = _("Clases")
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['-calificacion', '-num_valoraciones'],
+                         condition=models.Q(is_active=True, activa=True, calificacion__isnull=False),
+                         name='clase_calificacion_idx'),
+        ]
     
     def __str__(self):
         return self.nombre
@@ -124,6 +176,25 @@ class Clase(BaseModel):
         return 0
 
 
+class SesionClaseQuerySet(SoftDeleteQuerySet):
+    
+    def with_availability(self):
+        """
+        Anota inscritos, capacidad_final y plazas_disponibles en la misma consulta,
+        evitando un COUNT por sesión al mostrar horarios.
+        """
+        inscritos = InscripcionClase.objects.filter(
+            sesion=OuterRef('pk'), cancelada=False
+        ).values('sesion').annotate(total=Count('*')).values('total')
+        
+        return self.annotate(
+            inscritos=Coalesce(Subquery(inscritos), Value(0)),
+            capacidad_final=Coalesce(F('capacidad_maxima'), F('clase__capacidad_maxima')),
+        ).annotate(
+            plazas_disponibles=Greatest(F('capacidad_final') - F('inscritos'), Value(0)),
+        )
+
+
 class SesionClase(BaseModel):
     """
     Sesiones programadas para una clase específica.
@@ -145,10 +216,17 @@ class SesionClase(BaseModel):
     cancelada = models.BooleanField(_("Cancelada"), default=False)
     motivo_cancelacion = models.TextField(_("Motivo de cancelación"), blank=True)
     
+    objects = SoftDeleteManager.from_queryset(SesionClaseQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(SesionClaseQuerySet)()
+    
     class Meta:
         verbose_name = _("Sesión de clase")
         verbose_name_plural = _("Sesiones de clase")
         ordering = ['fecha', 'hora_inicio']
+        indexes = [
+            models.Index(fields=['fecha', 'hora_inicio'], condition=models.Q(is_active=True),
+                         name='sesion_activa_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.clase.nombre} - {self.fecha} {self.hora_inicio}"
@@ -174,17 +252,31 @@ class SesionClase(BaseModel):
     def capacidad_final(self):
         """
         Devuelve la capacidad final de la sesión (específica o de la clase).
+        Usa el valor anotado por with_availability() si existe.
         """
+        if '_capacidad_final' in self.__dict__:
+            return self._capacidad_final
         return self.capacidad_maxima if self.capacidad_maxima is not None else self.clase.capacidad_maxima
     
+    @capacidad_final.setter
+    def capacidad_final(self, valor):
+        self._capacidad_final = valor
+    
     @property
     def plazas_disponibles(self):
         """
         Calcula el número de plazas disponibles en la sesión.
+        Usa el valor anotado por with_availability() si existe.
         """
+        if '_plazas_disponibles' in self.__dict__:
+            return self._plazas_disponibles
         inscritos = self.inscripciones.filter(cancelada=False).count()
         return max(0, self.capacidad_final - inscritos)
     
+    @plazas_disponibles.setter
+    def plazas_disponibles(self, valor):
+        self._plazas_disponibles = valor
+    
     @property
     def completa(self):
         """
@@ -217,23 +309,111 @@ class InscripcionClase(BaseModel):
         verbose_name_plural = _("Inscripciones a clases")
         ordering = ['-fecha_inscripcion']
         unique_together = [['socio', 'sesion']]
+        indexes = [
+            models.Index(fields=['updated_at'], name='inscripcion_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.socio.username} - {self.sesion}"
     
-    def cancelar(self, motivo=""):
+    def cancelar(self, motivo="", promover_lista_espera=True):
+        """
+        Cancela la inscripción a la clase y ofrece la plaza liberada
+        al primero de la lista de espera.
+        """
+        from apps.clases.services import promover_lista_espera as promover
+        
+        with transaction.atomic():
+            self.cancelada = True
+            self.fecha_cancelacion = timezone.now()
+            self.motivo_cancelacion = motivo
+            self.save()
+            
+            if promover_lista_espera:
+                promover(self.sesion_id)
+
+
+class ListaEsperaClase(BaseModel):
+    """
+    Solicitudes en espera para sesiones completas, atendidas por orden de llegada.
+    """
+    socio = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("Socio"),
+                             on_delete=models.CASCADE, related_name="listas_espera_clase")
+    sesion = models.ForeignKey(SesionClase, verbose_name=_("Sesión"),
+                              on_delete=models.CASCADE, related_name="lista_espera")
+    fecha_solicitud = models.DateTimeField(_("Fecha de solicitud"), auto_now_add=True)
+    atendida = models.BooleanField(_("Atendida"), default=False)
+    inscripcion = models.ForeignKey(InscripcionClase, verbose_name=_("Inscripción"),
+                                   on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="+")
+    
+    class Meta:
+        verbose_name = _("Lista de espera de clase")
+        verbose_name_plural = _("Listas de espera de clases")
+        ordering = ['sesion', 'fecha_solicitud', 'id']
+        unique_together = [['socio', 'sesion']]
+    
+    def __str__(self):
+        return f"{self.socio.username} - {self.sesion} (en espera)"
+
+
+class ValoracionClaseQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet de valoraciones. Las escrituras masivas no disparan señales, así
+    que recalculan los agregados de los instructores y clases afectados.
+    """
+    
+    # Campos que cambian lo que aporta una valoración a los agregados
+    CAMPOS_AGREGADOS = {'instructor', 'instructor_id', 'clase', 'clase_id', 'puntuacion', 'aprobado', 'is_active'}
+    
+    @staticmethod
+    def _recalcular(pares):
         """
-        Cancela la inscripción a la clase.
+        Recalcula los agregados de los instructores y clases de los pares
+        (instructor_id, clase_id).
         """
-        self.cancelada = True
-        self.fecha_cancelacion = timezone.now()
-        self.motivo_cancelacion = motivo
-        self.save()
+        pares = list(pares)
+        for indice, destino in enumerate(('instructor', 'clase')):
+            pks = {par[indice] for par in pares if isinstance(par[indice], int)}
+            if pks:
+                recalcular(destino, pks)
+    
+    def update(self, **kwargs):
+        if not self.CAMPOS_AGREGADOS & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            pares = list(self.values_list('instructor_id', 'clase_id'))
+            filas = super().update(**kwargs)
+            if pares:
+                nuevos = [kwargs.get(f'{destino}_id', kwargs.get(destino)) for destino in ('instructor', 'clase')]
+                pares.append(tuple(getattr(valor, 'pk', valor) for valor in nuevos))
+                self._recalcular(pares)
+        return filas
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            self._recalcular((valoracion.instructor_id, valoracion.clase_id) for valoracion in objs)
+        return objs
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            pares = list(self.model.all_with_deleted.using(self.db)
+                         .filter(pk__in=[valoracion.pk for valoracion in objs])
+                         .values_list('instructor_id', 'clase_id'))
+            filas = super().bulk_update(objs, fields, *args, **kwargs)
+            pares.extend((valoracion.instructor_id, valoracion.clase_id) for valoracion in objs)
+            self._recalcular(pares)
+        return filas
 
 
 class ValoracionClase(BaseModel):
     """
     Valoraciones y comentarios de los socios sobre las clases.
+    
+    Las que están aprobadas y no eliminadas cuentan en los agregados de
+    calificación de su instructor y su clase, que se ajustan al guardarlas.
     """
     socio = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("Socio"),
                              on_delete=models.CASCADE, related_name="valoraciones_clase")
@@ -258,5 +438,41 @@ class ValoracionClase(BaseModel):
         ordering = ['-fecha']
         unique_together = [['socio', 'clase', 'sesion']]
     
+    objects = SoftDeleteManager.from_queryset(ValoracionClaseQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(ValoracionClaseQuerySet)()
+    
     def __str__(self):
         return f"{self.socio.username} - {self.clase.nombre} ({self.puntuacion}★)"
+    
+    def _contribucion_anterior(self, using):
+        """
+        Lo que aporta la fila guardada, bloqueada hasta el final de la
+        transacción para que dos guardados no partan del mismo valor.
+        """
+        if self._state.adding:
+            return None
+        guardada = ValoracionClase.all_with_deleted.using(using).select_for_update().filter(pk=self.pk).first()
+        return contribucion(guardada) if guardada else None
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda la valoración y aplica a los agregados de su instructor y su
+        clase la diferencia con lo que aportaba antes (alta, cambio de
+        puntuación, aprobación, borrado lógico o cambio de clase/instructor).
+        """
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            anterior = self._contribucion_anterior(using)
+            super().save(*args, **kwargs)
+            aplicar_diferencias(diferencias(anterior, contribucion(self)))
+
+
+def _descontar_valoracion(sender, instance, **kwargs):
+    """
+    Quita de los agregados las valoraciones borradas físicamente (hard_delete
+    o en cascada).
+    """
+    aplicar_diferencias(diferencias(contribucion(instance), None))
+
+
+post_delete.connect(_descontar_valoracion, sender=ValoracionClase, dispatch_uid="valoraciones:borrado")
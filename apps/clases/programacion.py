@@ -0,0 +1,310 @@
+"""
+Programación de sesiones de clase a partir de reglas de recurrencia.
+
+Un Horario describe una franja recurrente de una clase (instructor, hora,
+ubicación y una regla al estilo RRULE); generar_sesiones() lo expande en
+sesiones, comprueba los solapes de instructor y ubicación de todo el lote de
+una vez y las crea con bulk_create:
+
+    horario = Horario(clase, instructor, time(18), 'Sala 1',
+                      Recurrencia.desde_regla('FREQ=WEEKLY;BYDAY=MO,WE', desde=date(2025, 9, 15),
+                                              hasta=date(2026, 6, 19)))
+    resultado = generar_sesiones([horario], festivos=[date(2025, 12, 8)])
+
+La detección de conflictos carga las sesiones existentes del periodo en una
+consulta y recorre todas las franjas ordenadas por recurso e inicio, de modo
+que el coste es el de una ordenación y no una consulta por sesión.
+"""
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from apps.clases.models import SesionClase
+
+DIAS_SEMANA = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+FRECUENCIAS = ('DAILY', 'WEEKLY')
+LOTE = 1000
+
+# Conflictos incluidos en el mensaje de error
+MAX_CONFLICTOS_ERROR = 20
+
+
+def _regla_invalida(mensaje, **params):
+    return ValidationError(mensaje, code='regla_invalida', params=params)
+
+
+@dataclass(frozen=True)
+class Recurrencia:
+    """
+    Subconjunto de RRULE (RFC 5545): frecuencia diaria o semanal, intervalo,
+    días de la semana (0 = lunes), fin por fecha (`hasta`) o por número de
+    repeticiones (`repeticiones`) y fechas excluidas. Como en RRULE, las
+    excepciones se descartan después de aplicar `repeticiones`.
+    """
+    desde: date
+    hasta: date = None
+    frecuencia: str = 'WEEKLY'
+    intervalo: int = 1
+    dias_semana: tuple = ()
+    repeticiones: int = None
+    excepciones: frozenset = frozenset()
+
+    def __post_init__(self):
+        if self.frecuencia not in FRECUENCIAS:
+            raise _regla_invalida(_("Frecuencia no soportada: %(frecuencia)s."), frecuencia=self.frecuencia)
+        if self.intervalo < 1:
+            raise _regla_invalida(_("El intervalo debe ser positivo."))
+        if self.hasta is None and self.repeticiones is None:
+            raise _regla_invalida(_("La recurrencia necesita una fecha final o un número de repeticiones."))
+        if self.hasta is not None and self.hasta < self.desde:
+            raise _regla_invalida(_("La fecha final es anterior a la inicial."))
+        if any(not 0 <= dia <= 6 for dia in self.dias_semana):
+            raise _regla_invalida(_("Día de la semana no válido."))
+        object.__setattr__(self, 'dias_semana', tuple(sorted(set(self.dias_semana))))
+        object.__setattr__(self, 'excepciones', frozenset(self.excepciones))
+
+    @classmethod
+    def desde_regla(cls, regla, desde, hasta=None, excepciones=()):
+        """
+        Construye la recurrencia a partir de una regla de texto como
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;UNTIL=20260619" (admite también
+        COUNT). `hasta` se usa si la regla no indica UNTIL ni COUNT.
+        """
+        partes = {}
+        for parte in filter(None, regla.upper().removeprefix('RRULE:').split(';')):
+            clave, separador, valor = parte.partition('=')
+            if not separador:
+                raise _regla_invalida(_("Parte de la regla no válida: %(parte)s."), parte=parte)
+            partes[clave.strip()] = valor.strip()
+
+        opciones = {'frecuencia': partes.pop('FREQ', 'WEEKLY'), 'hasta': hasta}
+        try:
+            if 'INTERVAL' in partes:
+                opciones['intervalo'] = int(partes.pop('INTERVAL'))
+            if 'COUNT' in partes:
+                opciones['repeticiones'] = int(partes.pop('COUNT'))
+                opciones['hasta'] = None
+            if 'UNTIL' in partes:
+                opciones['hasta'] = datetime.strptime(partes.pop('UNTIL')[:8], '%Y%m%d').date()
+            if 'BYDAY' in partes:
+                opciones['dias_semana'] = tuple(DIAS_SEMANA[dia.strip()] for dia in partes.pop('BYDAY').split(','))
+        except (KeyError, ValueError):
+            raise _regla_invalida(_("Regla de recurrencia no válida: %(regla)s."), regla=regla) from None
+        if partes:
+            raise _regla_invalida(_("Partes de la regla no soportadas: %(partes)s."), partes=', '.join(partes))
+        return cls(desde=desde, excepciones=frozenset(excepciones), **opciones)
+
+    def _candidatas(self):
+        if self.frecuencia == 'DAILY':
+            paso, fecha = timedelta(days=self.intervalo), self.desde
+            while True:
+                yield fecha
+                fecha += paso
+        dias = self.dias_semana or (self.desde.weekday(),)
+        semana = self.desde - timedelta(days=self.desde.weekday())
+        while True:
+            for dia in dias:
+                fecha = semana + timedelta(days=dia)
+                if fecha >= self.desde:
+                    yield fecha
+            semana += timedelta(weeks=self.intervalo)
+
+    def fechas(self):
+        """
+        Fechas de la recurrencia en orden.
+        """
+        for indice, fecha in enumerate(self._candidatas()):
+            if self.repeticiones is not None and indice >= self.repeticiones:
+                return
+            if self.hasta is not None and fecha > self.hasta:
+                return
+            if fecha not in self.excepciones:
+                yield fecha
+
+
+@dataclass
+class Horario:
+    """
+    Franja recurrente de una clase. Sin `hora_fin` se usa la duración de la
+    clase; `capacidad_maxima` y `precio_especial` pasan a cada sesión.
+    """
+    clase: object
+    instructor: object
+    hora_inicio: time
+    ubicacion: str
+    recurrencia: Recurrencia
+    hora_fin: time = None
+    capacidad_maxima: int = None
+    precio_especial: object = None
+    notas: str = ''
+
+    def __post_init__(self):
+        if self.hora_fin is None:
+            fin = datetime.combine(date.min, self.hora_inicio) + timedelta(minutes=self.clase.duracion_minutos)
+            if fin.date() != date.min:
+                raise ValidationError(_("La sesión no puede terminar al día siguiente."), code='hora_fin')
+            self.hora_fin = fin.time()
+        if self.hora_fin <= self.hora_inicio:
+            raise ValidationError(_("La hora de fin debe ser posterior a la de inicio."), code='hora_fin')
+
+    def sesiones(self, festivos=frozenset()):
+        """
+        Sesiones sin guardar de la recurrencia, saltando los festivos.
+        """
+        for fecha in self.recurrencia.fechas():
+            if fecha in festivos:
+                continue
+            yield SesionClase(
+                clase_id=self.clase.pk,
+                instructor_id=self.instructor.pk,
+                fecha=fecha,
+                hora_inicio=self.hora_inicio,
+                hora_fin=self.hora_fin,
+                ubicacion=self.ubicacion,
+                capacidad_maxima=self.capacidad_maxima,
+                precio_especial=self.precio_especial,
+                notas=self.notas,
+            )
+
+
+@dataclass(frozen=True)
+class Conflicto:
+    """
+    Solape de una sesión nueva con otra (existente o del mismo lote) que
+    comparte instructor o ubicación.
+    """
+    recurso: str
+    valor: object
+    nueva: SesionClase
+    otra: SesionClase
+
+    def __str__(self):
+        otra = 'existente' if self.otra.pk else 'nueva'
+        return (f"{self.recurso} {self.valor}: {self.nueva.fecha} "
+                f"{self.nueva.hora_inicio:%H:%M}-{self.nueva.hora_fin:%H:%M} (clase {self.nueva.clase_id}) "
+                f"se solapa con {self.otra.hora_inicio:%H:%M}-{self.otra.hora_fin:%H:%M} "
+                f"(clase {self.otra.clase_id}, {otra})")
+
+
+@dataclass
+class ResultadoProgramacion:
+    sesiones: list = field(default_factory=list)
+    conflictos: list = field(default_factory=list)
+    duplicadas: int = 0
+    omitidas: int = 0
+
+
+def _existentes(sesiones, using=None):
+    """
+    Sesiones guardadas (también canceladas) del periodo del lote que
+    comparten clase, instructor o ubicación con alguna de `sesiones`, en una
+    sola consulta. Las de la misma clase son las que detectan duplicados.
+    """
+    clases = {sesion.clase_id for sesion in sesiones}
+    instructores = {sesion.instructor_id for sesion in sesiones}
+    ubicaciones = {sesion.ubicacion for sesion in sesiones if sesion.ubicacion.strip()}
+    return list(SesionClase.objects.using(using)
+                .filter(fecha__range=(min(sesion.fecha for sesion in sesiones),
+                                      max(sesion.fecha for sesion in sesiones)))
+                .filter(Q(clase_id__in=clases) | Q(instructor_id__in=instructores) | Q(ubicacion__in=ubicaciones))
+                .only('clase', 'instructor', 'fecha', 'hora_inicio', 'hora_fin', 'ubicacion', 'cancelada'))
+
+
+def detectar_conflictos(nuevas, existentes):
+    """
+    Solapes de las sesiones nuevas entre sí y con las existentes no
+    canceladas, por instructor y por ubicación.
+
+    Cada sesión aporta una franja por recurso; todas se ordenan por (recurso,
+    inicio) y se recorren una vez manteniendo en un montículo las franjas
+    abiertas del recurso actual, ordenadas por fin. Una franja que empieza
+    se solapa con todas las que siguen abiertas. Dos sesiones consecutivas
+    (una termina cuando empieza la otra) no se solapan. Si las dos sesiones
+    del conflicto son nuevas, `nueva` es la que empieza después.
+    """
+    franjas = []
+    for es_nueva, sesiones in ((True, nuevas), (False, existentes)):
+        for sesion in sesiones:
+            if sesion.cancelada:
+                continue
+            inicio = datetime.combine(sesion.fecha, sesion.hora_inicio)
+            fin = datetime.combine(sesion.fecha, sesion.hora_fin)
+            franjas.append((('instructor', sesion.instructor_id), inicio, fin, es_nueva, sesion))
+            if sesion.ubicacion.strip():
+                franjas.append((('ubicacion', sesion.ubicacion), inicio, fin, es_nueva, sesion))
+    franjas.sort(key=lambda franja: (franja[0], franja[1], franja[2]))
+
+    conflictos = []
+    recurso_actual, abiertas = None, []
+    for orden, (recurso, inicio, fin, es_nueva, sesion) in enumerate(franjas):
+        if recurso != recurso_actual:
+            recurso_actual, abiertas = recurso, []
+        while abiertas and abiertas[0][0] <= inicio:
+            heapq.heappop(abiertas)
+        for _fin, _orden, otra_nueva, otra in abiertas:
+            if es_nueva or otra_nueva:
+                nueva, otra = (sesion, otra) if es_nueva else (otra, sesion)
+                valor = nueva.instructor_id if recurso[0] == 'instructor' else nueva.ubicacion
+                conflictos.append(Conflicto(recurso[0], valor, nueva, otra))
+        heapq.heappush(abiertas, (fin, orden, es_nueva, sesion))
+    return conflictos
+
+
+def _error_conflictos(conflictos):
+    errores = [ValidationError(_("Conflicto de horario: %(conflicto)s"), code='conflicto_horario',
+                               params={'conflicto': str(conflicto)})
+               for conflicto in conflictos[:MAX_CONFLICTOS_ERROR]]
+    if len(conflictos) > MAX_CONFLICTOS_ERROR:
+        errores.append(ValidationError(_("%(restantes)d conflictos más."), code='conflicto_horario',
+                                       params={'restantes': len(conflictos) - MAX_CONFLICTOS_ERROR}))
+    return ValidationError(errores)
+
+
+def generar_sesiones(horarios, festivos=(), omitir_conflictos=False, simular=False, lote=LOTE, using=None):
+    """
+    Expande los horarios en sesiones y las crea con bulk_create.
+
+    Las sesiones que ya existen (misma clase, fecha y hora, aunque estén
+    canceladas) no se vuelven a crear, así que el proceso puede repetirse
+    sobre un periodo ya programado. Si hay solapes de instructor o ubicación
+    se lanza ValidationError (code 'conflicto_horario') sin crear nada, salvo
+    con `omitir_conflictos`, que descarta las sesiones que se solapan con una
+    existente o con otra del lote que empieza antes, y crea el resto. Con
+    `simular` solo se calcula el resultado.
+    """
+    festivos = frozenset(festivos)
+    nuevas = [sesion for horario in horarios for sesion in horario.sesiones(festivos)]
+    resultado = ResultadoProgramacion()
+    if not nuevas:
+        return resultado
+
+    existentes = _existentes(nuevas, using)
+    programadas = {(sesion.clase_id, sesion.fecha, sesion.hora_inicio) for sesion in existentes}
+    pendientes = []
+    for sesion in nuevas:
+        clave = (sesion.clase_id, sesion.fecha, sesion.hora_inicio)
+        if clave in programadas:
+            resultado.duplicadas += 1
+        else:
+            programadas.add(clave)
+            pendientes.append(sesion)
+
+    resultado.conflictos = detectar_conflictos(pendientes, existentes)
+    if resultado.conflictos:
+        if not omitir_conflictos:
+            raise _error_conflictos(resultado.conflictos)
+        en_conflicto = {id(conflicto.nueva) for conflicto in resultado.conflictos}
+        resultado.omitidas = len(en_conflicto)
+        pendientes = [sesion for sesion in pendientes if id(sesion) not in en_conflicto]
+
+    if simular:
+        resultado.sesiones = pendientes
+        return resultado
+    with transaction.atomic(using=using):
+        resultado.sesiones = SesionClase.objects.using(using).bulk_create(pendientes, batch_size=lote)
+    return resultado
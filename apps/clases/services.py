@@ -0,0 +1,177 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.clases.models import SesionClase, InscripcionClase, ListaEsperaClase
+from apps.socios.models import Suscripcion
+from apps.socios.membresia import estado_membresia, estados_membresia
+
+
+def suscripcion_activa(socio):
+    """
+    Devuelve la suscripción activa del socio (con su tipo) o None.
+    Para comprobar descuentos y límites basta con estado_membresia().
+    """
+    return (Suscripcion.objects
+            .vigentes()
+            .select_related('tipo')
+            .filter(socio=socio)
+            .order_by('-fecha_inicio')
+            .first())
+
+
+def _bloquear_sesion(sesion_id):
+    """
+    Bloquea la fila de la sesión hasta el final de la transacción, serializando
+    las inscripciones concurrentes a la misma sesión.
+    """
+    return (SesionClase.objects
+            .select_for_update(of=('self',))
+            .select_related('clase')
+            .get(pk=sesion_id))
+
+
+def _ocupadas(sesion):
+    return InscripcionClase.objects.filter(sesion=sesion, cancelada=False).count()
+
+
+def _precio(sesion, membresia):
+    precio = sesion.precio_final
+    if membresia.descuento_clases:
+        precio = precio * (1 - membresia.descuento_clases / Decimal(100))
+    return precio.quantize(Decimal('0.01'))
+
+
+def _crear_inscripcion(socio_id, sesion, membresia):
+    """
+    Crea la inscripción o reactiva una cancelada previamente, ya que
+    (socio, sesion) es único.
+    """
+    precio = _precio(sesion, membresia)
+    inscripcion = InscripcionClase.all_with_deleted.filter(socio_id=socio_id, sesion=sesion).first()
+    if inscripcion is None:
+        return InscripcionClase.objects.create(socio_id=socio_id, sesion=sesion, precio_pagado=precio)
+    
+    inscripcion.cancelada = False
+    inscripcion.fecha_cancelacion = None
+    inscripcion.motivo_cancelacion = ""
+    inscripcion.reembolsado = False
+    inscripcion.is_active = True
+    inscripcion.deleted_at = None
+    inscripcion.precio_pagado = precio
+    inscripcion.save()
+    return inscripcion
+
+
+def _validar_limite_reservas(socio, membresia):
+    if not membresia.activa:
+        return
+    reservas = InscripcionClase.objects.filter(
+        socio=socio, cancelada=False, sesion__fecha__gte=timezone.now().date()
+    ).count()
+    if reservas >= membresia.max_reservas_clases:
+        raise ValidationError(
+            _("Se ha alcanzado el máximo de %(max)d reservas de clases de la suscripción."),
+            code='limite_reservas', params={'max': membresia.max_reservas_clases},
+        )
+
+
+def inscribir(socio, sesion, lista_espera=True):
+    """
+    Inscribe al socio en la sesión respetando su capacidad y el máximo de
+    reservas de la suscripción del socio.
+
+    La fila del socio y la de la sesión se bloquean (siempre en ese orden)
+    antes de contar plazas, por lo que dos peticiones simultáneas por la
+    última plaza no pueden completarse ambas. Si la sesión está completa y
+    `lista_espera` es True se devuelve la entrada en la lista de espera;
+    en otro caso se lanza ValidationError.
+    """
+    with transaction.atomic():
+        list(get_user_model().objects.select_for_update().filter(pk=socio.pk).values_list('pk'))
+        sesion = _bloquear_sesion(sesion.pk)
+        
+        if sesion.cancelada:
+            raise ValidationError(_("La sesión está cancelada."), code='sesion_cancelada')
+        if InscripcionClase.objects.filter(socio=socio, sesion=sesion, cancelada=False).exists():
+            raise ValidationError(_("El socio ya está inscrito en esta sesión."), code='ya_inscrito')
+        
+        membresia = estado_membresia(socio.pk)
+        if not membresia.activa and sesion.clase.solo_socios:
+            raise ValidationError(_("La clase es solo para socios con suscripción activa."),
+                                  code='solo_socios')
+        _validar_limite_reservas(socio, membresia)
+        
+        if _ocupadas(sesion) < sesion.capacidad_final:
+            inscripcion = _crear_inscripcion(socio.pk, sesion, membresia)
+            # Si estaba en la lista de espera (p. ej. tras ampliar la capacidad) deja de estarlo
+            ListaEsperaClase.objects.filter(socio=socio, sesion=sesion, atendida=False).update(
+                atendida=True, inscripcion=inscripcion, updated_at=timezone.now()
+            )
+            return inscripcion
+        
+        if not lista_espera:
+            raise ValidationError(_("La sesión está completa."), code='sesion_completa')
+        
+        espera, _creada = ListaEsperaClase.all_with_deleted.update_or_create(
+            socio=socio, sesion=sesion,
+            defaults={'atendida': False, 'inscripcion': None, 'is_active': True, 'deleted_at': None},
+        )
+        return espera
+
+
+def promover_lista_espera(sesion_id):
+    """
+    Inscribe por orden de llegada a los socios en espera mientras queden plazas,
+    saltando a quienes hayan alcanzado su máximo de reservas o ya estén
+    inscritos. Devuelve las inscripciones creadas.
+
+    Como en inscribir(), se bloquean primero las filas de los socios en
+    espera (por orden de pk) y después la de la sesión, de modo que una
+    inscripción simultánea del mismo socio en otra sesión no le hace
+    superar su máximo de reservas. Quienes se apunten a la lista después
+    del bloqueo esperan a la siguiente promoción.
+    """
+    inscripciones = []
+    with transaction.atomic():
+        socios = set(ListaEsperaClase.objects
+                     .filter(sesion_id=sesion_id, atendida=False)
+                     .values_list('socio_id', flat=True))
+        list(get_user_model().objects.select_for_update().filter(pk__in=socios).order_by('pk').values_list('pk'))
+        sesion = _bloquear_sesion(sesion_id)
+        if sesion.cancelada:
+            return inscripciones
+        
+        plazas = sesion.capacidad_final - _ocupadas(sesion)
+        if plazas <= 0:
+            return inscripciones
+        
+        pendientes = (ListaEsperaClase.objects
+                      .select_for_update()
+                      .filter(sesion=sesion, atendida=False, socio_id__in=socios)
+                      .exclude(Exists(InscripcionClase.objects.filter(
+                          socio_id=OuterRef('socio_id'), sesion=sesion, cancelada=False)))
+                      .order_by('fecha_solicitud', 'id'))
+        pendientes = list(pendientes)
+        membresias = estados_membresia({espera.socio_id for espera in pendientes})
+        for espera in pendientes:
+            membresia = membresias[espera.socio_id]
+            try:
+                _validar_limite_reservas(espera.socio_id, membresia)
+            except ValidationError:
+                # Se mantiene en espera hasta que libere alguna de sus reservas
+                continue
+            inscripcion = _crear_inscripcion(espera.socio_id, sesion, membresia)
+            espera.atendida = True
+            espera.inscripcion = inscripcion
+            espera.save(update_fields=['atendida', 'inscripcion', 'updated_at'])
+            inscripciones.append(inscripcion)
+            plazas -= 1
+            if plazas == 0:
+                break
+    return inscripciones
@@ -0,0 +1,154 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase, TransactionTestCase
+
+from apps.clases.models import (CategoriaClase, Clase, InscripcionClase, Instructor, ListaEsperaClase, NivelClase,
+                                SesionClase, ValoracionClase)
+from apps.clases.programacion import Horario, Recurrencia, generar_sesiones
+from apps.clases.services import inscribir, promover_lista_espera
+from apps.common.utils import en_hilos
+from apps.socios.models import Usuario
+
+
+class DatosClasesMixin:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clase = Clase.objects.create(
+            nombre="Yoga", descripcion="", precio=Decimal('8'), capacidad_maxima=2, solo_socios=False,
+            categoria=CategoriaClase.objects.create(nombre="Bienestar", slug="bienestar"),
+            nivel=NivelClase.objects.create(nombre="Inicial"),
+        )
+        cls.instructor = cls.crear_instructor("ana")
+        cls.suplente = cls.crear_instructor("luis")
+
+    @classmethod
+    def crear_instructor(cls, username):
+        return Instructor.objects.create(usuario=Usuario.objects.create(username=username),
+                                         biografia="", especialidades="")
+
+
+class GenerarSesionesTests(DatosClasesMixin, TestCase):
+
+    def horario(self, instructor, ubicacion):
+        recurrencia = Recurrencia.desde_regla('FREQ=WEEKLY;BYDAY=MO', desde=date(2030, 1, 7),
+                                              hasta=date(2030, 1, 28))
+        return Horario(self.clase, instructor, time(18), ubicacion, recurrencia)
+
+    def test_repetir_no_duplica(self):
+        self.assertEqual(len(generar_sesiones([self.horario(self.instructor, "Sala 1")]).sesiones), 4)
+
+        resultado = generar_sesiones([self.horario(self.instructor, "Sala 1")])
+
+        self.assertEqual((len(resultado.sesiones), resultado.duplicadas), (0, 4))
+        self.assertEqual(SesionClase.objects.filter(clase=self.clase).count(), 4)
+
+    def test_duplicada_con_otro_instructor_y_sala(self):
+        generar_sesiones([self.horario(self.instructor, "Sala 1")])
+
+        resultado = generar_sesiones([self.horario(self.suplente, "Sala 2")])
+
+        self.assertEqual((len(resultado.sesiones), resultado.duplicadas), (0, 4))
+        self.assertEqual(SesionClase.objects.filter(clase=self.clase).count(), 4)
+
+
+class ListaEsperaTests(DatosClasesMixin, TestCase):
+
+    def setUp(self):
+        self.sesion = SesionClase.objects.create(clase=self.clase, instructor=self.instructor, fecha=date(2030, 1, 7),
+                                                 hora_inicio=time(18), hora_fin=time(19), ubicacion="Sala 1")
+        self.socios = [Usuario.objects.create(username=f"socio{numero}") for numero in range(4)]
+
+    def test_ultima_plaza(self):
+        inscribir(self.socios[0], self.sesion)
+
+        primero = inscribir(self.socios[1], self.sesion)
+        segundo = inscribir(self.socios[2], self.sesion)
+
+        self.assertIsInstance(primero, InscripcionClase)
+        self.assertIsInstance(segundo, ListaEsperaClase)
+        self.assertEqual(InscripcionClase.objects.filter(sesion=self.sesion, cancelada=False).count(), 2)
+
+    def test_promocion_desde_la_lista_de_espera(self):
+        for socio in self.socios:
+            inscribir(socio, self.sesion)
+        InscripcionClase.objects.filter(sesion=self.sesion, socio=self.socios[0]).update(cancelada=True)
+
+        promovidas = promover_lista_espera(self.sesion.pk)
+
+        self.assertEqual([inscripcion.socio_id for inscripcion in promovidas], [self.socios[2].pk])
+        self.assertTrue(ListaEsperaClase.objects.get(socio=self.socios[2]).atendida)
+        self.assertFalse(ListaEsperaClase.objects.get(socio=self.socios[3]).atendida)
+        self.assertEqual(promover_lista_espera(self.sesion.pk), [])
+
+    def test_inscrito_directamente_sale_de_la_lista_de_espera(self):
+        for socio in self.socios[:3]:
+            inscribir(socio, self.sesion)
+        # Al ampliar la capacidad el socio 2, que estaba en espera, se inscribe directamente
+        SesionClase.objects.filter(pk=self.sesion.pk).update(capacidad_maxima=3)
+        inscribir(self.socios[2], self.sesion)
+        inscribir(self.socios[3], self.sesion)
+        InscripcionClase.objects.filter(sesion=self.sesion, socio=self.socios[0]).update(cancelada=True)
+
+        promovidas = promover_lista_espera(self.sesion.pk)
+
+        self.assertEqual([inscripcion.socio_id for inscripcion in promovidas], [self.socios[3].pk])
+        self.assertTrue(ListaEsperaClase.objects.get(socio=self.socios[2]).atendida)
+        self.assertEqual(InscripcionClase.objects.filter(sesion=self.sesion, cancelada=False).count(), 3)
+
+    def test_promocion_salta_a_los_ya_inscritos(self):
+        SesionClase.objects.filter(pk=self.sesion.pk).update(capacidad_maxima=3)
+        # Entrada de espera que quedó sin atender aunque el socio ya está inscrito
+        ListaEsperaClase.objects.create(socio=self.socios[3], sesion=self.sesion)
+        InscripcionClase.objects.create(socio=self.socios[3], sesion=self.sesion, precio_pagado=Decimal('8'))
+        for socio in self.socios[:3]:
+            inscribir(socio, self.sesion)
+        InscripcionClase.objects.filter(sesion=self.sesion, socio=self.socios[0]).update(cancelada=True)
+
+        promovidas = promover_lista_espera(self.sesion.pk)
+
+        self.assertEqual([inscripcion.socio_id for inscripcion in promovidas], [self.socios[2].pk])
+
+
+class ValoracionAgregadosTests(DatosClasesMixin, TestCase):
+
+    def test_guardar_una_instancia_desactualizada(self):
+        valoracion = ValoracionClase.objects.create(socio=Usuario.objects.create(username="socio"), clase=self.clase,
+                                                    instructor=self.instructor, puntuacion=5)
+        antigua = ValoracionClase.objects.get(pk=valoracion.pk)
+        valoracion.puntuacion = 1
+        valoracion.save()
+
+        antigua.aprobado = False
+        antigua.save()
+
+        self.clase.refresh_from_db()
+        self.assertEqual((self.clase.suma_valoraciones, self.clase.num_valoraciones), (0, 0))
+        self.instructor.refresh_from_db()
+        self.assertEqual((self.instructor.suma_valoraciones, self.instructor.num_valoraciones), (0, 0))
+
+
+class InscripcionConcurrenteTests(DatosClasesMixin, TransactionTestCase):
+
+    def setUp(self):
+        self.setUpTestData()
+        self.sesion = SesionClase.objects.create(clase=self.clase, instructor=self.instructor, fecha=date(2030, 1, 7),
+                                                 hora_inicio=time(18), hora_fin=time(19), ubicacion="Sala 1")
+        self.socios = [Usuario.objects.create(username=f"socio{numero}") for numero in range(20)]
+
+    def test_ultima_plaza_en_paralelo(self):
+        def apuntar(socio):
+            try:
+                return type(inscribir(socio, self.sesion)).__name__
+            except ValidationError as error:
+                return error.code
+
+        resultados, _reintentos = en_hilos(apuntar, self.socios, 8)
+
+        inscritos = InscripcionClase.objects.filter(sesion=self.sesion, cancelada=False).count()
+        self.assertEqual(inscritos, self.clase.capacidad_maxima)
+        self.assertEqual(resultados.count('InscripcionClase'), inscritos)
+        self.assertEqual(ListaEsperaClase.objects.filter(sesion=self.sesion, atendida=False).count(),
+                         len(self.socios) - inscritos)
@@ -0,0 +1,122 @@
+"""
+Agregados de valoraciones de instructores y clases.
+
+Instructor y Clase guardan la suma y el número de valoraciones que cuentan
+(aprobadas y no eliminadas) junto con la calificación media. Cada cambio en
+una ValoracionClase aplica la diferencia con un UPDATE atómico sobre F(), sin
+recorrer las valoraciones:
+
+    aplicar_diferencias({('instructor', 3): (5, 1), ('clase', 7): (-2, 0)})
+
+Las escrituras masivas recalculan los agregados de las filas afectadas y
+recalcular() los recalcula todos con un UPDATE agrupado por modelo (comando
+reconciliar_valoraciones).
+"""
+from collections import defaultdict
+
+from django.db.models import Avg, Case, Count, DecimalField, F, FloatField, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThan
+
+DECIMALES = 2
+
+# Campos de ValoracionClase que apuntan a cada modelo agregado
+DESTINOS = ('instructor', 'clase')
+
+
+def _modelos():
+    from apps.clases.models import Clase, Instructor
+    return {'instructor': Instructor, 'clase': Clase}
+
+
+def _calificacion(suma, numero):
+    """
+    Media suma / numero redondeada, o NULL si no hay valoraciones.
+    """
+    return Case(
+        When(GreaterThan(numero, 0), then=Round(Cast(suma, FloatField()) / numero, DECIMALES)),
+        default=None,
+        output_field=DecimalField(max_digits=3, decimal_places=DECIMALES),
+    )
+
+
+def contribucion(valoracion):
+    """
+    Lo que aporta una valoración a los agregados: (clase_id, instructor_id,
+    puntuación), o None si no cuenta.
+    """
+    if not (valoracion.is_active and valoracion.aprobado):
+        return None
+    return (valoracion.clase_id, valoracion.instructor_id, valoracion.puntuacion)
+
+
+def diferencias(anterior, nueva):
+    """
+    Diferencias {(destino, pk): (suma, número)} entre dos contribuciones.
+    """
+    cambios = defaultdict(lambda: [0, 0])
+    for aporte, signo in ((anterior, -1), (nueva, 1)):
+        if aporte is None:
+            continue
+        clase_id, instructor_id, puntuacion = aporte
+        for destino, pk in (('clase', clase_id), ('instructor', instructor_id)):
+            if pk is not None:
+                cambios[(destino, pk)][0] += signo * puntuacion
+                cambios[(destino, pk)][1] += signo
+    return {clave: tuple(valores) for clave, valores in cambios.items() if valores != [0, 0]}
+
+
+def aplicar_diferencias(cambios):
+    """
+    Aplica las diferencias con un UPDATE por fila afectada. La calificación
+    se calcula en la misma sentencia a partir de los valores anteriores de la
+    fila, así que dos cambios concurrentes no se pisan.
+    """
+    modelos = _modelos()
+    for (destino, pk), (suma, numero) in sorted(cambios.items()):
+        nueva_suma = F('suma_valoraciones') + suma
+        nuevo_numero = F('num_valoraciones') + numero
+        modelos[destino].all_with_deleted.filter(pk=pk).update(
+            suma_valoraciones=nueva_suma,
+            num_valoraciones=nuevo_numero,
+            calificacion=_calificacion(nueva_suma, nuevo_numero),
+        )
+
+
+def _subconsulta(destino, agregado):
+    from apps.clases.models import ValoracionClase
+
+    valoraciones = (ValoracionClase.objects
+                    .filter(aprobado=True, **{destino: OuterRef('pk')})
+                    .order_by()
+                    .values(destino)
+                    .annotate(valor=agregado)
+                    .values('valor'))
+    return Subquery(valoraciones)
+
+
+def recalcular(destino, pks=None):
+    """
+    Recalcula desde las valoraciones los agregados de `destino` ('instructor'
+    o 'clase'), de todas las filas o solo de `pks`, en un único UPDATE con
+    subconsultas agrupadas. Devuelve el número de filas actualizadas.
+    """
+    queryset = _modelos()[destino].all_with_deleted.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(
+        suma_valoraciones=Coalesce(_subconsulta(destino, Sum('puntuacion')), 0),
+        num_valoraciones=Coalesce(_subconsulta(destino, Count('*')), 0),
+        calificacion=Round(_subconsulta(destino, Avg(Cast('puntuacion', FloatField()))), DECIMALES),
+    )
+
+
+def desviaciones(destino):
+    """
+    Filas de `destino` cuyos agregados guardados no coinciden con sus
+    valoraciones.
+    """
+    return (_modelos()[destino].all_with_deleted
+            .annotate(suma_real=Coalesce(_subconsulta(destino, Sum('puntuacion')), 0),
+                      num_real=Coalesce(_subconsulta(destino, Count('*')), 0))
+            .exclude(suma_valoraciones=F('suma_real'), num_valoraciones=F('num_real')))
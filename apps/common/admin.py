@@ -0,0 +1,145 @@
+"""
+Base de los ModelAdmin del proyecto.
+
+Los listados del admin deben hacer un número fijo de consultas por página:
+las columnas que dependen de otras tablas se resuelven con
+list_select_related o con anotaciones (BaseAdmin.anotaciones) en lugar de
+propiedades por fila, y las claves ajenas a tablas grandes se editan con
+raw_id_fields o autocomplete_fields en lugar de desplegables.
+
+En tablas grandes el total de filas se estima con el planificador de
+PostgreSQL (PaginadorEstimado) y no se calcula el total sin filtros
+(show_full_result_count = False).
+"""
+import json
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+
+def estimar_filas(queryset):
+    """
+    Filas que estima el planificador para el queryset, o None si el motor
+    no da estimaciones.
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with conexion.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador que usa la estimación del planificador como total cuando supera
+    ADMIN_CONTEO_EXACTO_MAXIMO filas, evitando un COUNT(*) sobre toda la
+    tabla en cada página. Por debajo del umbral cuenta con exactitud.
+    """
+
+    @cached_property
+    def count(self):
+        maximo = getattr(settings, 'ADMIN_CONTEO_EXACTO_MAXIMO', None)
+        if maximo is not None and hasattr(self.object_list, 'query'):
+            estimacion = estimar_filas(self.object_list)
+            if estimacion is not None and estimacion > maximo:
+                return estimacion
+        return super().count
+
+
+class FiltroEliminados(admin.SimpleListFilter):
+    """
+    Muestra por defecto solo los registros activos de los modelos con
+    borrado lógico.
+    """
+    title = _("Eliminados")
+    parameter_name = 'eliminados'
+
+    def lookups(self, request, model_admin):
+        return [('si', _("Solo eliminados")), ('todos', _("Todos"))]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'si':
+            return queryset.filter(is_active=False)
+        if self.value() == 'todos':
+            return queryset
+        return queryset.filter(is_active=True)
+
+
+class BaseAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin base. Las columnas calculadas del listado se declaran como
+    anotaciones del queryset: `metodos_queryset` con métodos del queryset del
+    modelo que anotan (p. ej. 'with_availability') y `anotaciones` con
+    expresiones {nombre: expresión}.
+    """
+    show_full_result_count = False
+    paginator = PaginadorEstimado
+    list_per_page = 50
+    metodos_queryset = ()
+    anotaciones = {}
+
+    def queryset_base(self, request):
+        return super().get_queryset(request)
+
+    def get_queryset(self, request):
+        queryset = self.queryset_base(request)
+        for metodo in self.metodos_queryset:
+            queryset = getattr(queryset, metodo)()
+        if self.anotaciones:
+            queryset = queryset.annotate(**self.anotaciones)
+        return queryset
+
+
+class BorradoLogicoAdmin(BaseAdmin):
+    """
+    ModelAdmin de modelos con borrado lógico: lista también los eliminados
+    (filtro "Eliminados") y permite restaurarlos. Borrar desde el admin
+    marca los registros como eliminados.
+    """
+    actions = ['restaurar']
+
+    def queryset_base(self, request):
+        queryset = self.model.all_with_deleted.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_list_filter(self, request):
+        return [FiltroEliminados, *super().get_list_filter(request)]
+
+    def get_readonly_fields(self, request, obj=None):
+        return [*super().get_readonly_fields(request, obj), 'created_at', 'updated_at', 'deleted_at']
+
+    @admin.action(description=_("Restaurar los elementos eliminados seleccionados"))
+    def restaurar(self, request, queryset):
+        filas = queryset.filter(is_active=False).restore()
+        self.message_user(request, _("%(filas)d elementos restaurados.") % {'filas': filas}, messages.SUCCESS)
+
+
+class CatalogoAdmin(BorradoLogicoAdmin):
+    """
+    Tablas de catálogo (estados, tipos, métodos de pago...).
+    """
+    list_display = ('nombre',)
+    search_fields = ('nombre',)
+
+
+class ArbolAdmin(BorradoLogicoAdmin):
+    """
+    Modelos jerárquicos (ArbolModel), listados en orden de árbol.
+    """
+    list_display = ('nombre', 'parent', 'profundidad', 'slug')
+    list_select_related = ('parent',)
+    search_fields = ('nombre', 'slug')
+    ordering = ('ruta',)
+    prepopulated_fields = {'slug': ('nombre',)}
@@ -0,0 +1,209 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Func, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+
+from apps.common.cache import invalidar_al_confirmar, puede_cachear
+from apps.common.models import SoftDeleteManager, SoftDeleteQuerySet
+
+SEPARADOR = '/'
+
+
+def _clave_arbol(model):
+    return f"arbol:{model._meta.label_lower}"
+
+
+def _invalidar_arbol(sender, **kwargs):
+    clave = _clave_arbol(sender)
+    invalidar_al_confirmar(clave, lambda: cache.delete(clave))
+
+
+class ArbolQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet para modelos con ruta materializada (ArbolModel). Invalida el
+    árbol cacheado en las escrituras masivas, que no disparan señales.
+    """
+
+    def update(self, **kwargs):
+        filas = super().update(**kwargs)
+        _invalidar_arbol(self.model)
+        return filas
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        _invalidar_arbol(self.model)
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        filas = super().bulk_update(*args, **kwargs)
+        _invalidar_arbol(self.model)
+        return filas
+
+    def subarbol(self, nodo):
+        """
+        El nodo y todos sus descendientes.
+        """
+        return self.filter(ruta__startswith=nodo.ruta)
+
+    def con_total_subarbol(self, modelo, campo='categoria', nombre='total_subarbol'):
+        """
+        Anota en cada nodo el número de filas de `modelo` cuyo `campo` apunta
+        al nodo o a cualquiera de sus descendientes.
+        """
+        totales = (modelo.objects
+                   .filter(**{f'{campo}__ruta__startswith': OuterRef('ruta')})
+                   .order_by()
+                   .annotate(total=Func(F('pk'), function='COUNT', output_field=IntegerField()))
+                   .values('total'))
+        return self.annotate(**{nombre: Coalesce(Subquery(totales), Value(0))})
+
+
+class ArbolManager(SoftDeleteManager.from_queryset(ArbolQuerySet)):
+    """
+    Manager de modelos jerárquicos con el árbol completo cacheado.
+    """
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if cls._meta.abstract:
+            return
+        uid = f"arbol_cache:{cls._meta.label_lower}"
+        post_save.connect(_invalidar_arbol, sender=cls, dispatch_uid=uid)
+        post_delete.connect(_invalidar_arbol, sender=cls, dispatch_uid=uid)
+
+    def arbol(self):
+        """
+        Árbol completo de nodos activos para menús, como lista de diccionarios
+        con sus `hijos`. Se guarda en la cache de Django hasta el siguiente
+        cambio en el modelo, salvo dentro de una transacción que aún no ha
+        confirmado cambios en él.
+        """
+        clave = _clave_arbol(self.model)
+        if not puede_cachear(clave):
+            return self._construir_arbol()
+        arbol = cache.get(clave)
+        if arbol is None:
+            arbol = self._construir_arbol()
+            cache.set(clave, arbol, timeout=None)
+        return arbol
+
+    def _construir_arbol(self):
+        nodos = {}
+        raices = []
+        filas = (self.get_queryset()
+                 .order_by('profundidad', 'nombre')
+                 .values('id', 'nombre', 'slug', 'icono', 'parent_id', 'ruta', 'profundidad'))
+        for fila in filas:
+            nodo = {**fila, 'hijos': []}
+            nodos[fila['id']] = nodo
+            padre = nodos.get(fila['parent_id'])
+            # Los hijos de un nodo eliminado lógicamente no se muestran
+            if padre is not None:
+                padre['hijos'].append(nodo)
+            elif fila['parent_id'] is None:
+                raices.append(nodo)
+        return raices
+
+    def reconstruir_arbol(self):
+        """
+        Recalcula ruta y profundidad de todos los nodos (incluidos los
+        eliminados) a partir de `parent`. Necesario tras cargas masivas con
+        bulk_create o update(), que no pasan por save().
+        """
+        model = self.model
+        padres = dict(model._base_manager.values_list('pk', 'parent_id'))
+        rutas = {}
+
+        def ruta(pk, visitados=()):
+            if pk not in rutas:
+                if pk in visitados:
+                    raise ValidationError(_("La jerarquía de %(modelo)s contiene un ciclo."),
+                                          code='ciclo', params={'modelo': model._meta.verbose_name_plural})
+                padre = padres[pk]
+                prefijo = ruta(padre, visitados + (pk,)) if padre is not None else SEPARADOR
+                rutas[pk] = f"{prefijo}{pk}{SEPARADOR}"
+            return rutas[pk]
+
+        nodos = []
+        for nodo in model._base_manager.only('pk', 'ruta', 'profundidad'):
+            nueva = ruta(nodo.pk)
+            profundidad = nueva.count(SEPARADOR) - 2
+            if (nodo.ruta, nodo.profundidad) != (nueva, profundidad):
+                nodo.ruta, nodo.profundidad = nueva, profundidad
+                nodos.append(nodo)
+        model.all_with_deleted.bulk_update(nodos, ['ruta', 'profundidad'], batch_size=500)
+        return len(nodos)
+
+
+class ArbolModel(models.Model):
+    """
+    Modelo abstracto para jerarquías con un campo `parent` a sí mismo.
+
+    Mantiene una ruta materializada ("/1/4/9/") y la profundidad al guardar o
+    mover un nodo, de modo que subárbol, migas de pan y totales por subárbol
+    se resuelven con una única consulta.
+    """
+    ruta = models.CharField(_("Ruta"), max_length=255, blank=True, editable=False)
+    profundidad = models.PositiveSmallIntegerField(_("Profundidad"), default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self.ruta:
+            padre = type(self)._base_manager.filter(pk=self.parent_id).values_list('ruta', flat=True).first()
+            if padre and padre.startswith(self.ruta):
+                raise ValidationError({'parent': _("Una categoría no puede moverse dentro de sí misma.")})
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._actualizar_ruta()
+
+    def _actualizar_ruta(self):
+        model = type(self)
+        prefijo = SEPARADOR
+        if self.parent_id:
+            prefijo = model._base_manager.filter(pk=self.parent_id).values_list('ruta', flat=True).get()
+        nueva = f"{prefijo}{self.pk}{SEPARADOR}"
+        anterior = self.ruta
+        if nueva == anterior:
+            return
+        if anterior and prefijo.startswith(anterior):
+            raise ValidationError({'parent': _("Una categoría no puede moverse dentro de sí misma.")})
+
+        profundidad = nueva.count(SEPARADOR) - 2
+        model.all_with_deleted.filter(pk=self.pk).update(ruta=nueva, profundidad=profundidad)
+        if anterior:
+            # Mueve el subárbol completo sustituyendo el prefijo de la ruta
+            (model.all_with_deleted
+             .filter(ruta__startswith=anterior)
+             .exclude(pk=self.pk)
+             .update(ruta=Concat(Value(nueva), Substr('ruta', len(anterior) + 1),
+                                 output_field=models.CharField()),
+                     profundidad=F('profundidad') + (profundidad - self.profundidad)))
+        self.ruta, self.profundidad = nueva, profundidad
+
+    @property
+    def ids_ancestros(self):
+        return [int(pk) for pk in self.ruta.strip(SEPARADOR).split(SEPARADOR) if pk][:-1]
+
+    def ancestros(self):
+        """
+        Ancestros del nodo desde la raíz.
+        """
+        return type(self).objects.filter(pk__in=self.ids_ancestros).order_by('profundidad')
+
+    def migas(self):
+        """
+        Migas de pan: ancestros y el propio nodo, en una consulta.
+        """
+        return type(self).objects.filter(pk__in=self.ids_ancestros + [self.pk]).order_by('profundidad')
+
+    def descendientes(self, incluir_propio=False):
+        queryset = type(self).objects.subarbol(self)
+        return queryset if incluir_propio else queryset.exclude(pk=self.pk)
@@ -0,0 +1,334 @@
+import re
+from dataclasses import dataclass, field
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Subquery, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+# Pesos de bm25 en SQLite equivalentes a los pesos A-D de PostgreSQL
+PESOS_BM25 = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+
+class IndiceBusqueda:
+    """
+    Índice de texto completo de un modelo.
+
+    En PostgreSQL se guarda un tsvector con pesos en el campo `busqueda` del
+    modelo (indexado con GIN por `indexar_busqueda`); en SQLite se usa una
+    tabla virtual FTS5 "<tabla>_fts" creada bajo demanda. En ambos casos el
+    índice se actualiza al guardar o borrar cada fila.
+
+    Se declara en el cuerpo del modelo:
+
+        indice_busqueda = IndiceBusqueda({'nombre': 'A', 'descripcion': 'B'})
+    """
+
+    def __init__(self, campos, config='spanish', campo_vector='busqueda'):
+        self.campos = campos
+        self.config = config
+        self.campo_vector = campo_vector
+        self._preparadas = set()
+
+    def contribute_to_class(self, cls, name):
+        self.model = cls
+        setattr(cls, name, self)
+        if cls._meta.abstract:
+            return
+        uid = f"indice_busqueda:{cls._meta.label_lower}"
+        post_save.connect(self._guardado, sender=cls, dispatch_uid=uid)
+        post_delete.connect(self._borrado, sender=cls, dispatch_uid=uid)
+
+    @property
+    def tabla(self):
+        return self.model._meta.db_table
+
+    @property
+    def tabla_fts(self):
+        return f"{self.tabla}_fts"
+
+    def _guardado(self, sender, instance, using, update_fields=None, **kwargs):
+        if update_fields is not None and not set(update_fields) & set(self.campos):
+            return
+        self.actualizar([instance.pk], using=using)
+
+    def _borrado(self, sender, instance, using, **kwargs):
+        conexion = connections[using]
+        if conexion.vendor == 'sqlite' and self._asegurar_sqlite(conexion):
+            with conexion.cursor() as cursor:
+                cursor.execute(f'DELETE FROM "{self.tabla_fts}" WHERE rowid = %s', [instance.pk])
+
+    def vector(self):
+        vector = None
+        for campo, peso in self.campos.items():
+            parcial = SearchVector(campo, weight=peso, config=self.config)
+            vector = parcial if vector is None else vector + parcial
+        return vector
+
+    def preparar(self, using='default'):
+        """
+        Crea las estructuras auxiliares del motor: el índice GIN en PostgreSQL
+        y la tabla FTS5 en SQLite. Es idempotente.
+        """
+        conexion = connections[using]
+        if conexion.vendor == 'postgresql':
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{self.tabla}_busqueda_gin" '
+                    f'ON "{self.tabla}" USING gin ("{self.campo_vector}")'
+                )
+        elif conexion.vendor == 'sqlite':
+            self._asegurar_sqlite(conexion, poblar=False)
+
+    def _asegurar_sqlite(self, conexion, poblar=True):
+        """
+        Crea la tabla FTS5 si no existe y, si se acaba de crear, la rellena.
+        """
+        if conexion.alias in self._preparadas:
+            return True
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.tabla_fts])
+            existe = cursor.fetchone() is not None
+            if not existe:
+                columnas = ', '.join(f'"{campo}"' for campo in self.campos)
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE "{self.tabla_fts}" USING fts5({columnas}, '
+                    f"tokenize = 'unicode61 remove_diacritics 2')"
+                )
+        # Una tabla creada dentro de una transacción desaparece si se revierte
+        transaction.on_commit(lambda: self._preparadas.add(conexion.alias), using=conexion.alias)
+        if not existe and poblar:
+            self.reindexar(using=conexion.alias)
+        return True
+
+    def actualizar(self, pks, using='default'):
+        """
+        Recalcula el índice de las filas indicadas.
+        """
+        conexion = connections[using]
+        if conexion.vendor == 'postgresql':
+            (self.model._base_manager.using(using)
+             .filter(pk__in=pks)
+             .update(**{self.campo_vector: self.vector()}))
+        elif conexion.vendor == 'sqlite':
+            self._asegurar_sqlite(conexion)
+            marcadores = ', '.join(['%s'] * len(pks))
+            columnas = ', '.join(f'"{campo}"' for campo in self.campos)
+            valores = ', '.join(f'COALESCE("{campo}", \'\')' for campo in self.campos)
+            with conexion.cursor() as cursor:
+                cursor.execute(f'DELETE FROM "{self.tabla_fts}" WHERE rowid IN ({marcadores})', list(pks))
+                cursor.execute(
+                    f'INSERT INTO "{self.tabla_fts}" (rowid, {columnas}) '
+                    f'SELECT "id", {valores} FROM "{self.tabla}" WHERE "id" IN ({marcadores})',
+                    list(pks),
+                )
+
+    def reindexar(self, using='default', lote=5000):
+        """
+        Recalcula el índice de toda la tabla por lotes. Devuelve las filas indexadas.
+        """
+        total = 0
+        ultimo = 0
+        queryset = self.model._base_manager.using(using).order_by('pk').values_list('pk', flat=True)
+        while True:
+            pks = list(queryset.filter(pk__gt=ultimo)[:lote])
+            if not pks:
+                return total
+            self.actualizar(pks, using=using)
+            total += len(pks)
+            ultimo = pks[-1]
+
+    def consulta_fts(self, texto):
+        # Cada palabra como prefijo entre comillas: evita la sintaxis de FTS5
+        # en la entrada del usuario y permite buscar mientras se escribe
+        return ' '.join(f'"{palabra}"*' for palabra in _PALABRA.findall(texto))
+
+    def filtrar(self, queryset, texto):
+        """
+        Filtra el queryset por el texto y anota `rango` (mayor es más relevante).
+        """
+        conexion = connections[queryset.db]
+        if conexion.vendor == 'postgresql':
+            consulta = SearchQuery(texto, config=self.config, search_type='websearch')
+            return (queryset
+                    .filter(**{self.campo_vector: consulta})
+                    .annotate(rango=SearchRank(F(self.campo_vector), consulta)))
+
+        if conexion.vendor == 'sqlite':
+            consulta = self.consulta_fts(texto)
+            if not consulta:
+                return queryset.none()
+            self._asegurar_sqlite(conexion)
+            pesos = ', '.join(str(PESOS_BM25[peso]) for peso in self.campos.values())
+            fts = self.tabla_fts
+            return (queryset
+                    .filter(pk__in=RawSQL(f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s', [consulta]))
+                    .annotate(rango=RawSQL(
+                        f'SELECT -bm25("{fts}", {pesos}) FROM "{fts}" '
+                        f'WHERE "{fts}" MATCH %s AND rowid = "{self.tabla}"."id"',
+                        [consulta], output_field=FloatField(),
+                    )))
+
+        # Otros motores: coincidencia simple sin ranking
+        condicion = Q()
+        for palabra in _PALABRA.findall(texto):
+            condicion &= Q(*[Q(**{f'{campo}__icontains': palabra}) for campo in self.campos], _connector=Q.OR)
+        return queryset.filter(condicion).annotate(rango=Value(0.0, output_field=FloatField()))
+
+
+class Faceta:
+    """
+    Faceta por los valores de un campo (clave ajena, campo simple o
+    ManyToMany). `etiqueta` es el campo con el texto a mostrar.
+    """
+
+    def __init__(self, nombre, campo, etiqueta=None):
+        self.nombre = nombre
+        self.campo = campo
+        self.etiqueta = etiqueta
+
+    def filtro(self, model, valores):
+        if model._meta.get_field(self.campo).many_to_many:
+            # Con un subconjunto se evitan filas duplicadas en los resultados
+            return Q(pk__in=Subquery(model._base_manager.filter(**{f'{self.campo}__in': valores}).values('pk')))
+        return Q(**{f'{self.campo}__in': valores})
+
+    def contar(self, queryset):
+        campos = [self.campo] + ([self.etiqueta] if self.etiqueta else [])
+        filas = (queryset.order_by()
+                 .values(*campos)
+                 .annotate(total=Count('pk', distinct=True))
+                 .order_by('-total'))
+        return [
+            {'valor': fila[self.campo], 'etiqueta': fila.get(self.etiqueta, fila[self.campo]), 'total': fila['total']}
+            for fila in filas if fila[self.campo] is not None
+        ]
+
+
+class FacetaArbol(Faceta):
+    """
+    Faceta sobre una clave ajena a un modelo ArbolModel: filtrar por un nodo
+    incluye su subárbol y cada nodo cuenta también los elementos de sus
+    descendientes.
+    """
+
+    def filtro(self, model, valores):
+        destino = model._meta.get_field(self.campo).related_model
+        condicion = Q()
+        for ruta in destino.objects.filter(pk__in=valores).values_list('ruta', flat=True):
+            condicion |= Q(**{f'{self.campo}__ruta__startswith': ruta})
+        return condicion if condicion else Q(pk__in=[])
+
+    def contar(self, queryset):
+        destino = queryset.model._meta.get_field(self.campo).related_model
+        nombres = {}
+        pendientes = list(destino.objects.arbol())
+        while pendientes:
+            nodo = pendientes.pop()
+            nombres[nodo['id']] = nodo
+            pendientes.extend(nodo['hijos'])
+
+        totales = {}
+        filas = queryset.order_by().values(f'{self.campo}__ruta').annotate(total=Count('pk', distinct=True))
+        for fila in filas:
+            ruta = fila[f'{self.campo}__ruta'] or ''
+            for pk in filter(None, ruta.split('/')):
+                totales[int(pk)] = totales.get(int(pk), 0) + fila['total']
+        return [
+            {'valor': pk, 'etiqueta': nombres[pk]['nombre'], 'profundidad': nombres[pk]['profundidad'],
+             'total': total}
+            for pk, total in sorted(totales.items(), key=lambda item: nombres.get(item[0], {}).get('ruta', ''))
+            if pk in nombres
+        ]
+
+
+class FacetaRangos(Faceta):
+    """
+    Faceta por bandas de un campo numérico. `limites` = [10, 25, 50] genera
+    las bandas "-10", "10-25", "25-50" y "50-".
+    """
+
+    def __init__(self, nombre, campo, limites):
+        super().__init__(nombre, campo)
+        extremos = [None] + list(limites) + [None]
+        self.bandas = [
+            (f"{desde if desde is not None else ''}-{hasta if hasta is not None else ''}", desde, hasta)
+            for desde, hasta in zip(extremos, extremos[1:])
+        ]
+
+    def _condicion(self, desde, hasta):
+        condicion = Q(**{f'{self.campo}__isnull': False})
+        if desde is not None:
+            condicion &= Q(**{f'{self.campo}__gte': desde})
+        if hasta is not None:
+            condicion &= Q(**{f'{self.campo}__lt': hasta})
+        return condicion
+
+    def filtro(self, model, valores):
+        condicion = Q()
+        for clave, desde, hasta in self.bandas:
+            if clave in valores:
+                condicion |= self._condicion(desde, hasta)
+        return condicion if condicion else Q(pk__in=[])
+
+    def contar(self, queryset):
+        banda = Case(*[When(self._condicion(desde, hasta), then=Value(clave)) for clave, desde, hasta in self.bandas])
+        totales = dict(queryset.order_by()
+                       .annotate(banda=banda)
+                       .values('banda')
+                       .annotate(total=Count('pk', distinct=True))
+                       .values_list('banda', 'total'))
+        return [{'valor': clave, 'etiqueta': clave, 'total': totales[clave]}
+                for clave, _desde, _hasta in self.bandas if totales.get(clave)]
+
+
+@dataclass
+class ResultadoBusqueda:
+    resultados: list
+    total: int
+    facetas: dict = field(default_factory=dict)
+    pagina: int = 1
+    por_pagina: int = 20
+
+
+class Buscador:
+    """
+    Búsqueda por texto con facetas. Cada faceta se cuenta sobre los resultados
+    filtrados por todas las demás facetas seleccionadas, de modo que el número
+    de consultas es fijo: página, total y una por faceta.
+    """
+
+    def __init__(self, queryset, facetas, ordenes):
+        self.queryset = queryset
+        self.facetas = facetas
+        self.ordenes = ordenes
+
+    def buscar(self, texto='', filtros=None, orden=None, pagina=1, por_pagina=20):
+        filtros = filtros or {}
+        base = self.queryset()
+        model = base.model
+        texto = (texto or '').strip()
+        if texto:
+            base = model.indice_busqueda.filtrar(base, texto)
+
+        condiciones = {
+            faceta.nombre: faceta.filtro(model, filtros[faceta.nombre])
+            for faceta in self.facetas if filtros.get(faceta.nombre)
+        }
+        resultados = base.filter(*condiciones.values())
+        orden = orden or ('relevancia' if texto else next(iter(self.ordenes)))
+        criterios = self.ordenes.get(orden, ()) if orden != 'relevancia' or texto else ()
+        if orden == 'relevancia' and texto:
+            criterios = ('-rango', 'pk')
+
+        inicio = (pagina - 1) * por_pagina
+        pagina_resultados = list(resultados.order_by(*criterios)[inicio:inicio + por_pagina])
+        total = resultados.count()
+
+        facetas = {}
+        for faceta in self.facetas:
+            otras = [condicion for nombre, condicion in condiciones.items() if nombre != faceta.nombre]
+            facetas[faceta.nombre] = faceta.contar(base.filter(*otras))
+        return ResultadoBusqueda(pagina_resultados, total, facetas, pagina, por_pagina)
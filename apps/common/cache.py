@@ -0,0 +1,200 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.common.models import SoftDeleteManager, SoftDeleteQuerySet
+
+
+class _Invalidacion:
+    """
+    Invalidación pendiente del commit de la transacción en curso.
+    """
+
+    def __init__(self, ambito, invalidar):
+        self.ambito = ambito
+        self.invalidar = invalidar
+
+    def __call__(self):
+        self.invalidar()
+
+
+def invalidar_al_confirmar(ambito, invalidar, using=DEFAULT_DB_ALIAS):
+    """
+    Ejecuta `invalidar` ahora y de nuevo al confirmar la transacción en curso,
+    ya que un lector concurrente puede cachear entretanto los datos anteriores.
+
+    Hasta el commit, puede_cachear(ambito) es falso dentro de la transacción:
+    lo que lea incluye cambios sin confirmar que un rollback desharía.
+    """
+    invalidar()
+    transaction.on_commit(_Invalidacion(ambito, invalidar), using=using)
+
+
+def puede_cachear(ambito, using=DEFAULT_DB_ALIAS):
+    """
+    Indica si los datos de `ambito` pueden leerse de la cache y guardarse en
+    ella: no, si la transacción en curso los ha modificado y aún no se ha
+    confirmado.
+    """
+    conexion = transaction.get_connection(using)
+    # Django descarta los callbacks de on_commit al revertir la transacción o
+    # el savepoint en que se registraron, así que solo quedan los vigentes
+    return not any(getattr(registro[1], 'ambito', None) == ambito for registro in conexion.run_on_commit)
+
+
+class CatalogoCache:
+    """
+    Cache en memoria de proceso para tablas de catálogo pequeñas
+    (estados, tipos...) que casi nunca cambian.
+
+    Se invalida localmente con las señales de guardado/borrado. Si
+    CATALOGOS_CACHE_COMPARTIDA está activo, cada invalidación incrementa una
+    versión en la cache de Django y el resto de procesos la comprueban como
+    mucho cada CATALOGOS_CACHE_INTERVALO segundos. Dentro de una transacción
+    que ha modificado el catálogo se lee siempre de la base de datos.
+
+    Las instancias devueltas son compartidas y no deben modificarse.
+    """
+
+    def __init__(self, model, campo='nombre'):
+        self.model = model
+        self.campo = campo
+        self._lock = threading.Lock()
+        self._datos = None
+        self._version = None
+        self._comprobado = 0
+        self._generacion = 0
+
+    @property
+    def clave_version(self):
+        return f"catalogo:{self.model._meta.label_lower}:version"
+
+    @staticmethod
+    def compartida():
+        return getattr(settings, 'CATALOGOS_CACHE_COMPARTIDA', False)
+
+    def _version_compartida(self):
+        return cache.get_or_set(self.clave_version, 1, timeout=None)
+
+    def _cargar(self):
+        # Se usa el manager base para incluir todas las filas y filtrar aquí.
+        # Se lee siempre de la base de datos principal: una réplica con retraso
+        # dejaría en la cache datos anteriores a la invalidación.
+        filas = list(self.model._base_manager.using('default').filter(is_active=True))
+        return {
+            'pk': {fila.pk: fila for fila in filas},
+            'campo': {getattr(fila, self.campo): fila for fila in filas},
+        }
+
+    def _obtener(self):
+        if not puede_cachear(self.clave_version):
+            return self._cargar()
+        datos = self._datos
+        if datos is not None and self.compartida():
+            ahora = time.monotonic()
+            if ahora - self._comprobado > getattr(settings, 'CATALOGOS_CACHE_INTERVALO', 5):
+                self._comprobado = ahora
+                if self._version_compartida() != self._version:
+                    datos = None
+        if datos is None:
+            with self._lock:
+                generacion = self._generacion
+                version = self._version_compartida() if self.compartida() else None
+                datos = self._cargar()
+                # Si se invalidó durante la carga no se guarda el resultado
+                if generacion == self._generacion:
+                    self._datos, self._version = datos, version
+                    self._comprobado = time.monotonic()
+        return datos
+
+    def por_pk(self, pk):
+        return self._obtener()['pk'].get(pk)
+
+    def por_nombre(self, valor):
+        return self._obtener()['campo'].get(valor)
+
+    def todos(self):
+        return list(self._obtener()['pk'].values())
+
+    def invalidar(self):
+        invalidar_al_confirmar(self.clave_version, self._invalidar)
+
+    def _invalidar(self):
+        self._generacion += 1
+        self._datos = None
+        if self.compartida():
+            try:
+                cache.incr(self.clave_version)
+            except ValueError:
+                cache.set(self.clave_version, 1, timeout=None)
+
+
+_caches = {}
+
+
+def cache_catalogo(model):
+    """
+    Devuelve la cache asociada a un modelo de catálogo.
+    """
+    return _caches[model._meta.label_lower]
+
+
+def _invalidar_catalogo(sender, **kwargs):
+    cache_catalogo(sender).invalidar()
+
+
+class CatalogoQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet que invalida la cache del catálogo en las escrituras masivas,
+    que no disparan señales.
+    """
+
+    def update(self, **kwargs):
+        filas = super().update(**kwargs)
+        cache_catalogo(self.model).invalidar()
+        return filas
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        cache_catalogo(self.model).invalidar()
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        filas = super().bulk_update(*args, **kwargs)
+        cache_catalogo(self.model).invalidar()
+        return filas
+
+
+class CatalogoManager(SoftDeleteManager.from_queryset(CatalogoQuerySet)):
+    """
+    Manager para tablas de catálogo con consultas cacheadas por pk y por nombre.
+    """
+
+    def __init__(self, campo='nombre'):
+        super().__init__()
+        self.campo = campo
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if cls._meta.abstract:
+            return
+        _caches[cls._meta.label_lower] = CatalogoCache(cls, self.campo)
+        uid = f"catalogo_cache:{cls._meta.label_lower}"
+        post_save.connect(_invalidar_catalogo, sender=cls, dispatch_uid=uid)
+        post_delete.connect(_invalidar_catalogo, sender=cls, dispatch_uid=uid)
+
+    def por_pk(self, pk):
+        return cache_catalogo(self.model).por_pk(pk)
+
+    def por_nombre(self, nombre):
+        return cache_catalogo(self.model).por_nombre(nombre)
+
+    def cacheados(self):
+        return cache_catalogo(self.model).todos()
+
+    def invalidar_cache(self):
+        cache_catalogo(self.model).invalidar()
@@ -0,0 +1,30 @@
+from django.db.models import Func, IntegerField
+
+
+class DiasEntre(Func):
+    """
+    Número entero de días entre dos expresiones de fecha (fin - inicio).
+
+    La resta de fechas de Django devuelve un intervalo, que en SQLite no se
+    puede convertir a días dentro de la consulta; esta función lo hace en
+    cada motor.
+    """
+    arity = 2
+    output_field = IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' - ',
+                              **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(%(expressions)s::date)',
+                              arg_joiner='::date - ', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='DATEDIFF(%(expressions)s)', arg_joiner=', ',
+                              **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection,
+                              template='CAST(julianday(%(expressions)s) AS INTEGER)',
+                              arg_joiner=') - julianday(', **extra_context)
@@ -0,0 +1,175 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('apps.common.consultas')
+
+# Las listas de parámetros de un IN varían de longitud según la página, pero
+# son la misma consulta a efectos de detectar N+1
+_LISTA_PARAMETROS = re.compile(r'\((?:%s, )+%s\)')
+
+
+class PresupuestoConsultasExcedido(Exception):
+    """
+    Una vista ha ejecutado más consultas de las declaradas en su presupuesto.
+    """
+
+
+def presupuesto_consultas(maximo):
+    """
+    Decorador que declara el máximo de consultas SQL de una vista.
+
+    En vistas basadas en clases se puede usar el atributo de clase
+    `presupuesto_consultas` en su lugar.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltorio(*args, **kwargs):
+            return vista(*args, **kwargs)
+        envoltorio.presupuesto_consultas = maximo
+        return envoltorio
+    return decorador
+
+
+def firma_consulta(sql):
+    return _LISTA_PARAMETROS.sub('(...)', sql)
+
+
+class RegistroConsultas:
+    """
+    Envoltorio de ejecución (connection.execute_wrapper) que cuenta las
+    consultas, su duración y cuántas veces se repite cada una.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.duracion = 0.0
+        self.firmas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracion += time.perf_counter() - inicio
+            self.total += 1
+            self.firmas[firma_consulta(sql)] += 1
+
+    @property
+    def duplicadas(self):
+        return sum(veces - 1 for veces in self.firmas.values() if veces > 1)
+
+    def mas_repetidas(self, n=3):
+        return [(firma, veces) for firma, veces in self.firmas.most_common(n) if veces > 1]
+
+
+class InstrumentacionConsultasMiddleware:
+    """
+    Mide las consultas SQL, su duración y el tiempo total de cada petición.
+
+    Los resultados se añaden a la cabecera Server-Timing y se registran en el
+    logger 'apps.common.consultas'. Solo se instrumenta una fracción de las
+    peticiones (INSTRUMENTACION_MUESTREO) para que el coste sea despreciable en
+    producción; en modo estricto (DEBUG o INSTRUMENTACION_ESTRICTO) se
+    instrumentan todas y superar el presupuesto de una vista lanza
+    PresupuestoConsultasExcedido.
+
+    La configuración se lee en cada petición, de modo que override_settings
+    surte efecto en los tests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @property
+    def estricto(self):
+        return getattr(settings, 'INSTRUMENTACION_ESTRICTO', settings.DEBUG)
+
+    @property
+    def muestreo(self):
+        return 1.0 if self.estricto else getattr(settings, 'INSTRUMENTACION_MUESTREO', 0.01)
+
+    @property
+    def umbral_duplicadas(self):
+        return getattr(settings, 'INSTRUMENTACION_UMBRAL_DUPLICADAS', 5)
+
+    @property
+    def presupuesto_por_defecto(self):
+        return getattr(settings, 'INSTRUMENTACION_PRESUPUESTO', None)
+
+    def __call__(self, request):
+        muestreo = self.muestreo
+        if muestreo <= 0 or (muestreo < 1 and random.random() >= muestreo):
+            return self.get_response(request)
+
+        registro = RegistroConsultas()
+        request._presupuesto_consultas = self.presupuesto_por_defecto
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        self.cabecera(response, registro, total)
+        self.registrar(request, response, registro, total)
+        self.comprobar_presupuesto(request, registro)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        presupuesto = getattr(view_func, 'presupuesto_consultas', None)
+        if presupuesto is None:
+            presupuesto = getattr(getattr(view_func, 'view_class', None), 'presupuesto_consultas', None)
+        if presupuesto is not None and hasattr(request, '_presupuesto_consultas'):
+            request._presupuesto_consultas = presupuesto
+
+    def cabecera(self, response, registro, total):
+        metricas = [
+            f'sql;dur={registro.duracion * 1000:.1f};desc="{registro.total} consultas"',
+            f'sql-dup;desc="{registro.duplicadas} duplicadas"',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        if response.get('Server-Timing'):
+            metricas.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(metricas)
+
+    def registrar(self, request, response, registro, total):
+        match = getattr(request, 'resolver_match', None)
+        datos = {
+            'ruta': request.path,
+            'metodo': request.method,
+            'vista': match.view_name if match else None,
+            'estado': response.status_code,
+            'consultas': registro.total,
+            'sql_ms': round(registro.duracion * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'duplicadas': registro.duplicadas,
+            'presupuesto': request._presupuesto_consultas,
+        }
+        if registro.duplicadas >= self.umbral_duplicadas:
+            datos['repetidas'] = registro.mas_repetidas()
+            logger.warning('%(metodo)s %(ruta)s: %(consultas)d consultas, %(duplicadas)d duplicadas',
+                           datos, extra={'consultas_peticion': datos})
+        else:
+            logger.info('%(metodo)s %(ruta)s: %(consultas)d consultas en %(sql_ms).1f ms de %(total_ms).1f ms',
+                        datos, extra={'consultas_peticion': datos})
+
+    def comprobar_presupuesto(self, request, registro):
+        presupuesto = request._presupuesto_consultas
+        if presupuesto is None or registro.total <= presupuesto:
+            return
+        mensaje = (f'{request.method} {request.path} ejecutó {registro.total} consultas '
+                   f'con un presupuesto de {presupuesto}')
+        repetidas = registro.mas_repetidas()
+        if repetidas:
+            mensaje += '; más repetidas: ' + '; '.join(f'{veces}x {firma[:200]}' for firma, veces in repetidas)
+        if self.estricto:
+            raise PresupuestoConsultasExcedido(mensaje)
+        logger.warning(mensaje)
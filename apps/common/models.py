@@ -14,20 +14,82 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet que implementa borrado lógico masivo con un único UPDATE.
+    """
+
+    def _marcas_actualizacion(self, **valores):
+        """
+        Añade la fecha de actualización si el modelo la tiene, ya que update()
+        no dispara auto_now.
+        """
+        if any(field.name == 'updated_at' for field in self.model._meta.concrete_fields):
+            valores['updated_at'] = timezone.now()
+        return valores
+
+    def delete(self):
+        """
+        Marca como eliminados todos los registros del queryset en una sola sentencia.
+        Devuelve el mismo formato que QuerySet.delete().
+        """
+        cantidad = self.update(**self._marcas_actualizacion(
+            is_active=False, deleted_at=timezone.now()
+        ))
+        return cantidad, {self.model._meta.label: cantidad}
+
+    delete.queryset_only = True
+
+    def hard_delete(self):
+        """
+        Borrado físico de todos los registros del queryset.
+        """
+        return super().delete()
+
+    hard_delete.queryset_only = True
+
+    def restore(self):
+        """
+        Restaura todos los registros del queryset en una sola sentencia.
+        """
+        return self.update(**self._marcas_actualizacion(is_active=True, deleted_at=None))
+
+    def activos(self):
+        return self.filter(is_active=True)
+
+    def eliminados(self):
+        return self.filter(is_active=False)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager por defecto que excluye los registros eliminados lógicamente.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
 class SoftDeleteModel(models.Model):
     """
     Modelo abstracto que implementa borrado lógico en lugar de físico.
+
+    ``objects`` solo devuelve registros activos; ``all_with_deleted`` incluye
+    también los eliminados.
     """
     is_active = models.BooleanField(_("Activo"), default=True)
     deleted_at = models.DateTimeField(_("Fecha de eliminación"), null=True, blank=True)
 
+    objects = SoftDeleteManager()
+    all_with_deleted = models.Manager.from_queryset(SoftDeleteQuerySet)()
+
     def delete(self, using=None, keep_parents=False):
         """
         Sobrescribe el método delete para implementar borrado lógico.
         """
         self.is_active = False
         self.deleted_at = timezone.now()
-        self.save()
+        self.save(using=using)
 
     def hard_delete(self, using=None, keep_parents=False):
         """
@@ -35,6 +97,14 @@ class SoftDeleteModel(models.Model):
         """
         return super().delete(using=using, keep_parents=keep_parents)
 
+    def restore(self, using=None):
+        """
+        Restaura un registro eliminado lógicamente.
+        """
+        self.is_active = True
+        self.deleted_at = None
+        self.save(using=using)
+
     class Meta:
         abstract = True
 
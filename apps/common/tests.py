@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from apps.common.arbol import _clave_arbol
+from apps.common.cache import cache_catalogo
+from apps.common.middleware import InstrumentacionConsultasMiddleware, PresupuestoConsultasExcedido
+from apps.ventas.models import CategoriaProducto, EstadoVenta, Producto, Venta
+from club_core.routers import ReplicaRouter, en_replica
+
+
+class Revertir(Exception):
+    pass
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_MODELOS=['ventas.estadoventa'])
+class ReplicaRouterTests(TransactionTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_catalogos_y_en_replica_leen_de_la_replica(self):
+        self.assertEqual(self.router.db_for_read(EstadoVenta), 'replica')
+        self.assertIsNone(self.router.db_for_read(Venta))
+        with en_replica():
+            self.assertEqual(self.router.db_for_read(Venta), 'replica')
+
+    def test_dentro_de_una_transaccion_lee_de_default(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(EstadoVenta), 'default')
+            with en_replica():
+                self.assertEqual(self.router.db_for_read(Venta), 'default')
+
+    def test_relaciones_de_instancias_de_default(self):
+        venta = Venta()
+        venta._state.db = 'default'
+        self.assertEqual(self.router.db_for_read(EstadoVenta, instance=venta), 'default')
+
+
+class CatalogoCacheTests(TestCase):
+
+    def test_vuelve_a_invalidar_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            EstadoVenta.objects.create(nombre="Pagada")
+            # Un lector concurrente que aún no ve la fila la deja fuera de la cache
+            cache_catalogo(EstadoVenta)._datos = {'pk': {}, 'campo': {}}
+
+        self.assertIsNotNone(EstadoVenta.objects.por_nombre("Pagada"))
+
+    def test_no_cachea_filas_revertidas(self):
+        with self.assertRaises(Revertir), transaction.atomic():
+            EstadoVenta.objects.create(nombre="Pagada")
+            self.assertIsNotNone(EstadoVenta.objects.por_nombre("Pagada"))
+            raise Revertir
+
+        self.assertIsNone(EstadoVenta.objects.por_nombre("Pagada"))
+
+
+class ArbolCacheTests(TestCase):
+
+    def test_vuelve_a_invalidar_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoriaProducto.objects.create(nombre="Material", slug="material")
+            # Un lector concurrente que aún no ve el nodo cachea el árbol anterior
+            cache.set(_clave_arbol(CategoriaProducto), [], timeout=None)
+
+        self.assertEqual([nodo['nombre'] for nodo in CategoriaProducto.objects.arbol()], ["Material"])
+
+    def test_no_cachea_nodos_revertidos(self):
+        with self.assertRaises(Revertir), transaction.atomic():
+            CategoriaProducto.objects.create(nombre="Material", slug="material")
+            self.assertEqual(len(CategoriaProducto.objects.arbol()), 1)
+            raise Revertir
+
+        self.assertEqual(CategoriaProducto.objects.arbol(), [])
+
+
+class InstrumentacionConsultasTests(TestCase):
+
+    def setUp(self):
+        self.middleware = InstrumentacionConsultasMiddleware(self.vista)
+        self.request = RequestFactory().get('/informes/')
+
+    @staticmethod
+    def vista(request):
+        EstadoVenta.objects.count()
+        EstadoVenta.objects.count()
+        return HttpResponse()
+
+    @override_settings(INSTRUMENTACION_ESTRICTO=True, INSTRUMENTACION_PRESUPUESTO=1)
+    def test_modo_estricto_lanza_al_superar_el_presupuesto(self):
+        with self.assertRaises(PresupuestoConsultasExcedido):
+            self.middleware(self.request)
+
+    @override_settings(INSTRUMENTACION_ESTRICTO=False, INSTRUMENTACION_MUESTREO=1, INSTRUMENTACION_PRESUPUESTO=1)
+    def test_fuera_del_modo_estricto_solo_registra(self):
+        with self.assertLogs('apps.common.consultas', 'WARNING'):
+            response = self.middleware(self.request)
+
+        self.assertIn('2 consultas', response['Server-Timing'])
+
+
+class IndiceBusquedaTests(TestCase):
+
+    def setUp(self):
+        self.indice = Producto.indice_busqueda
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS "{self.indice.tabla_fts}"')
+        self.indice._preparadas.discard(connection.alias)
+        self.categoria = CategoriaProducto.objects.create(nombre="Material", slug="material")
+
+    def crear_producto(self, codigo, nombre):
+        return Producto.objects.create(codigo=codigo, nombre=nombre, categoria=self.categoria, precio=10, stock=1)
+
+    def test_tabla_fts_creada_en_una_transaccion_revertida(self):
+        with self.assertRaises(Revertir), transaction.atomic():
+            self.crear_producto("P1", "Pelota")
+            raise Revertir
+
+        self.crear_producto("P2", "Raqueta")
+
+        self.assertEqual([producto.codigo for producto in self.indice.filtrar(Producto.objects.all(), "raqueta")],
+                         ["P2"])
@@ -0,0 +1,85 @@
+import calendar
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import OperationalError, connection, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def sumar_meses(fecha, meses):
+    """
+    Suma meses naturales a una fecha.
+
+    Si el día no existe en el mes destino se usa el último día del mes, y si
+    la fecha original es fin de mes el resultado también lo es
+    (31/01 + 1 -> 28/02 o 29/02, 30/04 + 1 -> 31/05).
+    """
+    indice = fecha.year * 12 + (fecha.month - 1) + meses
+    year, month = divmod(indice, 12)
+    month += 1
+    ultimo_dia = calendar.monthrange(year, month)[1]
+    if fecha.day == calendar.monthrange(fecha.year, fecha.month)[1]:
+        return datetime.date(year, month, ultimo_dia)
+    return datetime.date(year, month, min(fecha.day, ultimo_dia))
+
+
+def campo_por_ruta(modelo, ruta):
+    """
+    Campo de modelo al que apunta una ruta de lookups ("venta__fecha_venta").
+    """
+    for parte in ruta.split('__'):
+        campo = modelo._meta.get_field(parte)
+        modelo = campo.related_model
+    return campo
+
+
+def filtro_periodo(modelo, ruta, desde=None, hasta=None):
+    """
+    Q que limita el campo de fecha `ruta` a los días [desde, hasta], ambos
+    incluidos. En campos de fecha y hora los límites se convierten en
+    instantes de la zona horaria actual, de modo que el filtro puede usar un
+    índice sobre el campo (a diferencia de `__date`).
+    """
+    condicion = Q()
+    if isinstance(campo_por_ruta(modelo, ruta), models.DateTimeField):
+        if desde:
+            inicio = datetime.datetime.combine(desde, datetime.time.min)
+            condicion &= Q(**{f'{ruta}__gte': timezone.make_aware(inicio)})
+        if hasta:
+            siguiente = datetime.datetime.combine(hasta + datetime.timedelta(days=1), datetime.time.min)
+            condicion &= Q(**{f'{ruta}__lt': timezone.make_aware(siguiente)})
+    else:
+        if desde:
+            condicion &= Q(**{f'{ruta}__gte': desde})
+        if hasta:
+            condicion &= Q(**{f'{ruta}__lte': hasta})
+    return condicion
+
+
+def en_hilos(funcion, argumentos, hilos):
+    """
+    Ejecuta `funcion` para cada argumento en un pool de hilos, cada uno con su
+    propia conexión, y devuelve (resultados, reintentos). Los bloqueos de
+    SQLite ('database is locked') se reintentan; con PostgreSQL no ocurren
+    porque las filas se bloquean con SELECT ... FOR UPDATE. Lo usan las
+    pruebas y escenarios de concurrencia.
+    """
+    reintentos = []
+
+    def tarea(argumento):
+        try:
+            for _intento in range(1000):
+                try:
+                    return funcion(argumento)
+                except OperationalError:
+                    reintentos.append(1)
+                    time.sleep(0.002)
+            raise OperationalError("demasiados reintentos")
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(hilos) as pool:
+        resultados = list(pool.map(tarea, argumentos))
+    return resultados, len(reintentos)
@@ -0,0 +1,59 @@
+from django.contrib import admin
+
+from apps.common.admin import ArbolAdmin, BorradoLogicoAdmin, CatalogoAdmin
+from apps.recursos.models import (Categoria, EstadoRecurso, EtiquetaRecurso, ImagenRecurso, MantenimientoRecurso,
+                                  Recurso, TipoRecurso)
+
+
+@admin.register(Categoria)
+class CategoriaAdmin(ArbolAdmin):
+    pass
+
+
+@admin.register(TipoRecurso)
+class TipoRecursoAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'alquilable', 'vendible', 'requiere_devolucion', 'tiempo_max_alquiler')
+    list_filter = ('alquilable', 'vendible')
+
+
+@admin.register(EstadoRecurso)
+class EstadoRecursoAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'disponible', 'color')
+
+
+@admin.register(EtiquetaRecurso)
+class EtiquetaRecursoAdmin(CatalogoAdmin):
+    pass
+
+
+class ImagenRecursoInline(admin.TabularInline):
+    model = ImagenRecurso
+    fields = ('imagen', 'titulo', 'orden')
+    extra = 0
+
+
+@admin.register(Recurso)
+class RecursoAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo', 'nombre', 'categoria', 'tipo', 'estado', 'cantidad_total', 'cantidad_disponible',
+                    'precio_alquiler', 'precio_venta')
+    list_select_related = ('categoria', 'tipo', 'estado')
+    list_filter = ('tipo', 'estado', 'solo_socios', 'requiere_autorizacion')
+    search_fields = ('codigo', 'nombre')
+    filter_horizontal = ('etiquetas',)
+    inlines = [ImagenRecursoInline]
+
+
+@admin.register(ImagenRecurso)
+class ImagenRecursoAdmin(BorradoLogicoAdmin):
+    list_display = ('recurso', 'titulo', 'orden')
+    list_select_related = ('recurso',)
+    search_fields = ('recurso__codigo', 'recurso__nombre', 'titulo')
+    autocomplete_fields = ('recurso',)
+
+
+@admin.register(MantenimientoRecurso)
+class MantenimientoRecursoAdmin(BorradoLogicoAdmin):
+    list_display = ('recurso', 'fecha_inicio', 'fecha_fin', 'costo', 'realizado_por', 'estado_anterior')
+    list_select_related = ('recurso', 'estado_anterior')
+    search_fields = ('recurso__codigo', 'recurso__nombre', 'realizado_por')
+    autocomplete_fields = ('recurso',)
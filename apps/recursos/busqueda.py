@@ -0,0 +1,36 @@
+"""
+Búsqueda del catálogo de recursos con facetas.
+
+    resultado = buscar_recursos('balón fútbol', filtros={'categoria': [3], 'precio': ['-10']})
+    resultado.resultados, resultado.total, resultado.facetas['etiquetas']
+"""
+from apps.common.busqueda import Buscador, Faceta, FacetaArbol, FacetaRangos
+from apps.recursos.models import Recurso
+
+BANDAS_PRECIO_ALQUILER = [5, 10, 25, 50]
+
+buscador_recursos = Buscador(
+    queryset=lambda: Recurso.objects.select_related('categoria', 'tipo', 'estado'),
+    facetas=[
+        FacetaArbol('categoria', 'categoria'),
+        Faceta('tipo', 'tipo', etiqueta='tipo__nombre'),
+        Faceta('etiquetas', 'etiquetas', etiqueta='etiquetas__nombre'),
+        Faceta('estado', 'estado', etiqueta='estado__nombre'),
+        FacetaRangos('precio', 'precio_alquiler', BANDAS_PRECIO_ALQUILER),
+    ],
+    ordenes={
+        'nombre': ('nombre', 'pk'),
+        'precio': ('precio_alquiler', 'pk'),
+        '-precio': ('-precio_alquiler', 'pk'),
+        'recientes': ('-created_at', '-pk'),
+    },
+)
+
+
+def buscar_recursos(texto='', filtros=None, orden=None, pagina=1, por_pagina=20):
+    """
+    Recursos activos que coinciden con `texto`, ordenados por relevancia, con
+    los recuentos de cada faceta. `filtros` asocia el nombre de cada faceta
+    con la lista de valores seleccionados.
+    """
+    return buscador_recursos.buscar(texto, filtros, orden, pagina, por_pagina)
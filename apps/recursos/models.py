@@ -1,11 +1,16 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from apps.common.models import BaseModel
+from apps.common.busqueda import IndiceBusqueda
+from apps.common.cache import CatalogoManager
+from apps.common.arbol import ArbolManager, ArbolModel, ArbolQuerySet
 from django.conf import settings
 
 
-class Categoria(BaseModel):
+class Categoria(ArbolModel, BaseModel):
     """
     Modelo para categorizar los recursos del club.
     Permite organizar los recursos en grupos lógicos según su tipo o uso.
@@ -17,10 +22,16 @@ class Categoria(BaseModel):
     parent = models.ForeignKey('self', verbose_name=_("Categoría padre"), on_delete=models.CASCADE, 
                               null=True, blank=True, related_name="subcategorias")
     
+    objects = ArbolManager()
+    all_with_deleted = models.Manager.from_queryset(ArbolQuerySet)()
+    
     class Meta:
         verbose_name = _("Categoría")
         verbose_name_plural = _("Categorías")
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['ruta'], name='categoria_ruta_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return self.nombre
@@ -31,7 +42,7 @@ class TipoRecurso(BaseModel):
     Define los diferentes tipos de recursos que puede manejar el club.
     Ejemplos: Libros, Equipamiento deportivo, Herramientas, etc.
     """
-    nombre = models.CharField(_("Nombre"), max_length=100)
+    nombre = models.CharField(_("Nombre"), max_length=100, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     alquilable = models.BooleanField(_("Alquilable"), default=True, 
                                     help_text=_("Indica si este tipo de recurso puede ser alquilado"))
@@ -56,13 +67,15 @@ class EstadoRecurso(BaseModel):
     Define los posibles estados de un recurso.
     Ejemplos: Disponible, Alquilado, En mantenimiento, Reservado, etc.
     """
-    nombre = models.CharField(_("Nombre"), max_length=50)
+    nombre = models.CharField(_("Nombre"), max_length=50, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     disponible = models.BooleanField(_("Disponible para uso"), default=True,
                                     help_text=_("Indica si un recurso en este estado está disponible para alquiler o venta"))
     color = models.CharField(_("Color"), max_length=20, default="primary", 
                             help_text=_("Clase de color de Bootstrap (primary, success, danger, etc.)"))
     
+    objects = CatalogoManager()
+    
     class Meta:
         verbose_name = _("Estado de recurso")
         verbose_name_plural = _("Estados de recursos")
@@ -116,10 +129,18 @@ class Recurso(BaseModel):
     requiere_autorizacion = models.BooleanField(_("Requiere autorización"), default=False,
                                                help_text=_("Indica si se requiere autorización especial para su uso"))
     
+    # Búsqueda de texto completo (ver apps.recursos.busqueda)
+    busqueda = SearchVectorField(null=True, editable=False)
+    indice_busqueda = IndiceBusqueda({'nombre': 'A', 'codigo': 'A', 'descripcion': 'B', 'notas': 'C'})
+    
     class Meta:
         verbose_name = _("Recurso")
         verbose_name_plural = _("Recursos")
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['nombre'], condition=models.Q(is_active=True),
+                         name='recurso_activo_nombre_idx'),
+        ]
     
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -128,15 +149,19 @@ class Recurso(BaseModel):
         """
         Actualiza la cantidad disponible basada en alquileres y reservas activas.
         """
-        # Esta lógica se implementará cuando tengamos los modelos de alquiler
-        pass
+        from apps.alquiler.disponibilidad import disponibilidad
+        
+        self.cantidad_disponible = disponibilidad([self], timezone.now().date())[self.pk]
+        self.save(update_fields=['cantidad_disponible', 'updated_at'])
+        return self.cantidad_disponible
     
     @property
     def disponible(self):
         """
         Indica si el recurso está disponible para alquiler o venta.
         """
-        return self.estado.disponible and self.cantidad_disponible > 0
+        estado = EstadoRecurso.objects.por_pk(self.estado_id) or self.estado
+        return estado.disponible and self.cantidad_disponible > 0
     
     @property
     def es_alquilable(self):
@@ -214,9 +239,9 @@ class EtiquetaRecurso(BaseModel):
 
 
 # Relación muchos a muchos entre Recurso y EtiquetaRecurso
-Recurso.etiquetas = models.ManyToManyField(
+Recurso.add_to_class('etiquetas', models.ManyToManyField(
     EtiquetaRecurso,
     verbose_name=_("Etiquetas"),
     related_name="recursos",
     blank=True
-)
+))
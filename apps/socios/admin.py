@@ -0,0 +1,99 @@
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.utils.translation import gettext_lazy as _
+
+from apps.common.admin import BaseAdmin, BorradoLogicoAdmin, CatalogoAdmin
+from apps.socios.models import (Beneficio, ContadorSocio, EstadoSuscripcion, FormaPago, PagoSuscripcion,
+                                Suscripcion, TipoSuscripcion, Usuario)
+
+
+@admin.register(Usuario)
+class UsuarioAdmin(BaseAdmin, UserAdmin):
+    list_display = ('username', 'first_name', 'last_name', 'email', 'numero_socio', 'es_socio',
+                    'membresia_activa', 'plan', 'is_staff')
+    list_filter = ('es_socio', 'is_staff', 'is_superuser', 'is_active')
+    search_fields = ('username', 'first_name', 'last_name', 'email', 'numero_socio', 'dni')
+    metodos_queryset = ('with_membership_status',)
+    fieldsets = UserAdmin.fieldsets + (
+        (_("Datos personales"), {'fields': ('dni', 'fecha_nacimiento', 'telefono', 'direccion',
+                                            'codigo_postal', 'ciudad', 'provincia', 'pais', 'foto_perfil')}),
+        (_("Socio"), {'fields': ('es_socio', 'numero_socio', 'fecha_alta',
+                                 'recibir_notificaciones', 'preferencias')}),
+    )
+
+    @admin.display(boolean=True, description=_("Membresía activa"))
+    def membresia_activa(self, obj):
+        return obj.membresia_activa
+
+    @admin.display(description=_("Plan"))
+    def plan(self, obj):
+        return obj.plan
+
+
+@admin.register(ContadorSocio)
+class ContadorSocioAdmin(BaseAdmin):
+    list_display = ('anio', 'ultimo_numero')
+
+
+@admin.register(TipoSuscripcion)
+class TipoSuscripcionAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'precio_mensual', 'precio_trimestral', 'precio_anual', 'descuento_alquiler',
+                    'descuento_compras', 'descuento_clases', 'destacado', 'activo')
+    list_filter = ('activo', 'destacado')
+    filter_horizontal = ('beneficios',)
+
+
+@admin.register(FormaPago)
+class FormaPagoAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'activo', 'requiere_validacion_manual')
+
+
+@admin.register(EstadoSuscripcion)
+class EstadoSuscripcionAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'color')
+
+
+@admin.register(Beneficio)
+class BeneficioAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'icono')
+
+
+class PagoSuscripcionInline(admin.TabularInline):
+    model = PagoSuscripcion
+    fields = ('fecha', 'monto', 'referencia', 'confirmado', 'fecha_confirmacion', 'confirmado_por')
+    autocomplete_fields = ('confirmado_por',)
+    extra = 0
+
+
+@admin.register(Suscripcion)
+class SuscripcionAdmin(BorradoLogicoAdmin):
+    list_display = ('socio', 'tipo', 'estado', 'periodicidad', 'fecha_inicio', 'fecha_fin', 'precio',
+                    'forma_pago', 'vigente')
+    list_select_related = ('socio', 'tipo', 'estado', 'forma_pago')
+    list_filter = ('estado', 'tipo', 'periodicidad', 'forma_pago', 'renovacion_automatica')
+    search_fields = ('socio__username', 'socio__numero_socio', 'socio__last_name')
+    autocomplete_fields = ('socio',)
+    metodos_queryset = ('with_activa',)
+    inlines = [PagoSuscripcionInline]
+
+    @admin.display(boolean=True, description=_("Vigente"))
+    def vigente(self, obj):
+        return obj.activa
+
+
+@admin.register(PagoSuscripcion)
+class PagoSuscripcionAdmin(BorradoLogicoAdmin):
+    list_display = ('fecha', 'socio', 'tipo_suscripcion', 'monto', 'referencia', 'confirmado', 'fecha_confirmacion')
+    list_select_related = ('suscripcion__socio', 'suscripcion__tipo')
+    list_filter = ('confirmado',)
+    search_fields = ('referencia', 'suscripcion__socio__username', 'suscripcion__socio__numero_socio')
+    raw_id_fields = ('suscripcion',)
+    autocomplete_fields = ('confirmado_por',)
+
+    @admin.display(description=_("Socio"), ordering='suscripcion__socio__username')
+    def socio(self, obj):
+        return obj.suscripcion.socio
+
+    @admin.display(description=_("Tipo de suscripción"))
+    def tipo_suscripcion(self, obj):
+        return obj.suscripcion.tipo.nombre
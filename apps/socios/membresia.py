@@ -0,0 +1,148 @@
+"""
+Estado de membresía de los socios cacheado por usuario.
+
+Las comprobaciones de acceso (puerta, alquileres, inscripciones) leen una
+instantánea inmutable de la cache de Django en lugar de consultar las
+suscripciones del socio:
+
+    estado_membresia(usuario.pk).activa
+    estado_membresia(usuario.pk).descuento_alquiler
+
+La instantánea se invalida al guardar o borrar las suscripciones o pagos del
+socio. Los cambios en tipos o estados de suscripción y las escrituras masivas
+incrementan una versión global que invalida todas las instantáneas a la vez.
+Dentro de una transacción que ha modificado la membresía de un socio su
+estado se lee de la base de datos hasta el commit.
+"""
+import time
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.common.cache import invalidar_al_confirmar, puede_cachear
+
+CLAVE_VERSION = 'membresia:version'
+
+# Campos de TipoSuscripcion incluidos en la instantánea
+CAMPOS_PLAN = ('descuento_alquiler', 'descuento_compras', 'descuento_clases',
+               'max_alquileres_simultaneos', 'max_reservas_clases', 'acceso_instalaciones')
+
+
+def _clave(usuario_id):
+    return f"membresia:{usuario_id}"
+
+
+@dataclass(frozen=True)
+class EstadoMembresia:
+    """
+    Instantánea de la suscripción vigente de un socio en una fecha.
+    """
+    activa: bool = False
+    suscripcion_id: int = None
+    plan_id: int = None
+    plan: str = None
+    fecha_fin: date = None
+    descuento_alquiler: Decimal = Decimal(0)
+    descuento_compras: Decimal = Decimal(0)
+    descuento_clases: Decimal = Decimal(0)
+    max_alquileres_simultaneos: int = 0
+    max_reservas_clases: int = 0
+    acceso_instalaciones: bool = False
+
+    @classmethod
+    def desde_anotaciones(cls, valores):
+        """
+        Construye la instantánea a partir de las anotaciones de
+        UsuarioQuerySet.with_membership_status().
+        """
+        if not valores['membresia_activa']:
+            return cls()
+        return cls(
+            activa=True,
+            suscripcion_id=valores['suscripcion_vigente_id'],
+            plan_id=valores['plan_id'],
+            plan=valores['plan'],
+            fecha_fin=valores['membresia_fin'],
+            **{campo: valores[f'plan_{campo}'] for campo in CAMPOS_PLAN},
+        )
+
+
+def _version_inicial():
+    # Si la cache pierde la clave, la nueva versión no coincide con ninguna anterior
+    return int(time.time())
+
+
+def _version():
+    return cache.get_or_set(CLAVE_VERSION, _version_inicial, timeout=None)
+
+
+def estados_membresia(usuario_ids):
+    """
+    Estado de membresía de varios usuarios: una lectura de la cache y, para
+    los que no estén cacheados, una única consulta.
+    """
+    from apps.socios.models import Usuario
+
+    hoy = timezone.now().date()
+    claves = {_clave(pk): pk for pk in usuario_ids}
+    todas = puede_cachear(CLAVE_VERSION)
+    cacheables = {clave for clave in claves if todas and puede_cachear(clave)}
+    cacheados = cache.get_many([CLAVE_VERSION, *cacheables])
+    version = cacheados.pop(CLAVE_VERSION, None) or _version()
+
+    estados = {}
+    for clave, (version_estado, fecha, estado) in cacheados.items():
+        # Una instantánea de otro día puede haber caducado o empezado
+        if version_estado == version and fecha == hoy:
+            estados[claves[clave]] = estado
+
+    pendientes = [pk for pk in claves.values() if pk not in estados]
+    if pendientes:
+        nuevos = {}
+        filas = Usuario.objects.filter(pk__in=pendientes).with_membership_status(hoy).values(
+            'pk', 'membresia_activa', 'suscripcion_vigente_id', 'plan_id', 'plan', 'membresia_fin',
+            *[f'plan_{campo}' for campo in CAMPOS_PLAN],
+        )
+        for fila in filas:
+            estado = EstadoMembresia.desde_anotaciones(fila)
+            estados[fila['pk']] = estado
+            if _clave(fila['pk']) in cacheables:
+                nuevos[_clave(fila['pk'])] = (version, hoy, estado)
+        cache.set_many(nuevos, timeout=getattr(settings, 'MEMBRESIA_CACHE_TIMEOUT', 86400))
+        for pk in pendientes:
+            estados.setdefault(pk, EstadoMembresia())
+    return estados
+
+
+def estado_membresia(usuario_id):
+    """
+    Estado de membresía de un usuario, normalmente en una sola lectura de la cache.
+    """
+    if usuario_id is None:
+        return EstadoMembresia()
+    return estados_membresia([usuario_id])[usuario_id]
+
+
+def invalidar_membresia(usuario_id):
+    if usuario_id is None:
+        return
+    clave = _clave(usuario_id)
+    invalidar_al_confirmar(clave, lambda: cache.delete(clave))
+
+
+def _incrementar_version():
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, _version_inicial(), timeout=None)
+
+
+def invalidar_membresias():
+    """
+    Invalida las instantáneas de todos los socios.
+    """
+    invalidar_al_confirmar(CLAVE_VERSION, _incrementar_version)
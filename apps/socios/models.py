@@ -1,12 +1,51 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Length
+from django.db.models.signals import post_delete, post_save
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from apps.common.models import BaseModel
+from apps.common.models import BaseModel, SoftDeleteManager, SoftDeleteQuerySet
+from apps.common.cache import CatalogoManager
+from apps.common.utils import sumar_meses
+from apps.socios.membresia import (CAMPOS_PLAN, EstadoMembresia, estado_membresia,
+                                   invalidar_membresia, invalidar_membresias)
 from django.conf import settings
 
 
+class UsuarioQuerySet(models.QuerySet):
+    """
+    QuerySet de usuarios con el estado de su membresía.
+    """
+
+    def with_membership_status(self, fecha=None):
+        """
+        Anota en una sola consulta la suscripción vigente en `fecha` (hoy por
+        defecto): `membresia_activa`, `suscripcion_vigente_id`, `plan_id`,
+        `plan`, `membresia_fin` y los descuentos y límites del plan, con el
+        prefijo `plan_` (p. ej. `plan_descuento_alquiler`).
+        """
+        vigentes = (Suscripcion.objects
+                    .vigentes(fecha)
+                    .filter(socio=OuterRef('pk'))
+                    .order_by('-fecha_inicio', '-pk'))
+        anotaciones = {
+            'membresia_activa': Exists(vigentes),
+            'suscripcion_vigente_id': Subquery(vigentes.values('pk')[:1]),
+            'plan_id': Subquery(vigentes.values('tipo_id')[:1]),
+            'plan': Subquery(vigentes.values('tipo__nombre')[:1]),
+            'membresia_fin': Subquery(vigentes.values('fecha_fin')[:1]),
+        }
+        for campo in CAMPOS_PLAN:
+            anotaciones[f'plan_{campo}'] = Subquery(vigentes.values(f'tipo__{campo}')[:1])
+        return self.annotate(**anotaciones)
+
+
+class UsuarioManager(UserManager.from_queryset(UsuarioQuerySet)):
+    pass
+
+
 class Usuario(AbstractUser):
     """
     Modelo de usuario personalizado que extiende el modelo base de Django.
@@ -32,6 +71,8 @@ class Usuario(AbstractUser):
     recibir_notificaciones = models.BooleanField(_("Recibir notificaciones"), default=True)
     preferencias = models.JSONField(_("Preferencias"), default=dict, blank=True)
     
+    objects = UsuarioManager()
+    
     class Meta:
         verbose_name = _("Usuario")
         verbose_name_plural = _("Usuarios")
@@ -45,32 +86,113 @@ class Usuario(AbstractUser):
         Sobrescribe el método save para asignar número de socio automáticamente.
         """
         if self.es_socio and not self.numero_socio:
-            # Generar número de socio basado en el año actual y un contador
-            year = timezone.now().year
-            last_member = Usuario.objects.filter(
-                numero_socio__startswith=f"S{year}-"
-            ).order_by('-numero_socio').first()
-            
-            if last_member and last_member.numero_socio:
-                try:
-                    last_number = int(last_member.numero_socio.split('-')[1])
-                    self.numero_socio = f"S{year}-{last_number + 1:04d}"
-                except (IndexError, ValueError):
-                    self.numero_socio = f"S{year}-0001"
-            else:
-                self.numero_socio = f"S{year}-0001"
-            
-            if not self.fecha_alta:
-                self.fecha_alta = timezone.now().date()
+            Usuario.asignar_numeros_socio([self])
         
         super().save(*args, **kwargs)
+    
+    @property
+    def membresia(self):
+        """
+        Estado de membresía del usuario (ver apps.socios.membresia). Usa las
+        anotaciones de with_membership_status() si existen y, si no, la cache.
+        """
+        if 'membresia_activa' in self.__dict__:
+            return EstadoMembresia.desde_anotaciones(self.__dict__)
+        return estado_membresia(self.pk)
+    
+    @staticmethod
+    def formatear_numero_socio(year, numero):
+        return f"S{year}-{numero:04d}"
+    
+    @classmethod
+    def asignar_numeros_socio(cls, usuarios):
+        """
+        Asigna número de socio a los usuarios que lo necesitan reservando todos
+        los números en una sola operación sobre el contador del año.
+        Pensado para importaciones masivas previas a un bulk_create.
+        """
+        pendientes = [u for u in usuarios if u.es_socio and not u.numero_socio]
+        if not pendientes:
+            return pendientes
+        
+        hoy = timezone.now().date()
+        numeros = ContadorSocio.reservar(hoy.year, len(pendientes))
+        for usuario, numero in zip(pendientes, numeros):
+            usuario.numero_socio = cls.formatear_numero_socio(hoy.year, numero)
+            if not usuario.fecha_alta:
+                usuario.fecha_alta = hoy
+        return pendientes
+
+
+class ContadorSocio(models.Model):
+    """
+    Contador por año para la asignación de números de socio.
+    Cada reserva es un incremento atómico sobre la fila del año, que se lee
+    después en la misma transacción.
+    """
+    anio = models.PositiveSmallIntegerField(_("Año"), primary_key=True)
+    ultimo_numero = models.PositiveIntegerField(_("Último número asignado"), default=0)
+    
+    class Meta:
+        verbose_name = _("Contador de socios")
+        verbose_name_plural = _("Contadores de socios")
+        ordering = ['-anio']
+    
+    def __str__(self):
+        return f"{self.anio}: {self.ultimo_numero}"
+    
+    @classmethod
+    def reservar(cls, anio, cantidad=1):
+        """
+        Reserva `cantidad` números consecutivos para el año indicado y devuelve
+        el rango reservado. El UPDATE con F() bloquea la fila hasta el final de
+        la transacción, por lo que dos altas simultáneas nunca comparten número.
+        Los números de una transacción revertida no se reutilizan.
+
+        Son dos consultas (el UPDATE y la lectura del nuevo valor) sea cual sea
+        `cantidad`; la primera reserva del año busca además el último número
+        emitido y crea la fila del contador.
+        """
+        with transaction.atomic():
+            actualizados = cls.objects.filter(anio=anio).update(
+                ultimo_numero=F('ultimo_numero') + cantidad
+            )
+            if not actualizados:
+                # Primera reserva del año: se parte del último número ya emitido
+                cls.objects.bulk_create(
+                    [cls(anio=anio, ultimo_numero=cls._ultimo_numero_emitido(anio))],
+                    ignore_conflicts=True
+                )
+                cls.objects.filter(anio=anio).update(
+                    ultimo_numero=F('ultimo_numero') + cantidad
+                )
+            ultimo = cls.objects.filter(anio=anio).values_list('ultimo_numero', flat=True).get()
+        return range(ultimo - cantidad + 1, ultimo + 1)
+    
+    @staticmethod
+    def _ultimo_numero_emitido(anio):
+        """
+        Último número emitido antes de existir el contador del año. Los números
+        no tienen ceros a la izquierda a partir de 9999, así que se ordenan por
+        longitud y después por texto.
+        """
+        numero_socio = Usuario.objects.filter(
+            numero_socio__startswith=f"S{anio}-"
+        ).order_by(Length('numero_socio').desc(), '-numero_socio').values_list('numero_socio', flat=True).first()
+        
+        if numero_socio:
+            try:
+                return int(numero_socio.split('-')[1])
+            except (IndexError, ValueError):
+                pass
+        return 0
 
 
 class TipoSuscripcion(BaseModel):
     """
     Define los diferentes tipos de suscripción disponibles en el club.
     """
-    nombre = models.CharField(_("Nombre"), max_length=100)
+    nombre = models.CharField(_("Nombre"), max_length=100, unique=True)
     descripcion = models.TextField(_("Descripción"))
     precio_mensual = models.DecimalField(_("Precio mensual"), max_digits=10, decimal_places=2,
                                         validators=[MinValueValidator(0)])
@@ -114,7 +236,7 @@ class FormaPago(BaseModel):
     """
     Formas de pago disponibles para suscripciones.
     """
-    nombre = models.CharField(_("Nombre"), max_length=100)
+    nombre = models.CharField(_("Nombre"), max_length=100, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     activo = models.BooleanField(_("Activo"), default=True)
     requiere_validacion_manual = models.BooleanField(_("Requiere validación manual"), default=False)
@@ -133,11 +255,13 @@ class EstadoSuscripcion(BaseModel):
     Define los posibles estados de una suscripción.
     Ejemplos: Activa, Pendiente de pago, Cancelada, Expirada, etc.
     """
-    nombre = models.CharField(_("Nombre"), max_length=50)
+    nombre = models.CharField(_("Nombre"), max_length=50, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     color = models.CharField(_("Color"), max_length=20, default="primary",
                             help_text=_("Clase de color de Bootstrap (primary, success, danger, etc.)"))
     
+    objects = CatalogoManager()
+    
     class Meta:
         verbose_name = _("Estado de suscripción")
         verbose_name_plural = _("Estados de suscripción")
@@ -147,10 +271,63 @@ class EstadoSuscripcion(BaseModel):
         return self.nombre
 
 
+class SuscripcionQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet de suscripciones. Las escrituras masivas invalidan la cache de
+    membresías, ya que no disparan señales.
+    """
+
+    def update(self, **kwargs):
+        filas = super().update(**kwargs)
+        invalidar_membresias()
+        return filas
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        invalidar_membresias()
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        filas = super().bulk_update(*args, **kwargs)
+        invalidar_membresias()
+        return filas
+
+    @staticmethod
+    def _condicion_vigente(fecha):
+        estado_activa = EstadoSuscripcion.objects.por_nombre("Activa")
+        if estado_activa is None:
+            return None
+        return (Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=fecha)) & Q(
+            estado_id=estado_activa.pk, fecha_inicio__lte=fecha)
+
+    def vigentes(self, fecha=None):
+        """
+        Suscripciones en estado "Activa" cuyo periodo incluye `fecha` (hoy por
+        defecto).
+        """
+        condicion = self._condicion_vigente(fecha or timezone.now().date())
+        return self.none() if condicion is None else self.filter(condicion)
+
+    def with_activa(self, fecha=None):
+        """
+        Anota `activa` en la consulta, evitando calcularla en cada acceso.
+        """
+        condicion = self._condicion_vigente(fecha or timezone.now().date())
+        if condicion is None:
+            return self.annotate(activa=models.Value(False))
+        return self.annotate(activa=models.ExpressionWrapper(condicion, output_field=models.BooleanField()))
+
+
 class Suscripcion(BaseModel):
     """
     Modelo principal para las suscripciones de socios al club.
     """
+    MESES_PERIODICIDAD = {
+        'mensual': 1,
+        'trimestral': 3,
+        'anual': 12,
+    }
+    
     # Relaciones
     socio = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("Socio"),
                              on_delete=models.CASCADE, related_name="suscripciones")
@@ -184,10 +361,16 @@ class Suscripcion(BaseModel):
     # Metadatos
     notas = models.TextField(_("Notas"), blank=True)
     
+    objects = SoftDeleteManager.from_queryset(SuscripcionQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(SuscripcionQuerySet)()
+    
     class Meta:
         verbose_name = _("Suscripción")
         verbose_name_plural = _("Suscripciones")
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['socio', '-fecha_fin'], name='suscripcion_socio_fin_idx'),
+        ]
     
     def __str__(self):
         return f"{self.socio} - {self.tipo.nombre} ({self.get_periodicidad_display()})"
@@ -196,12 +379,20 @@ class Suscripcion(BaseModel):
     def activa(self):
         """
         Indica si la suscripción está activa.
+        Usa el valor anotado por with_activa() si existe.
         """
+        if '_activa' in self.__dict__:
+            return self._activa
         hoy = timezone.now().date()
-        return (self.estado.nombre == "Activa" and 
+        estado_activa = EstadoSuscripcion.objects.por_nombre("Activa")
+        return (estado_activa is not None and self.estado_id == estado_activa.pk and 
                 self.fecha_inicio <= hoy and 
                 (self.fecha_fin is None or hoy <= self.fecha_fin))
     
+    @activa.setter
+    def activa(self, valor):
+        self._activa = valor
+    
     @property
     def dias_restantes(self):
         """
@@ -227,12 +418,21 @@ class Suscripcion(BaseModel):
         self.motivo_cancelacion = motivo
         
         # Buscar el estado "Cancelada"
-        estado_cancelada = EstadoSuscripcion.objects.filter(nombre="Cancelada").first()
+        estado_cancelada = EstadoSuscripcion.objects.por_nombre("Cancelada")
         if estado_cancelada:
             self.estado = estado_cancelada
         
         self.save()
     
+    def calcular_renovacion(self, periodos=1):
+        """
+        Devuelve las fechas de inicio y fin del siguiente periodo.
+        El nuevo periodo empieza el día siguiente al fin actual y los meses se
+        suman sobre la fecha de fin, conservando el fin de mes.
+        """
+        meses = self.MESES_PERIODICIDAD[self.periodicidad] * periodos
+        return self.fecha_fin + timezone.timedelta(days=1), sumar_meses(self.fecha_fin, meses)
+    
     def renovar(self, periodos=1):
         """
         Renueva la suscripción por el número de periodos especificado.
@@ -240,26 +440,13 @@ class Suscripcion(BaseModel):
         if not self.fecha_fin:
             return False
         
-        nueva_fecha_inicio = self.fecha_fin + timezone.timedelta(days=1)
-        
-        if self.periodicidad == 'mensual':
-            meses = periodos
-            nueva_fecha_fin = nueva_fecha_inicio.replace(month=nueva_fecha_inicio.month + meses)
-            if nueva_fecha_fin.month > 12:
-                nueva_fecha_fin = nueva_fecha_fin.replace(year=nueva_fecha_fin.year + 1, month=nueva_fecha_fin.month - 12)
-        elif self.periodicidad == 'trimestral':
-            meses = periodos * 3
-            nueva_fecha_fin = nueva_fecha_inicio.replace(month=nueva_fecha_inicio.month + meses)
-            if nueva_fecha_fin.month > 12:
-                nueva_fecha_fin = nueva_fecha_fin.replace(year=nueva_fecha_fin.year + 1, month=nueva_fecha_fin.month - 12)
-        elif self.periodicidad == 'anual':
-            nueva_fecha_fin = nueva_fecha_inicio.replace(year=nueva_fecha_inicio.year + periodos)
+        nueva_fecha_inicio, nueva_fecha_fin = self.calcular_renovacion(periodos)
         
         self.fecha_inicio = nueva_fecha_inicio
         self.fecha_fin = nueva_fecha_fin
         
         # Buscar el estado "Activa"
-        estado_activa = EstadoSuscripcion.objects.filter(nombre="Activa").first()
+        estado_activa = EstadoSuscripcion.objects.por_nombre("Activa")
         if estado_activa:
             self.estado = estado_activa
         
@@ -294,6 +481,12 @@ class PagoSuscripcion(BaseModel):
         verbose_name = _("Pago de suscripción")
         verbose_name_plural = _("Pagos de suscripción")
         ordering = ['-fecha']
+        indexes = [
+            # Pagos pendientes de confirmar: solo una fracción pequeña de la tabla
+            models.Index(fields=['fecha'], condition=models.Q(confirmado=False, is_active=True),
+                         name='pago_confirmado_fecha_idx'),
+            models.Index(fields=['updated_at'], name='pago_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Pago {self.id} - {self.suscripcion}"
@@ -312,7 +505,7 @@ class Beneficio(BaseModel):
     """
     Beneficios adicionales que pueden asociarse a tipos de suscripción.
     """
-    nombre = models.CharField(_("Nombre"), max_length=100)
+    nombre = models.CharField(_("Nombre"), max_length=100, unique=True)
     descripcion = models.TextField(_("Descripción"))
     icono = models.CharField(_("Icono"), max_length=50, blank=True)
     
@@ -326,9 +519,37 @@ class Beneficio(BaseModel):
 
 
 # Relación muchos a muchos entre TipoSuscripcion y Beneficio
-TipoSuscripcion.beneficios = models.ManyToManyField(
+TipoSuscripcion.add_to_class('beneficios', models.ManyToManyField(
     Beneficio,
     verbose_name=_("Beneficios"),
     related_name="tipos_suscripcion",
     blank=True
-)
+))
+
+
+
+def _invalidar_membresia_suscripcion(sender, instance, **kwargs):
+    invalidar_membresia(instance.socio_id)
+
+
+def _invalidar_membresia_pago(sender, instance, **kwargs):
+    socio_id = (Suscripcion.all_with_deleted
+                .filter(pk=instance.suscripcion_id)
+                .values_list('socio_id', flat=True)
+                .first())
+    invalidar_membresia(socio_id)
+
+
+def _invalidar_membresias(sender, **kwargs):
+    invalidar_membresias()
+
+
+post_save.connect(_invalidar_membresia_suscripcion, sender=Suscripcion, dispatch_uid="membresia_cache:suscripcion")
+post_delete.connect(_invalidar_membresia_suscripcion, sender=Suscripcion, dispatch_uid="membresia_cache:suscripcion")
+post_save.connect(_invalidar_membresia_pago, sender=PagoSuscripcion, dispatch_uid="membresia_cache:pago")
+post_delete.connect(_invalidar_membresia_pago, sender=PagoSuscripcion, dispatch_uid="membresia_cache:pago")
+# Los descuentos y el estado "Activa" afectan a todas las membresías
+post_save.connect(_invalidar_membresias, sender=TipoSuscripcion, dispatch_uid="membresia_cache:tipo")
+post_delete.connect(_invalidar_membresias, sender=TipoSuscripcion, dispatch_uid="membresia_cache:tipo")
+post_save.connect(_invalidar_membresias, sender=EstadoSuscripcion, dispatch_uid="membresia_cache:estado")
+post_delete.connect(_invalidar_membresias, sender=EstadoSuscripcion, dispatch_uid="membresia_cache:estado")
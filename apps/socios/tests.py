@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.common.utils import en_hilos
+from apps.socios.membresia import estado_membresia
+from apps.socios.models import ContadorSocio, EstadoSuscripcion, FormaPago, Suscripcion, TipoSuscripcion, Usuario
+
+
+class Revertir(Exception):
+    pass
+
+
+class NumeroSocioTests(TestCase):
+
+    def test_ultimo_numero_emitido_pasado_9999(self):
+        Usuario.objects.bulk_create([
+            Usuario(username=f"socio{numero}", numero_socio=Usuario.formatear_numero_socio(2030, numero))
+            for numero in (998, 9999, 10000, 10001)
+        ])
+
+        self.assertEqual(list(ContadorSocio.reservar(2030)), [10002])
+
+    def test_reservas_unicas_y_consecutivas(self):
+        reservados = []
+        for cantidad in (1, 5, 1, 20, 3):
+            reservados.extend(ContadorSocio.reservar(2030, cantidad))
+
+        self.assertEqual(reservados, list(range(1, 31)))
+
+    def test_asignar_numeros_en_bloque(self):
+        usuarios = [Usuario(username=f"socio{numero}", es_socio=True) for numero in range(25)]
+
+        Usuario.asignar_numeros_socio(usuarios)
+        Usuario.objects.bulk_create(usuarios)
+        nuevo = Usuario.objects.create(username="nuevo", es_socio=True)
+
+        numeros = [int(usuario.numero_socio.split('-')[1]) for usuario in usuarios + [nuevo]]
+        self.assertEqual(numeros, list(range(1, 27)))
+        socios = Usuario.objects.filter(numero_socio__isnull=False)
+        self.assertEqual(socios.values('numero_socio').distinct().count(), 26)
+
+
+class NumeroSocioConcurrenteTests(TransactionTestCase):
+
+    def test_altas_en_paralelo_sin_colisiones(self):
+        nombres = [f"socio{numero}" for numero in range(300)]
+
+        numeros, _reintentos = en_hilos(
+            lambda nombre: Usuario.objects.create(username=nombre, es_socio=True).numero_socio, nombres, 8
+        )
+
+        self.assertNotIn(None, numeros)
+        self.assertEqual(len(set(numeros)), len(nombres))
+        self.assertEqual(Usuario.objects.filter(es_socio=True).values('numero_socio').distinct().count(),
+                         len(nombres))
+
+
+class EstadoMembresiaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.activa = EstadoSuscripcion.objects.create(nombre="Activa")
+        cls.tipo = TipoSuscripcion.objects.create(nombre="Básica", descripcion="", precio_mensual=Decimal('30'),
+                                                  precio_trimestral=Decimal('80'), precio_anual=Decimal('300'))
+        cls.forma_pago = FormaPago.objects.create(nombre="Domiciliación")
+        cls.socio = Usuario.objects.create(username="socio")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_no_cachea_suscripciones_revertidas(self):
+        hoy = timezone.now().date()
+        with self.assertRaises(Revertir), transaction.atomic():
+            Suscripcion.objects.create(socio=self.socio, tipo=self.tipo, estado=self.activa,
+                                       forma_pago=self.forma_pago, precio=Decimal('30'),
+                                       fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=30))
+            self.assertTrue(estado_membresia(self.socio.pk).activa)
+            raise Revertir
+
+        self.assertFalse(estado_membresia(self.socio.pk).activa)
@@ -0,0 +1,144 @@
+from django.contrib import admin, messages
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.utils.translation import gettext_lazy as _
+
+from apps.common.admin import ArbolAdmin, BorradoLogicoAdmin, CatalogoAdmin
+from apps.ventas.models import (Carrito, CategoriaProducto, DetalleVenta, EstadoVenta, ImagenProducto, ItemCarrito,
+                                MetodoPago, Producto, Venta)
+
+IMPORTE = DecimalField(max_digits=12, decimal_places=2)
+
+
+@admin.register(CategoriaProducto)
+class CategoriaProductoAdmin(ArbolAdmin):
+    pass
+
+
+@admin.register(EstadoVenta)
+class EstadoVentaAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'color')
+
+
+@admin.register(MetodoPago)
+class MetodoPagoAdmin(CatalogoAdmin):
+    list_display = ('nombre', 'activo', 'icono')
+
+
+class ImagenProductoInline(admin.TabularInline):
+    model = ImagenProducto
+    fields = ('imagen', 'titulo', 'orden')
+    extra = 0
+
+
+@admin.register(Producto)
+class ProductoAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo', 'nombre', 'categoria', 'precio', 'precio_vigente', 'stock', 'stock_minimo',
+                    'destacado', 'solo_socios')
+    list_select_related = ('categoria',)
+    list_filter = ('destacado', 'solo_socios', 'categoria')
+    search_fields = ('codigo', 'nombre', 'marca', 'modelo')
+    autocomplete_fields = ('recurso',)
+    inlines = [ImagenProductoInline]
+    anotaciones = {'precio_vigente_anotado': Producto.expresion_precio_actual()}
+
+    @admin.display(description=_("Precio actual"), ordering='precio_vigente_anotado')
+    def precio_vigente(self, obj):
+        return obj.precio_vigente_anotado
+
+
+@admin.register(ImagenProducto)
+class ImagenProductoAdmin(BorradoLogicoAdmin):
+    list_display = ('producto', 'titulo', 'orden')
+    list_select_related = ('producto',)
+    search_fields = ('producto__codigo', 'producto__nombre', 'titulo')
+    autocomplete_fields = ('producto',)
+
+
+class DetalleVentaInline(admin.TabularInline):
+    model = DetalleVenta
+    fields = ('producto', 'cantidad', 'precio_unitario', 'descuento_unitario', 'notas')
+    autocomplete_fields = ('producto',)
+    extra = 0
+
+
+@admin.register(Venta)
+class VentaAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo', 'cliente', 'fecha_venta', 'estado', 'metodo_pago', 'subtotal', 'impuestos',
+                    'descuento', 'total')
+    list_select_related = ('cliente', 'estado', 'metodo_pago')
+    list_filter = ('estado', 'metodo_pago')
+    search_fields = ('codigo', 'referencia_pago', 'cliente__username', 'cliente__numero_socio')
+    autocomplete_fields = ('cliente', 'vendedor')
+    inlines = [DetalleVentaInline]
+    actions = ['restaurar', 'recalcular_totales']
+
+    @admin.action(description=_("Recalcular los totales de las ventas seleccionadas"))
+    def recalcular_totales(self, request, queryset):
+        filas = queryset.recalcular_totales()
+        self.message_user(request, _("%(filas)d ventas recalculadas.") % {'filas': filas}, messages.SUCCESS)
+
+
+@admin.register(DetalleVenta)
+class DetalleVentaAdmin(BorradoLogicoAdmin):
+    list_display = ('codigo_venta', 'producto', 'cantidad', 'precio_unitario', 'descuento_unitario', 'importe')
+    list_select_related = ('venta', 'producto')
+    search_fields = ('venta__codigo', 'producto__codigo', 'producto__nombre')
+    raw_id_fields = ('venta',)
+    autocomplete_fields = ('producto',)
+    anotaciones = {
+        'importe_anotado': ExpressionWrapper(DetalleVenta.expresion_subtotal(), output_field=IMPORTE),
+    }
+
+    @admin.display(description=_("Venta"), ordering='venta__codigo')
+    def codigo_venta(self, obj):
+        return obj.venta.codigo
+
+    @admin.display(description=_("Subtotal"), ordering='importe_anotado')
+    def importe(self, obj):
+        return obj.importe_anotado
+
+
+class ItemCarritoInline(admin.TabularInline):
+    model = ItemCarrito
+    fields = ('producto', 'cantidad')
+    autocomplete_fields = ('producto',)
+    extra = 0
+
+
+@admin.register(Carrito)
+class CarritoAdmin(BorradoLogicoAdmin):
+    list_display = ('usuario', 'articulos', 'importe', 'fecha_creacion', 'fecha_actualizacion')
+    list_select_related = ('usuario',)
+    search_fields = ('usuario__username', 'usuario__numero_socio')
+    autocomplete_fields = ('usuario',)
+    metodos_queryset = ('with_totals',)
+    inlines = [ItemCarritoInline]
+
+    @admin.display(description=_("Artículos"), ordering='total_items')
+    def articulos(self, obj):
+        return obj.total_items
+
+    @admin.display(description=_("Subtotal"), ordering='subtotal')
+    def importe(self, obj):
+        return obj.subtotal
+
+
+@admin.register(ItemCarrito)
+class ItemCarritoAdmin(BorradoLogicoAdmin):
+    list_display = ('usuario', 'producto', 'cantidad', 'importe', 'fecha_agregado')
+    list_select_related = ('carrito__usuario', 'producto')
+    search_fields = ('carrito__usuario__username', 'producto__codigo', 'producto__nombre')
+    raw_id_fields = ('carrito',)
+    autocomplete_fields = ('producto',)
+    anotaciones = {
+        'importe_anotado': ExpressionWrapper(Producto.expresion_precio_actual('producto__') * F('cantidad'),
+                                             output_field=IMPORTE),
+    }
+
+    @admin.display(description=_("Usuario"), ordering='carrito__usuario__username')
+    def usuario(self, obj):
+        return obj.carrito.usuario
+
+    @admin.display(description=_("Subtotal"), ordering='importe_anotado')
+    def importe(self, obj):
+        return obj.importe_anotado
@@ -0,0 +1,32 @@
+"""
+Búsqueda del catálogo de productos con facetas.
+
+    resultado = buscar_productos('zapatillas', filtros={'marca': ['Joma']}, orden='precio')
+"""
+from apps.common.busqueda import Buscador, Faceta, FacetaArbol, FacetaRangos
+from apps.ventas.models import Producto
+
+BANDAS_PRECIO = [10, 25, 50, 100]
+
+buscador_productos = Buscador(
+    queryset=lambda: Producto.objects.select_related('categoria'),
+    facetas=[
+        FacetaArbol('categoria', 'categoria'),
+        Faceta('marca', 'marca'),
+        FacetaRangos('precio', 'precio', BANDAS_PRECIO),
+    ],
+    ordenes={
+        'nombre': ('nombre', 'pk'),
+        'precio': ('precio', 'pk'),
+        '-precio': ('-precio', 'pk'),
+        'novedades': ('-fecha_publicacion', '-pk'),
+    },
+)
+
+
+def buscar_productos(texto='', filtros=None, orden=None, pagina=1, por_pagina=20):
+    """
+    Productos activos que coinciden con `texto`, ordenados por relevancia, con
+    los recuentos de cada faceta.
+    """
+    return buscador_productos.buscar(texto, filtros, orden, pagina, por_pagina)
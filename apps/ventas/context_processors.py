@@ -0,0 +1,26 @@
+from apps.ventas.models import Carrito
+
+
+def resumen_carrito(request):
+    """
+    Resumen del carrito del usuario memorizado en la petición, de forma que
+    la cabecera y la página del carrito comparten una sola consulta.
+    """
+    if not hasattr(request, '_resumen_carrito'):
+        resumen = {'total_items': 0, 'subtotal': 0}
+        usuario = getattr(request, 'user', None)
+        if usuario is not None and usuario.is_authenticated:
+            carrito = Carrito.objects.with_totals().filter(usuario=usuario).first()
+            if carrito is not None:
+                resumen = carrito.resumen()
+        request._resumen_carrito = resumen
+    return request._resumen_carrito
+
+
+def carrito(request):
+    """
+    Procesador de contexto que expone `resumen_carrito` a las plantillas.
+    Se activa añadiendo 'apps.ventas.context_processors.carrito' a
+    TEMPLATES['OPTIONS']['context_processors'].
+    """
+    return {'resumen_carrito': resumen_carrito(request)}
@@ -1,13 +1,20 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from apps.common.models import BaseModel
+from django.contrib.postgres.search import SearchVectorField
+from apps.common.models import BaseModel, SoftDeleteManager, SoftDeleteQuerySet
+from apps.common.busqueda import IndiceBusqueda
+from apps.common.cache import CatalogoManager
+from apps.common.arbol import ArbolManager, ArbolModel, ArbolQuerySet
 from apps.recursos.models import Recurso
 from django.conf import settings
 
 
-class CategoriaProducto(BaseModel):
+class CategoriaProducto(ArbolModel, BaseModel):
     """
     Categorías específicas para productos en venta.
     """
@@ -18,10 +25,16 @@ class CategoriaProducto(BaseModel):
     parent = models.ForeignKey('self', verbose_name=_("Categoría padre"), on_delete=models.CASCADE, 
                               null=True, blank=True, related_name="subcategorias")
     
+    objects = ArbolManager()
+    all_with_deleted = models.Manager.from_queryset(ArbolQuerySet)()
+    
     class Meta:
         verbose_name = _("Categoría de producto")
         verbose_name_plural = _("Categorías de productos")
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['ruta'], name='categoria_producto_ruta_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return self.nombre
@@ -66,10 +79,21 @@ class Producto(BaseModel):
     dimensiones = models.CharField(_("Dimensiones"), max_length=100, blank=True, 
                                   help_text=_("Formato: largo x ancho x alto"))
     
+    # Búsqueda de texto completo (ver apps.ventas.busqueda)
+    busqueda = SearchVectorField(null=True, editable=False)
+    indice_busqueda = IndiceBusqueda({'nombre': 'A', 'codigo': 'A', 'marca': 'B', 'modelo': 'B',
+                                      'descripcion': 'C'})
+    
     class Meta:
         verbose_name = _("Producto")
         verbose_name_plural = _("Productos")
         ordering = ['nombre']
+        indexes = [
+            # Productos por reponer (stock <= stock_minimo)
+            models.Index(fields=['stock'],
+                         condition=models.Q(stock__lte=models.F('stock_minimo'), is_active=True),
+                         name='producto_stock_bajo_idx'),
+        ]
     
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -90,6 +114,20 @@ class Producto(BaseModel):
             return self.precio_oferta
         return self.precio
     
+    @staticmethod
+    def expresion_precio_actual(prefijo=''):
+        """
+        Expresión SQL equivalente a precio_actual, para usar en anotaciones
+        y agregados. `prefijo` es la ruta hasta el producto (p. ej. 'producto__').
+        """
+        precio = F(f'{prefijo}precio')
+        oferta = f'{prefijo}precio_oferta'
+        return Case(
+            When(**{f'{oferta}__gt': 0, f'{oferta}__lt': precio}, then=F(oferta)),
+            default=precio,
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        )
+    
     @property
     def porcentaje_descuento(self):
         """
@@ -131,11 +169,13 @@ class EstadoVenta(BaseModel):
     Define los posibles estados de una venta.
     Ejemplos: Pendiente, Pagada, Enviada, Completada, Cancelada, etc.
     """
-    nombre = models.CharField(_("Nombre"), max_length=50)
+    nombre = models.CharField(_("Nombre"), max_length=50, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     color = models.CharField(_("Color"), max_length=20, default="primary",
                             help_text=_("Clase de color de Bootstrap (primary, success, danger, etc.)"))
     
+    objects = CatalogoManager()
+    
     class Meta:
         verbose_name = _("Estado de venta")
         verbose_name_plural = _("Estados de venta")
@@ -149,7 +189,7 @@ class MetodoPago(BaseModel):
     """
     Métodos de pago disponibles para ventas.
     """
-    nombre = models.CharField(_("Nombre"), max_length=100)
+    nombre = models.CharField(_("Nombre"), max_length=100, unique=True)
     descripcion = models.TextField(_("Descripción"), blank=True)
     activo = models.BooleanField(_("Activo"), default=True)
     icono = models.CharField(_("Icono"), max_length=50, blank=True)
@@ -163,6 +203,31 @@ class MetodoPago(BaseModel):
         return self.nombre
 
 
+class VentaQuerySet(SoftDeleteQuerySet):
+    
+    def recalcular_totales(self):
+        """
+        Recalcula subtotal y total de todas las ventas del queryset con un
+        único UPDATE con subconsulta correlacionada sobre los detalles.
+        Devuelve el número de ventas actualizadas.
+        """
+        subtotal = Coalesce(
+            Subquery(
+                DetalleVenta.objects.filter(venta=OuterRef('pk'))
+                .order_by().values('venta')
+                .annotate(total=Sum(DetalleVenta.expresion_subtotal()))
+                .values('total')
+            ),
+            Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        )
+        return self.order_by().update(
+            subtotal=subtotal,
+            total=subtotal + F('impuestos') - F('descuento'),
+            updated_at=timezone.now(),
+        )
+
+
 class Venta(BaseModel):
     """
     Modelo principal para gestionar las ventas de productos.
@@ -202,10 +267,20 @@ class Venta(BaseModel):
                                 on_delete=models.PROTECT, related_name="ventas_realizadas",
                                 null=True, blank=True)
     
+    objects = SoftDeleteManager.from_queryset(VentaQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(VentaQuerySet)()
+    
     class Meta:
         verbose_name = _("Venta")
         verbose_name_plural = _("Ventas")
         ordering = ['-fecha_venta']
+        indexes = [
+            models.Index(fields=['-fecha_venta'], condition=models.Q(is_active=True),
+                         name='venta_activa_fecha_idx'),
+            models.Index(fields=['cliente', '-fecha_venta'], name='venta_cliente_fecha_idx'),
+            # Cambios desde la marca de agua de los resúmenes diarios
+            models.Index(fields=['updated_at'], name='venta_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Venta {self.codigo} - {self.cliente.username}"
@@ -214,7 +289,9 @@ class Venta(BaseModel):
         """
         Calcula el total de la venta basado en los detalles.
         """
-        self.subtotal = sum(detalle.subtotal for detalle in self.detalles.all())
+        self.subtotal = self.detalles.aggregate(
+            total=Coalesce(Sum(DetalleVenta.expresion_subtotal()), Value(Decimal('0')))
+        )['total']
         self.total = self.subtotal + self.impuestos - self.descuento
         return self.total
 
@@ -239,6 +316,9 @@ class DetalleVenta(BaseModel):
         verbose_name_plural = _("Detalles de venta")
         ordering = ['venta', 'id']
         unique_together = [['venta', 'producto']]
+        indexes = [
+            models.Index(fields=['updated_at'], name='detalle_venta_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.producto.nombre} ({self.cantidad}) - {self.venta.codigo}"
@@ -249,6 +329,36 @@ class DetalleVenta(BaseModel):
         Calcula el subtotal del detalle (precio * cantidad - descuento).
         """
         return (self.precio_unitario * self.cantidad) - self.descuento_unitario
+    
+    @staticmethod
+    def expresion_subtotal():
+        """
+        Expresión SQL equivalente a subtotal.
+        """
+        return F('precio_unitario') * F('cantidad') - F('descuento_unitario')
+
+
+class CarritoQuerySet(SoftDeleteQuerySet):
+    
+    @staticmethod
+    def _totales(prefijo=''):
+        """
+        Agregados de cantidad y subtotal sobre los items activos.
+        """
+        filtro = Q(**{f'{prefijo}is_active': True})
+        importe = (Producto.expresion_precio_actual(f'{prefijo}producto__') *
+                   F(f'{prefijo}cantidad'))
+        return {
+            'total_items': Coalesce(Sum(f'{prefijo}cantidad', filter=filtro), 0),
+            'subtotal': Coalesce(Sum(importe, filter=filtro), Value(Decimal('0')),
+                                 output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        }
+    
+    def with_totals(self):
+        """
+        Anota total_items y subtotal de cada carrito en la misma consulta.
+        """
+        return self.annotate(**self._totales('items__'))
 
 
 class Carrito(BaseModel):
@@ -260,6 +370,9 @@ class Carrito(BaseModel):
     fecha_creacion = models.DateTimeField(_("Fecha de creación"), auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(_("Fecha de actualización"), auto_now=True)
     
+    objects = SoftDeleteManager.from_queryset(CarritoQuerySet)()
+    all_with_deleted = models.Manager.from_queryset(CarritoQuerySet)()
+    
     class Meta:
         verbose_name = _("Carrito")
         verbose_name_plural = _("Carritos")
@@ -268,26 +381,51 @@ class Carrito(BaseModel):
     def __str__(self):
         return f"Carrito de {self.usuario.username}"
     
+    def resumen(self, refrescar=False):
+        """
+        Devuelve {'total_items', 'subtotal'} con una única consulta agregada.
+        El resultado se memoriza en la instancia; usar refrescar=True tras
+        modificar los items.
+        """
+        if refrescar or '_resumen' not in self.__dict__:
+            if not refrescar and '_total_items' in self.__dict__ and '_subtotal' in self.__dict__:
+                self._resumen = {'total_items': self._total_items, 'subtotal': self._subtotal}
+            else:
+                self._resumen = ItemCarrito.objects.filter(carrito=self).aggregate(
+                    **CarritoQuerySet._totales()
+                )
+        return self._resumen
+    
     @property
     def total_items(self):
         """
         Cuenta el número total de items en el carrito.
         """
-        return sum(item.cantidad for item in self.items.all())
+        return self.resumen()['total_items']
+    
+    @total_items.setter
+    def total_items(self, valor):
+        self._total_items = valor
     
     @property
     def subtotal(self):
         """
         Calcula el subtotal del carrito.
         """
-        return sum(item.subtotal for item in self.items.all())
+        return self.resumen()['subtotal']
+    
+    @subtotal.setter
+    def subtotal(self, valor):
+        self._subtotal = valor
     
-    def convertir_a_venta(self):
+    def convertir_a_venta(self, **kwargs):
         """
         Convierte el carrito en una venta efectiva.
+        Ver apps.ventas.services.checkout.
         """
-        # Esta lógica se implementará en las vistas
-        pass
+        from apps.ventas.services import checkout
+        
+        return checkout(self, **kwargs)
 
 
 class ItemCarrito(BaseModel):
@@ -0,0 +1,92 @@
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.ventas.models import Carrito, Producto, Venta, DetalleVenta, ItemCarrito, EstadoVenta
+
+
+def generar_codigo_venta():
+    return f"V{timezone.now():%Y%m%d}-{uuid.uuid4().hex[:10].upper()}"
+
+
+def checkout(carrito, metodo_pago=None, vendedor=None, estado="Pendiente", notas=""):
+    """
+    Convierte el carrito en una venta dentro de una única transacción.
+
+    El carrito se bloquea al empezar y sus items se leen después, de modo que
+    dos checkouts simultáneos del mismo carrito se serializan y el segundo lo
+    encuentra vacío.
+
+    Los productos se bloquean en orden de pk para que dos compras con
+    productos en común no se bloqueen mutuamente, y el stock se descuenta con
+    un UPDATE condicional, por lo que nunca queda en negativo. Si algún
+    producto no tiene stock suficiente se lanza ValidationError y no se
+    modifica nada.
+    """
+    with transaction.atomic():
+        Carrito.all_with_deleted.select_for_update().filter(pk=carrito.pk).values_list('pk', flat=True).get()
+        items = list(ItemCarrito.objects
+                     .filter(carrito=carrito)
+                     .order_by('producto_id')
+                     .values_list('producto_id', 'cantidad'))
+        if not items:
+            raise ValidationError(_("El carrito está vacío."), code='carrito_vacio')
+        
+        productos = {
+            producto.pk: producto
+            for producto in Producto.objects
+            .select_for_update()
+            .filter(pk__in=[producto_id for producto_id, _cantidad in items])
+            .order_by('pk')
+            .only('id', 'nombre', 'precio', 'precio_oferta')
+        }
+        
+        for producto_id, cantidad in items:
+            if producto_id not in productos:
+                raise ValidationError(_("Uno de los productos del carrito ya no está disponible."),
+                                      code='producto_no_disponible')
+            actualizados = Producto.objects.filter(pk=producto_id, stock__gte=cantidad).update(
+                stock=F('stock') - cantidad, updated_at=timezone.now()
+            )
+            if not actualizados:
+                raise ValidationError(
+                    _("No hay stock suficiente de %(producto)s."),
+                    code='stock_insuficiente', params={'producto': productos[producto_id].nombre},
+                )
+        
+        estado_venta = EstadoVenta.objects.por_nombre(estado)
+        if estado_venta is None:
+            raise ValidationError(_("No existe el estado de venta %(estado)s."),
+                                  code='estado_inexistente', params={'estado': estado})
+        
+        venta = Venta.objects.create(
+            codigo=generar_codigo_venta(),
+            cliente_id=carrito.usuario_id,
+            estado=estado_venta,
+            metodo_pago=metodo_pago,
+            vendedor=vendedor,
+            notas=notas,
+            subtotal=0,
+            total=0,
+        )
+        DetalleVenta.objects.bulk_create([
+            DetalleVenta(
+                venta=venta,
+                producto_id=producto_id,
+                cantidad=cantidad,
+                precio_unitario=productos[producto_id].precio_actual,
+            )
+            for producto_id, cantidad in items
+        ])
+        
+        venta.calcular_total()
+        venta.save(update_fields=['subtotal', 'total', 'updated_at'])
+        
+        # Borrado físico: (carrito, producto) es único y el carrito debe poder reutilizarse
+        ItemCarrito.all_with_deleted.filter(carrito=carrito).hard_delete()
+    
+    return venta
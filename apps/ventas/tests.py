@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from apps.socios.models import Usuario
+from apps.ventas.models import Carrito, CategoriaProducto, EstadoVenta, ItemCarrito, Producto, Venta
+from apps.ventas.services import checkout
+
+
+class CheckoutTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        EstadoVenta.objects.create(nombre="Pendiente")
+        categoria = CategoriaProducto.objects.create(nombre="Material", slug="material")
+        cls.producto = Producto.objects.create(codigo="P1", nombre="Pelota", categoria=categoria,
+                                               precio=Decimal('10'), stock=5)
+        cls.carrito = Carrito.objects.create(usuario=Usuario.objects.create(username="cliente"))
+
+    def test_checkout(self):
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.producto, cantidad=2)
+
+        venta = checkout(self.carrito)
+
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 3)
+        self.assertEqual(venta.total, Decimal('20'))
+        self.assertFalse(ItemCarrito.all_with_deleted.filter(carrito=self.carrito).exists())
+
+    def test_doble_checkout_del_mismo_carrito(self):
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.producto, cantidad=2)
+
+        checkout(self.carrito)
+        with self.assertRaises(ValidationError) as contexto:
+            checkout(self.carrito)
+
+        self.assertEqual(contexto.exception.code, 'carrito_vacio')
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 3)
+        self.assertEqual(Venta.objects.filter(cliente=self.carrito.usuario).count(), 1)
+
+    def test_stock_insuficiente_no_modifica_nada(self):
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.producto, cantidad=6)
+
+        with self.assertRaises(ValidationError) as contexto:
+            checkout(self.carrito)
+
+        self.assertEqual(contexto.exception.code, 'stock_insuficiente')
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 5)
+        self.assertTrue(ItemCarrito.objects.filter(carrito=self.carrito).exists())
@@ -0,0 +1,8 @@
+"""
+Benchmarks de los caminos críticos de los modelos.
+
+Se ejecutan contra la base de datos configurada (normalmente poblada con
+`generar_datos_sinteticos`) mediante el comando `ejecutar_benchmarks`, que
+guarda los resultados en JSON y falla si algún escenario empeora respecto a
+un resultado de referencia.
+"""
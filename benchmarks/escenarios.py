@@ -0,0 +1,344 @@
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as hora, timedelta
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from apps.administracion import exportacion as exportaciones_contables
+from apps.clases import services as servicios_clases
+from apps.clases.models import (Clase, SesionClase, InscripcionClase, ListaEsperaClase, CategoriaClase,
+                                NivelClase, Instructor)
+from apps.common.utils import en_hilos
+from apps.socios.models import Suscripcion
+from apps.ventas import services as servicios_ventas
+from apps.ventas.models import Carrito, ItemCarrito, Producto, CategoriaProducto, Venta
+from benchmarks.medicion import Escenario, EscenarioConcurrente, EscenarioMetricas, MedidorMemoria, SinDatos
+
+PREFIJO = "bench"
+
+
+def _muestra(queryset, n):
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:n])
+    if not ids:
+        raise SinDatos(f"no hay filas de {queryset.model._meta.verbose_name_plural}")
+    return ids
+
+
+# Escenarios de una sola conexión, deshechos al terminar
+
+def sesion_plazas_disponibles(n):
+    ids = _muestra(SesionClase.objects.filter(fecha__gte=timezone.now().date()), n)
+
+    def medir():
+        for sesion in SesionClase.objects.filter(pk__in=ids).select_related('clase'):
+            sesion.plazas_disponibles
+    return medir
+
+
+def sesion_with_availability(n):
+    ids = _muestra(SesionClase.objects.filter(fecha__gte=timezone.now().date()), n)
+
+    def medir():
+        for sesion in SesionClase.objects.filter(pk__in=ids).with_availability():
+            sesion.plazas_disponibles
+    return medir
+
+
+def carrito_subtotal(n):
+    ids = _muestra(Carrito.objects.all(), n)
+
+    def medir():
+        for carrito in Carrito.objects.filter(pk__in=ids):
+            carrito.total_items, carrito.subtotal
+    return medir
+
+
+def carrito_with_totals(n):
+    ids = _muestra(Carrito.objects.all(), n)
+
+    def medir():
+        for carrito in Carrito.objects.filter(pk__in=ids).with_totals():
+            carrito.total_items, carrito.subtotal
+    return medir
+
+
+def venta_calcular_total(n):
+    ids = _muestra(Venta.objects.all(), n)
+
+    def medir():
+        for venta in Venta.objects.filter(pk__in=ids):
+            venta.calcular_total()
+    return medir
+
+
+def suscripcion_renovar(n):
+    ids = _muestra(Suscripcion.objects.filter(fecha_fin__isnull=False), n)
+
+    def medir():
+        for suscripcion in Suscripcion.objects.filter(pk__in=ids):
+            suscripcion.renovar()
+    return medir
+
+
+def usuario_save(n):
+    Usuario = get_user_model()
+    contador = itertools.count()
+
+    def medir():
+        for _ in range(n):
+            Usuario(username=f"{PREFIJO}-save-{next(contador)}", es_socio=True).save()
+    return medir
+
+
+def changelist(model_admin):
+    opts = model_admin.model._meta
+
+    def preparar(n):
+        Usuario = get_user_model()
+        usuario = Usuario.objects.create(username=f"{PREFIJO}-admin", is_staff=True, is_superuser=True)
+        cliente = Client()
+        cliente.force_login(usuario)
+        url = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+
+        @override_settings(ALLOWED_HOSTS=['*'])
+        def medir():
+            respuesta = cliente.get(url)
+            if respuesta.status_code != 200:
+                raise AssertionError(f"{url} devolvió {respuesta.status_code}")
+        return medir
+    return preparar
+
+
+# Escenarios concurrentes: cada hilo usa su propia conexión y confirma
+
+def concurrencia_numero_socio(n, hilos):
+    Usuario = get_user_model()
+    nombres = [f"{PREFIJO}-alta-{timezone.now():%Y%m%d%H%M%S}-{i}" for i in range(n)]
+
+    def alta(nombre):
+        return Usuario.objects.create(username=nombre, es_socio=True).numero_socio
+
+    try:
+        numeros, reintentos = en_hilos(alta, nombres, hilos)
+    finally:
+        Usuario.objects.filter(username__in=nombres).delete()
+
+    invariantes = []
+    if len(set(numeros)) != n:
+        invariantes.append(f"{n - len(set(numeros))} números de socio duplicados")
+    return {'operaciones': n, 'reintentos': reintentos, 'invariantes': invariantes}
+
+
+def concurrencia_inscripcion(n, hilos):
+    Usuario = get_user_model()
+    socios = list(Usuario.objects.filter(es_socio=True).order_by('pk')[:n])
+    instructor = Instructor.objects.first()
+    categoria, nivel = CategoriaClase.objects.first(), NivelClase.objects.first()
+    if not socios or instructor is None or categoria is None or nivel is None:
+        raise SinDatos("se necesitan socios, un instructor y catálogos de clases")
+
+    capacidad = max(1, len(socios) // 10)
+    clase = Clase.objects.create(nombre=f"{PREFIJO} inscripción", descripcion="", categoria=categoria,
+                                 nivel=nivel, capacidad_maxima=capacidad, precio=10, solo_socios=False)
+    try:
+        sesion = SesionClase.objects.create(clase=clase, instructor=instructor,
+                                            fecha=timezone.now().date() + timedelta(days=1),
+                                            hora_inicio=hora(10), hora_fin=hora(11))
+
+        def inscribir(socio):
+            try:
+                return type(servicios_clases.inscribir(socio, sesion)).__name__
+            except ValidationError as error:
+                return error.code
+
+        resultados, reintentos = en_hilos(inscribir, socios, hilos)
+        inscritos = InscripcionClase.objects.filter(sesion=sesion, cancelada=False).count()
+        en_espera = ListaEsperaClase.objects.filter(sesion=sesion, atendida=False).count()
+    finally:
+        Clase.all_with_deleted.filter(pk=clase.pk).hard_delete()
+
+    invariantes = []
+    if inscritos > capacidad:
+        invariantes.append(f"{inscritos} inscritos para {capacidad} plazas")
+    if en_espera and inscritos < capacidad:
+        invariantes.append(f"{en_espera} en espera con {capacidad - inscritos} plazas libres")
+    return {'operaciones': len(socios), 'reintentos': reintentos, 'inscritos': inscritos,
+            'en_espera': en_espera, 'rechazadas': len(resultados) - inscritos - en_espera,
+            'invariantes': invariantes}
+
+
+def concurrencia_checkout(n, hilos):
+    Usuario = get_user_model()
+    categoria = CategoriaProducto.objects.first()
+    if categoria is None:
+        raise SinDatos("no hay categorías de productos")
+
+    stock = max(1, n // 2)
+    marca = f"{PREFIJO}-checkout-{timezone.now():%Y%m%d%H%M%S}"
+    producto = Producto.objects.create(codigo=marca, nombre=marca, descripcion="", categoria=categoria,
+                                       precio=10, stock=stock)
+    usuarios = Usuario.objects.bulk_create([Usuario(username=f"{marca}-{i}") for i in range(n)])
+    carritos = Carrito.objects.bulk_create([Carrito(usuario=usuario) for usuario in usuarios])
+    ItemCarrito.objects.bulk_create([ItemCarrito(carrito=carrito, producto=producto, cantidad=1)
+                                     for carrito in carritos])
+    try:
+        def comprar(carrito):
+            try:
+                servicios_ventas.checkout(carrito)
+                return 'venta'
+            except ValidationError as error:
+                return error.code
+
+        resultados, reintentos = en_hilos(comprar, carritos, hilos)
+        producto.refresh_from_db()
+        ventas = Venta.objects.filter(cliente__in=usuarios).count()
+    finally:
+        Venta.all_with_deleted.filter(cliente__in=usuarios).hard_delete()
+        Producto.all_with_deleted.filter(pk=producto.pk).hard_delete()
+        Usuario.objects.filter(pk__in=[usuario.pk for usuario in usuarios]).delete()
+
+    invariantes = []
+    if producto.stock < 0:
+        invariantes.append(f"stock negativo ({producto.stock})")
+    if ventas + producto.stock != stock:
+        invariantes.append(f"{ventas} ventas con stock inicial {stock} y final {producto.stock}")
+    if ventas != min(stock, len(carritos)):
+        invariantes.append(f"{ventas} ventas, se esperaban {min(stock, len(carritos))}")
+    return {'operaciones': len(carritos), 'reintentos': reintentos, 'ventas': ventas,
+            'sin_stock': resultados.count('stock_insuficiente'), 'invariantes': invariantes}
+
+
+def rendimiento_peticiones(n, hilos):
+    """
+    Lanza `n` peticiones al admin repartidas entre `hilos` clientes con sesión
+    iniciada. Cada hilo conserva su conexión entre peticiones, como un worker
+    de gunicorn, por lo que el resultado refleja CONN_MAX_AGE y el pool de
+    conexiones de la configuración activa.
+    """
+    Usuario = get_user_model()
+    usuario = Usuario.objects.create(username=f"{PREFIJO}-peticiones-{timezone.now():%Y%m%d%H%M%S}",
+                                     is_staff=True, is_superuser=True)
+    urls = [reverse('admin:index')] + [
+        reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        for model in list(admin.site._registry)[:5]
+    ]
+    try:
+        with override_settings(ALLOWED_HOSTS=['*']):
+            clientes = []
+            for _ in range(hilos):
+                cliente = Client()
+                cliente.force_login(usuario)
+                clientes.append(cliente)
+
+            def trabajador(indice):
+                cliente = clientes[indice]
+                tiempos, errores = [], 0
+                try:
+                    for numero in range(indice, n, hilos):
+                        inicio = time.perf_counter()
+                        if cliente.get(urls[numero % len(urls)]).status_code != 200:
+                            errores += 1
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                finally:
+                    connection.close()
+                return tiempos, errores
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(hilos) as pool:
+                resultados = list(pool.map(trabajador, range(hilos)))
+            duracion = time.perf_counter() - inicio
+    finally:
+        Usuario.objects.filter(pk=usuario.pk).delete()
+
+    tiempos = sorted(tiempo for parcial, _errores in resultados for tiempo in parcial)
+    errores = sum(parcial for _tiempos, parcial in resultados)
+    invariantes = [f"{errores} peticiones sin respuesta 200"] if errores else []
+    return {'operaciones': n, 'peticiones_s': round(n / duracion, 1),
+            'p50_ms': round(statistics.median(tiempos), 1),
+            'p95_ms': round(tiempos[int(len(tiempos) * 0.95) - 1], 1),
+            'invariantes': invariantes}
+
+
+def exportacion_csv(nombre):
+    """
+    Exporta la tabla completa a un destino nulo y mide filas/s, el tiempo
+    hasta el primer lote de filas y el incremento de memoria residente.
+    """
+
+    def medir(n, hilos):
+        exportacion = exportaciones_contables.obtener_exportacion(nombre)
+        esperadas = exportacion.queryset(using='default').count()
+        if not esperadas:
+            raise SinDatos(f"no hay filas que exportar en {nombre}")
+        filas = 0
+
+        def progreso(total):
+            nonlocal filas
+            filas = total
+
+        primer_lote = None
+        inicio = time.perf_counter()
+        with MedidorMemoria() as memoria:
+            bloques = exportaciones_contables.generar_csv(nombre, replica=False, progreso=progreso)
+            for indice, _bloque in enumerate(bloques):
+                if indice == 1:
+                    primer_lote = (time.perf_counter() - inicio) * 1000
+        duracion = time.perf_counter() - inicio
+        invariantes = [f"{filas} filas exportadas de {esperadas}"] if filas != esperadas else []
+        return {'filas': filas, 'filas_s': round(filas / duracion),
+                'primer_lote_ms': round(primer_lote or 0, 1),
+                'memoria_mb': memoria.incremento_mb, 'invariantes': invariantes}
+
+    return medir
+
+
+ESCENARIOS = [
+    Escenario('sesion.plazas_disponibles', sesion_plazas_disponibles,
+              "Propiedad plazas_disponibles sobre una página de sesiones futuras"),
+    Escenario('sesion.with_availability', sesion_with_availability,
+              "Misma página anotada con with_availability()"),
+    Escenario('carrito.subtotal', carrito_subtotal, "total_items y subtotal de una página de carritos"),
+    Escenario('carrito.with_totals', carrito_with_totals, "Misma página anotada con with_totals()"),
+    Escenario('venta.calcular_total', venta_calcular_total, "calcular_total() de una página de ventas"),
+    Escenario('suscripcion.renovar', suscripcion_renovar, "renovar() de una página de suscripciones"),
+    Escenario('usuario.save', usuario_save, "Alta de socios con asignación de número"),
+    EscenarioConcurrente('concurrencia.numero_socio', concurrencia_numero_socio,
+                         "Altas simultáneas de socios: números únicos"),
+    EscenarioConcurrente('concurrencia.inscripcion', concurrencia_inscripcion,
+                         "Inscripciones simultáneas a una sesión: sin sobreventa de plazas"),
+    EscenarioConcurrente('concurrencia.checkout', concurrencia_checkout,
+                         "Compras simultáneas de un producto: sin stock negativo"),
+    EscenarioConcurrente('peticiones.admin', rendimiento_peticiones,
+                         "Peticiones por segundo al admin con la configuración de base de datos activa"),
+    EscenarioMetricas('exportacion.ventas', exportacion_csv('ventas'),
+                      "Exportación CSV de todas las líneas de venta: filas/s y memoria"),
+    EscenarioMetricas('exportacion.alquileres', exportacion_csv('alquileres'),
+                      "Exportación CSV de todas las líneas de alquiler: filas/s y memoria"),
+    EscenarioMetricas('exportacion.pagos', exportacion_csv('pagos'),
+                      "Exportación CSV de todos los pagos de suscripciones: filas/s y memoria"),
+]
+
+
+def escenarios():
+    """
+    Escenarios fijos más un listado del admin por cada modelo registrado.
+    """
+    listados = []
+    for model, model_admin in admin.site._registry.items():
+        try:
+            preparar = changelist(model_admin)
+            reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        except NoReverseMatch:
+            continue
+        listados.append(Escenario(f'admin.{model._meta.label_lower}', preparar,
+                                  f"Listado del admin de {model._meta.verbose_name_plural}"))
+    return ESCENARIOS + sorted(listados, key=lambda escenario: escenario.nombre)
@@ -0,0 +1,182 @@
+import json
+import resource
+import statistics
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+class SinDatos(Exception):
+    """
+    La base de datos no tiene datos suficientes para el escenario.
+    """
+
+
+class Escenario:
+    """
+    Escenario medido dentro de una transacción que se deshace al terminar.
+
+    `preparar(n)` hace la puesta en marcha (fuera del tiempo medido) y
+    devuelve la función que se cronometra en cada repetición.
+    """
+
+    concurrente = False
+
+    def __init__(self, nombre, preparar, descripcion=""):
+        self.nombre = nombre
+        self.preparar = preparar
+        self.descripcion = descripcion
+
+    def ejecutar(self, repeticiones, muestra, hilos):
+        with transaction.atomic():
+            funcion = self.preparar(muestra)
+            # Calentamiento: carga catálogos cacheados y compila plantillas
+            funcion()
+            tiempos = []
+            for _ in range(repeticiones):
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    funcion()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+            transaction.set_rollback(True)
+        return {
+            'consultas': len(consultas),
+            'mediana_ms': round(statistics.median(tiempos), 3),
+            'min_ms': round(min(tiempos), 3),
+            'max_ms': round(max(tiempos), 3),
+            'repeticiones': repeticiones,
+        }
+
+
+class EscenarioConcurrente:
+    """
+    Escenario que lanza varios hilos con conexiones propias y confirma sus
+    transacciones. `funcion(muestra, hilos)` devuelve las métricas y una lista de
+    `invariantes` incumplidos, que siempre se consideran una regresión.
+
+    Escribe en la base de datos: los datos creados se borran al terminar, pero
+    los contadores (como el de números de socio) avanzan.
+    """
+
+    concurrente = True
+
+    def __init__(self, nombre, funcion, descripcion=""):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.descripcion = descripcion
+
+    def ejecutar(self, repeticiones, muestra, hilos):
+        inicio = time.perf_counter()
+        resultado = self.funcion(muestra, hilos)
+        resultado['mediana_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+        resultado['consultas'] = None
+        resultado['repeticiones'] = 1
+        return resultado
+
+
+class EscenarioMetricas(EscenarioConcurrente):
+    """
+    Escenario de solo lectura que devuelve sus propias métricas, como
+    filas/s o memoria. Se ejecuta siempre, sin necesidad de --concurrencia.
+    """
+
+    concurrente = False
+
+
+def rss_actual_mb():
+    """
+    Memoria residente actual del proceso en MB. Fuera de Linux se usa el
+    pico del proceso, que solo sirve como cota superior.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MedidorMemoria:
+    """
+    Muestrea la memoria residente en un hilo mientras dura el bloque y
+    guarda en `incremento_mb` el pico respecto al inicio.
+    """
+
+    def __init__(self, intervalo=0.01):
+        self.intervalo = intervalo
+        self.inicial_mb = self.pico_mb = 0
+        self._parar = threading.Event()
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico_mb = max(self.pico_mb, rss_actual_mb())
+
+    def __enter__(self):
+        self.inicial_mb = self.pico_mb = rss_actual_mb()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+        self.pico_mb = max(self.pico_mb, rss_actual_mb())
+
+    @property
+    def incremento_mb(self):
+        return round(self.pico_mb - self.inicial_mb, 1)
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def guardar(resultados, ruta, metadatos):
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    datos = {
+        'fecha': timezone.now().isoformat(),
+        'commit': commit_actual(),
+        'motor': connection.vendor,
+        **metadatos,
+        'escenarios': resultados,
+    }
+    ruta.write_text(json.dumps(datos, indent=2, ensure_ascii=False))
+    return ruta
+
+
+def cargar(ruta):
+    return json.loads(Path(ruta).read_text())['escenarios']
+
+
+def comparar(actuales, referencia, umbral=0.2, margen_ms=2.0, umbral_consultas=0):
+    """
+    Devuelve la lista de regresiones de `actuales` frente a `referencia`.
+
+    El tiempo es una regresión si la mediana crece más de `umbral` (fracción)
+    y más de `margen_ms`, para no fallar por ruido en escenarios muy rápidos.
+    Las consultas lo son si crecen más de `umbral_consultas`.
+    """
+    regresiones = []
+    for nombre, actual in actuales.items():
+        for invariante in actual.get('invariantes', []):
+            regresiones.append(f"{nombre}: {invariante}")
+
+        base = referencia.get(nombre)
+        if base is None:
+            continue
+        if actual['consultas'] is not None and base.get('consultas') is not None:
+            if actual['consultas'] > base['consultas'] + umbral_consultas:
+                regresiones.append(f"{nombre}: {base['consultas']} -> {actual['consultas']} consultas")
+        limite = max(base['mediana_ms'] * (1 + umbral), base['mediana_ms'] + margen_ms)
+        if actual['mediana_ms'] > limite:
+            regresiones.append(f"{nombre}: {base['mediana_ms']:.1f} -> {actual['mediana_ms']:.1f} ms")
+    return regresiones
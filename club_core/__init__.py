@@ -0,0 +1,9 @@
+# Load the Celery app when Django starts so that @shared_task uses it
+try:
+    from .celery import app as celery_app
+except ModuleNotFoundError as exc:
+    if exc.name != 'celery':
+        raise
+    celery_app = None
+
+__all__ = ('celery_app',)
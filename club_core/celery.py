@@ -0,0 +1,26 @@
+"""
+Aplicación Celery del proyecto.
+
+    celery -A club_core worker --beat
+"""
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'club_core.settings')
+
+app = Celery('club_core')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    'penalizar-retrasos': {
+        'task': 'alquiler.penalizar_retrasos',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'actualizar-resumenes': {
+        'task': 'administracion.actualizar_resumenes',
+        'schedule': crontab(minute='*/15'),
+    },
+}
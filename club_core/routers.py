@@ -0,0 +1,62 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+_replica_forzada = ContextVar('replica_forzada', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def en_replica():
+    """
+    Envía a las réplicas todas las lecturas del bloque. Pensado para informes
+    y exportaciones, que toleran unos segundos de retraso.
+    """
+    token = _replica_forzada.set(True)
+    try:
+        yield
+    finally:
+        _replica_forzada.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Envía a una réplica de lectura las consultas de los modelos de catálogo
+    (REPLICA_MODELOS) y las lecturas dentro de en_replica(). Las escrituras y
+    el resto de lecturas van a 'default'.
+
+    Dentro de una transacción abierta en 'default', o al seguir relaciones de
+    una instancia leída de 'default', se lee de 'default' para ver lo que se
+    acaba de escribir.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = replicas()
+        if not alias:
+            return None
+        if transaction.get_connection('default').in_atomic_block:
+            return 'default'
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db == 'default':
+            return 'default'
+        if _replica_forzada.get() or model._meta.label_lower in getattr(settings, 'REPLICA_MODELOS', ()):
+            return random.choice(alias)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {'default', *replicas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'